@@ -0,0 +1,56 @@
+""" Benchmark: replaying calls from a cassette against sending them to a local server
+
+Records calls to a mix of endpoints from the mock server, then times
+the same calls sent to the server and replayed from the cassette.
+Replayed calls cost no network, so a profile of them measures the
+client's own code.
+
+    python -m benchmarks.bench_cassette
+"""
+
+import os
+import tempfile
+import time
+
+from spoonacular import API, CassetteTransport
+from spoonacular.mock import MockSpoonacular
+
+CALLS = 2000
+
+
+def calls(api):
+    for i in range(CALLS):
+        kind = i % 4
+        if kind == 0:
+            api.get_recipe_information(i % 200, includeNutrition=True)
+        elif kind == 1:
+            api.get_recipe_information_bulk('{},{},{}'.format(i, i + 1, i + 2))
+        elif kind == 2:
+            api.search_recipes_complex('pasta', offset=i % 100, number=10)
+        else:
+            api.parse_ingredients('1 cup flour\n2 eggs', servings=i % 4 + 1)
+
+
+def bench(api):
+    start = time.perf_counter()
+    calls(api)
+    return CALLS / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    path = os.path.join(tempfile.mkdtemp(), 'bench.cassette')
+    with MockSpoonacular(limits={'requests': 10**9, 'results': 10**9}) as server:
+        with API('bench-key', sleep_time=0, transport=CassetteTransport(path, 'record')) as api:
+            api.api_root = server.url
+            recording = bench(api)
+        with API('bench-key', sleep_time=0) as api:
+            api.api_root = server.url
+            live = bench(api)
+    with API('bench-key', sleep_time=0, transport=CassetteTransport(path)) as api:
+        replay = bench(api)
+    print("{} calls, cassette of {} responses, {:.1f} MB".format(
+        CALLS, len(api.transport), os.path.getsize(path) / 2**20))
+    print("local server     {:8.0f} calls/s".format(live))
+    print("recording        {:8.0f} calls/s".format(recording))
+    print("replay           {:8.0f} calls/s {:6.1f}x".format(replay, replay / live))
+    os.remove(path)
@@ -0,0 +1,86 @@
+""" Benchmark: sync client throughput, latency and memory at several concurrency levels
+
+Runs the mock Spoonacular server in its own process, so the server's
+work doesn't compete with the client's for the GIL or show up in the
+client's memory, and calls a mix of endpoints from a growing number of
+threads sharing one API instance. Reports calls per second, p50/p99
+call latency and peak memory per call in flight.
+
+    python -m benchmarks.bench_client [--latency 0.02] [--calls 2000]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from spoonacular import API, RequestsTransport
+
+CALLS = [
+    lambda api, i: api.get_recipe_information(i, includeNutrition=True),
+    lambda api, i: api.get_recipe_information_bulk('{},{},{}'.format(i, i + 1, i + 2)),
+    lambda api, i: api.search_recipes_complex('pasta', offset=i % 100, number=10),
+    lambda api, i: api.parse_ingredients('1 cup flour\n2 eggs\n1 tbsp butter', servings=2),
+    lambda api, i: api.get_wine_pairing('steak'),
+]
+
+
+def start_server(latency):
+    server = subprocess.Popen([sys.executable, '-m', 'spoonacular.mock', '--port', '0',
+                               '--latency', str(latency)], stdout=subprocess.PIPE, text=True)
+    return server, server.stdout.readline().strip()
+
+
+def run(url, concurrency, calls):
+    """ Returns the call latencies and the total time of `calls` calls """
+    transport = RequestsTransport(pool_maxsize=concurrency)
+    with API('bench-key', sleep_time=0, transport=transport) as api:
+        api.api_root = url
+
+        def call(i):
+            start = time.perf_counter()
+            CALLS[i % len(CALLS)](api, i).raise_for_status()
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            latencies = list(executor.map(call, range(calls)))
+        return latencies, time.perf_counter() - start
+
+
+def memory_per_call(url, concurrency, calls):
+    """ Returns the peak memory allocated while calls were in flight, per call in flight """
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    run(url, concurrency, calls)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (peak - baseline) / concurrency
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.02, help="server latency (seconds)")
+    parser.add_argument('--calls', type=int, default=2000, help="calls per concurrency level")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    server, url = start_server(args.latency)
+    try:
+        run(url, 4, 50)  # Warm up
+        print("{} calls per level, {:.0f} ms server latency".format(args.calls, args.latency * 1000))
+        print("{:>8} {:>10} {:>9} {:>9} {:>12}".format(
+            'threads', 'calls/s', 'p50 ms', 'p99 ms', 'KiB/call'))
+        for concurrency in args.concurrency:
+            latencies, elapsed = run(url, concurrency, args.calls)
+            quantiles = statistics.quantiles(latencies, n=100)
+            memory = memory_per_call(url, concurrency, min(args.calls, 20 * concurrency))
+            print("{:>8d} {:>10.1f} {:>9.1f} {:>9.1f} {:>12.1f}".format(
+                concurrency, args.calls / elapsed, quantiles[49] * 1000, quantiles[98] * 1000,
+                memory / 1024))
+    finally:
+        server.terminate()
+        server.wait()
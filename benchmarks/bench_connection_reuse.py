@@ -0,0 +1,40 @@
+""" Benchmark: throughput of the sync client under different connection pools
+
+Runs many threads sharing one API instance against a local stand-in
+server and reports calls per second and connections opened.
+
+    python -m benchmarks.bench_connection_reuse
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from spoonacular import API, HTTPXTransport, RequestsTransport
+from spoonacular.mock import MockSpoonacular
+
+THREADS = 32
+CALLS = 1000
+
+
+def bench(name, transport):
+    with MockSpoonacular(latency=0.002, limits={'requests': 10**9}) as server:
+        with API('bench-key', sleep_time=0, transport=transport) as api:
+            api.api_root = server.url
+            start = time.perf_counter()
+            with ThreadPoolExecutor(THREADS) as executor:
+                list(executor.map(lambda _: api.get_wine_description('merlot'), range(CALLS)))
+            elapsed = time.perf_counter() - start
+        print("{:<34} {:8.0f} calls/s {:6d} connections".format(
+            name, CALLS / elapsed, server.connections_opened))
+
+
+if __name__ == '__main__':
+    print("{} threads, {} calls".format(THREADS, CALLS))
+    bench("no keep-alive", RequestsTransport(keep_alive=False))
+    bench("pool of 10 (requests default)", RequestsTransport())
+    bench("pool of {}".format(THREADS), RequestsTransport(pool_maxsize=THREADS))
+    bench("pool of 8, blocking", RequestsTransport(pool_maxsize=8, pool_block=True))
+    try:
+        bench("httpx", HTTPXTransport(max_keepalive_connections=THREADS))
+    except ImportError:
+        print("httpx is not installed")
@@ -0,0 +1,66 @@
+""" Benchmark: estimating and scheduling the quota cost of 50,000 queued calls
+
+Compares a determineCostOfEndpoint call per planned call against the
+compiled CostModel, with and without NumPy, and times splitting the
+queue into days that fit the quota. No network calls are made.
+
+    python -m benchmarks.bench_cost_model
+"""
+
+import random
+import time
+
+from spoonacular import API, CostModel
+from spoonacular.planner import _load_numpy
+
+LIMITS = {'requests': 1500, 'tinyrequests': 1500, 'results': 3000}
+
+
+def planned_calls(number, rng):
+    makers = [
+        lambda: ('get_recipe_information_bulk', {'ids': ','.join(str(rng.randint(1, 10**6))
+                                                                 for _ in range(rng.randint(1, 100)))}),
+        lambda: ('search_recipes_complex', {'query': 'pasta', 'number': rng.randint(1, 100),
+                                            'offset': rng.randint(0, 900)}),
+        lambda: ('parse_ingredients', {'ingredientList': '1 egg\n2 apples', 'servings': 1}),
+        lambda: ('quick_answer', {'q': 'How much vitamin c is in 2 apples?'}),
+        lambda: ('get_recipe_information', {'id': rng.randint(1, 10**6)}),
+    ]
+    return [rng.choice(makers)() for _ in range(number)]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def per_call(api, calls):
+    total = dict.fromkeys(LIMITS, 0)
+    for name, kwargs in calls:
+        # None of the planned endpoints take a whole JSON body, so the
+        # keyword arguments stand in for all the fields
+        for category, amount in api.determineCostOfEndpoint(name, query=kwargs, params=kwargs,
+                                                            json=kwargs).items():
+            total[category] += amount
+    return total
+
+
+if __name__ == '__main__':
+    calls = planned_calls(50000, random.Random(0))
+    expected, seconds = timed(per_call, API('bench-key'), calls)
+    print("per-call estimates:      {:8.1f} ms".format(seconds * 1000))
+    for use_numpy in ((False, True) if _load_numpy() is not None else (False,)):
+        model = CostModel(use_numpy=use_numpy)
+        total, seconds = timed(model.total, calls)
+        assert total == expected, (total, expected)
+        schedule, scheduling = timed(model.schedule, calls, LIMITS)
+        label = 'numpy' if use_numpy else 'python'
+        print("CostModel ({}):  {:8.1f} ms, schedule {:8.1f} ms ({} days)".format(
+            label.ljust(6), seconds * 1000, scheduling * 1000, len(schedule.days)))
+        counts = {}
+        for name, _ in calls:
+            counts[name] = counts.get(name, 0) + 1
+        _, seconds = timed(model.total_counts, counts, {'search_recipes_complex': {'number': 50},
+                                                        'get_recipe_information_bulk': {'ids': '1,' * 50}})
+        print("  from counts per endpoint: {:8.3f} ms".format(seconds * 1000))
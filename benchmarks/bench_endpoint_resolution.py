@@ -0,0 +1,86 @@
+""" Micro-benchmark: per-call cost of dispatching an endpoint method
+
+Compares the methods generated from the endpoint table, which pass their
+name and a pre-split path straight to API._make_request, against the
+hand-written @endpoint_method methods they replaced (a thread-local
+endpoint name, str.format and empty dicts on every call) and the
+inspect.stack() lookup before that. No network calls are made.
+
+    python -m benchmarks.bench_endpoint_resolution
+"""
+
+import functools
+import inspect
+import threading
+import timeit
+
+from spoonacular import API
+
+
+class _CallContext(threading.local):
+    endpoint = None
+
+
+_context = _CallContext()
+
+
+def endpoint_method(func):
+    """ The legacy decorator: names the running endpoint through a thread-local """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        previous = _context.endpoint
+        _context.endpoint = name
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _context.endpoint = previous
+    return wrapper
+
+
+class OfflineAPI(API):
+    """ Resolves the endpoint as usual but never sends the request """
+
+    def _send(self, endpoint, path, method, query_, params_, json_):
+        return endpoint
+
+
+class DecoratedAPI(OfflineAPI):
+    """ The previous behavior: a hand-written method naming itself through a thread-local """
+
+    @endpoint_method
+    def get_recipe_information(self, id, includeNutrition=None):
+        endpoint = "recipes/{id}/information".format(id=id)
+        url_query = {}
+        url_params = {"includeNutrition": includeNutrition}
+        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
+
+    def _make_request(self, path, method='GET', endpoint=None,
+                      query_=None, params_=None, json_=None):
+        if endpoint is None:
+            endpoint = _context.endpoint
+        return super()._make_request(path, method, endpoint, query_, params_, json_)
+
+
+class StackInspectingAPI(DecoratedAPI):
+    """ The original behavior: look the caller up on the call stack """
+
+    def _make_request(self, path, method='GET', endpoint=None,
+                      query_=None, params_=None, json_=None):
+        endpoint = inspect.stack()[1].function
+        return self._send(endpoint, path, method, query_, params_, json_)
+
+
+def bench(api, number):
+    seconds = timeit.timeit(lambda: api.get_recipe_information(479101), number=number)
+    return seconds / number * 1e6
+
+
+if __name__ == '__main__':
+    table = bench(OfflineAPI('bench-key', sleep_time=0), 200000)
+    decorated = bench(DecoratedAPI('bench-key', sleep_time=0), 200000)
+    stack = bench(StackInspectingAPI('bench-key', sleep_time=0), 2000)
+    print("endpoint table:   {:10.2f} us/call".format(table))
+    print("thread-local:     {:10.2f} us/call ({:.1f}x)".format(decorated, decorated / table))
+    print("inspect.stack():  {:10.2f} us/call ({:.1f}x)".format(stack, stack / table))
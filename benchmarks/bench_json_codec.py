@@ -0,0 +1,80 @@
+""" Benchmark: JSON codecs on large recipe and nutrition bodies
+
+Decodes and encodes bodies shaped like a 100-recipe
+get_recipe_information_bulk response with nutrition included, and like
+a recipe nutrition response, with every installed codec.
+
+    python -m benchmarks.bench_json_codec
+"""
+
+import random
+import time
+
+from spoonacular import codec
+
+NUTRIENTS = ['Calories', 'Fat', 'Saturated Fat', 'Carbohydrates', 'Net Carbohydrates',
+             'Sugar', 'Cholesterol', 'Sodium', 'Protein', 'Vitamin C', 'Manganese',
+             'Fiber', 'Vitamin B6', 'Folate', 'Potassium', 'Magnesium', 'Vitamin A',
+             'Copper', 'Iron', 'Calcium', 'Vitamin K', 'Phosphorus', 'Zinc', 'Vitamin E']
+
+
+def nutrition(rng):
+    return {
+        'nutrients': [{'name': name, 'amount': round(rng.uniform(0, 500), 2), 'unit': 'g',
+                       'percentOfDailyNeeds': round(rng.uniform(0, 100), 2)}
+                      for name in NUTRIENTS],
+        'caloricBreakdown': {'percentProtein': 12.5, 'percentFat': 41.8, 'percentCarbs': 45.7},
+        'weightPerServing': {'amount': rng.randint(50, 800), 'unit': 'g'},
+    }
+
+
+def recipe(rng, id):
+    return {
+        'id': id, 'title': 'Recipe {}'.format(id), 'readyInMinutes': rng.randint(10, 120),
+        'servings': rng.randint(1, 8), 'sourceUrl': 'https://example.com/recipes/{}'.format(id),
+        'vegetarian': rng.random() < 0.3, 'vegan': False, 'glutenFree': rng.random() < 0.2,
+        'dishTypes': ['lunch', 'main course', 'dinner'], 'cuisines': ['Italian'],
+        'summary': 'A delicious recipe. ' * 40,
+        'extendedIngredients': [
+            {'id': 10000 + i, 'name': 'ingredient {}'.format(i), 'aisle': 'Produce',
+             'amount': round(rng.uniform(0.1, 5), 2), 'unit': 'cups', 'meta': ['chopped'],
+             'original': '{} cups of ingredient {}, chopped'.format(i, i)}
+            for i in range(15)],
+        'nutrition': dict(nutrition(rng), ingredients=[
+            {'name': 'ingredient {}'.format(i), 'nutrients': nutrition(rng)['nutrients'][:8]}
+            for i in range(15)]),
+    }
+
+
+def bench(json_codec, body, obj, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        json_codec.loads(body)
+    decode = (time.perf_counter() - start) / repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        json_codec.dumps(obj)
+    encode = (time.perf_counter() - start) / repeat
+    return decode, encode
+
+
+if __name__ == '__main__':
+    rng = random.Random(0)
+    payloads = [('recipe bulk (100 recipes)', [recipe(rng, id) for id in range(100)], 20),
+                ('recipe nutrition', nutrition(rng), 5000)]
+    codecs = []
+    for name in codec.CODECS:
+        try:
+            codecs.append(codec.load_codec(name))
+        except ImportError:
+            print("{:8} not installed".format(name))
+    for label, obj, repeat in payloads:
+        body = codec.load_codec('json').dumps(obj)
+        print("{}: {:.0f} kB".format(label, len(body) / 1024))
+        baseline = None
+        for json_codec in reversed(codecs):  # stdlib json first
+            decode, encode = bench(json_codec, body, obj, repeat)
+            baseline = baseline or (decode, encode)
+            print("  {:8} decode {:9.1f} us ({:4.1f}x)  encode {:9.1f} us ({:4.1f}x)".format(
+                json_codec.name, decode * 1e6, baseline[0] / decode,
+                encode * 1e6, baseline[1] / encode))
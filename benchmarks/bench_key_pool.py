@@ -0,0 +1,52 @@
+""" Benchmark: throughput of a KeyPool as keys are added
+
+Worker threads make get_random_food_trivia calls against a local
+stand-in server keeping a separate quota per key, with every key rate
+limited on its own. The pool's throughput grows with its number of keys
+until the workers, not the keys' rate limits, are the bottleneck.
+
+    python -m benchmarks.bench_key_pool
+"""
+
+import threading
+import time
+
+from spoonacular import API, KeyPool, RequestsTransport
+from spoonacular.mock import MockSpoonacular
+
+CALLS = 200
+LATENCY = 0.01
+RATE_LIMIT = 25
+WORKERS = 16
+
+
+def bench(server, keys):
+    pool = KeyPool(['bench-key-{}'.format(i) for i in range(keys)], sleep_time=1.0 / RATE_LIMIT)
+    transport = RequestsTransport(pool_maxsize=WORKERS)
+    with API(pool, transport=transport) as api:
+        api.api_root = server.url
+        calls = iter(range(CALLS))
+        lock = threading.Lock()
+
+        def work():
+            while True:
+                with lock:
+                    if next(calls, None) is None:
+                        return
+                api.get_random_food_trivia().raise_for_status()
+
+        workers = [threading.Thread(target=work) for _ in range(WORKERS)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return CALLS / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    print("{} calls, {} threads, {}/s per key, {:.0f} ms latency".format(
+        CALLS, WORKERS, RATE_LIMIT, LATENCY * 1000))
+    with MockSpoonacular(latency=LATENCY, limits={'requests': 10**9}, per_key=True) as server:
+        for keys in (1, 2, 4, 8):
+            print("{} key(s): {:7.1f} calls/s".format(keys, bench(server, keys)))
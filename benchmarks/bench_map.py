@@ -0,0 +1,42 @@
+""" Benchmark: API.map speedup against a local stand-in server
+
+Calls guess_nutrition_by_dish_name for many dish titles with a growing
+number of workers. Throughput grows with the workers until it reaches
+the rate limit.
+
+    python -m benchmarks.bench_map
+"""
+
+import time
+
+from spoonacular import API, RateLimiter, RequestsTransport
+from spoonacular.mock import MockSpoonacular
+
+CALLS = 200
+LATENCY = 0.05
+RATE_LIMIT = 100
+
+
+def bench(server, workers):
+    limiter = RateLimiter(requests_per_second=RATE_LIMIT, burst=10)
+    transport = RequestsTransport(pool_maxsize=workers)
+    with API('bench-key', rate_limiter=limiter, transport=transport) as api:
+        api.api_root = server.url
+        titles = ({'title': 'Dish {}'.format(i)} for i in range(CALLS))
+        start = time.perf_counter()
+        errors = sum(result.error is not None
+                     for result in api.map('guess_nutrition_by_dish_name', titles,
+                                           max_workers=workers))
+        elapsed = time.perf_counter() - start
+    return CALLS / elapsed, errors
+
+
+if __name__ == '__main__':
+    print("{} calls, {:.0f} ms latency, rate limit {}/s".format(CALLS, LATENCY * 1000, RATE_LIMIT))
+    with MockSpoonacular(latency=LATENCY, limits={'requests': 10**9}) as server:
+        baseline = None
+        for workers in (1, 2, 4, 8, 16, 32):
+            throughput, errors = bench(server, workers)
+            baseline = baseline or throughput
+            print("{:3d} workers {:8.1f} calls/s {:6.1f}x speedup {:3d} errors".format(
+                workers, throughput, throughput / baseline, errors))
@@ -0,0 +1,57 @@
+""" Benchmark: interactive latency while a crawl saturates the rate limit
+
+Crawl threads keep get_recipe_information_bulk calls queued on the rate
+limiter while another thread makes quick_answer calls, against a local
+stand-in server. Without a scheduler the interactive calls wait behind
+the crawl's queue; with a PriorityScheduler they go out next.
+
+    python -m benchmarks.bench_scheduler
+"""
+
+import threading
+import time
+
+from spoonacular import API, PriorityScheduler, RateLimiter, RequestsTransport
+from spoonacular.mock import MockSpoonacular
+
+CRAWLERS = 16
+INTERACTIVE_CALLS = 40
+LATENCY = 0.02
+RATE_LIMIT = 50
+
+
+def bench(server, scheduler):
+    transport = RequestsTransport(pool_maxsize=CRAWLERS + 1)
+    with API('bench-key', rate_limiter=RateLimiter(requests_per_second=RATE_LIMIT),
+             transport=transport, scheduler=scheduler) as api:
+        api.api_root = server.url
+        stop = threading.Event()
+
+        def crawl():
+            while not stop.is_set():
+                api.get_recipe_information_bulk('1,2,3,4,5')
+
+        crawlers = [threading.Thread(target=crawl) for _ in range(CRAWLERS)]
+        for thread in crawlers:
+            thread.start()
+        time.sleep(0.5)
+        latencies = []
+        for _ in range(INTERACTIVE_CALLS):
+            start = time.perf_counter()
+            api.quick_answer('How much vitamin c is in 2 apples?')
+            latencies.append(time.perf_counter() - start)
+            time.sleep(0.05)
+        stop.set()
+        for thread in crawlers:
+            thread.join()
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+
+
+if __name__ == '__main__':
+    print("{} crawl threads, rate limit {}/s, {:.0f} ms latency".format(
+        CRAWLERS, RATE_LIMIT, LATENCY * 1000))
+    with MockSpoonacular(latency=LATENCY, limits={'requests': 10**9, 'results': 10**9}) as server:
+        for label, scheduler in (('no scheduler', None), ('PriorityScheduler', PriorityScheduler())):
+            p50, p99 = bench(server, scheduler)
+            print("{:18s} quick_answer p50 {:7.1f} ms  p99 {:7.1f} ms".format(label, p50 * 1000, p99 * 1000))
@@ -29,10 +29,11 @@ setup(name="spoonacular",
       license="MIT",
       author="John W. Miller",
       url="https://github.com/johnwmillr/SpoonacularAPI",
-      packages=find_packages(exclude=['tests']),
+      packages=find_packages(exclude=['tests', 'benchmarks']),
       install_requires=["requests"],
+      extras_require={"async": ["aiohttp"], "fast": ["orjson"], "plan": ["numpy"]},
       keywords="spoonacular API food recipes ingredients cuisine groceries",
-      python_requires=">=3.*",
+      python_requires=">=3.8",
       classifiers=[
               'Topic :: Software Development :: Libraries',
           'Operating System :: OS Independent',
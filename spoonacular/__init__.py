@@ -11,3 +11,19 @@ __description__ = 'A Python wrapper for the Spoonacular API'
 __license__ = 'MIT'
 
 from .api import API
+from .batch import BatchResult, IngredientParser, MicroBatcher, ProductClassifier
+from .cache import ResponseCache, SQLiteCache
+from .cassette import CassetteTransport, UnrecordedRequestError
+from . import codec
+from .coalesce import RequestCoalescer
+from .export import RecipeExporter
+from .keypool import KeyPool
+from .metrics import CallEvent, Metrics
+from .models import Ingredient, Model, Nutrition, Product, Recipe, WinePairing, WineProduct
+from .planner import CostModel, Schedule
+from .quota import QuotaAccountant, QuotaExceededError
+from .ratelimit import RateLimiter, TokenBucket
+from .retry import RetryBudget, RetryPolicy
+from .scheduler import PriorityClass, PriorityScheduler
+from .transport import HTTPXTransport, RequestsTransport
+from .aio import AsyncAPI
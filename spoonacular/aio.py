@@ -0,0 +1,309 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+Asyncio client for the Spoonacular API (requires aiohttp)
+"""
+
+import asyncio
+import itertools
+import time
+from collections import deque
+
+import requests
+
+from .api import API, _check_search_kwargs, _checked, _page_size
+from .batch import map_calls_async
+from .transport import DEFAULT_HEADERS, build_response, encode_fields, encode_json, span_timings
+
+
+def _timings_trace_config():
+    """ Returns an aiohttp TraceConfig taking the marks `span_timings` needs """
+    import aiohttp
+
+    def mark(name):
+        async def on_event(session, context, params):
+            if context.trace_request_ctx is not None:
+                context.trace_request_ctx[name] = time.perf_counter()
+        return on_event
+
+    config = aiohttp.TraceConfig()
+    for signal, name in ((config.on_dns_resolvehost_start, 'dns_start'),
+                         (config.on_dns_resolvehost_end, 'dns_end'),
+                         (config.on_connection_create_start, 'connect_start'),
+                         (config.on_connection_create_end, 'connect_end'),
+                         (config.on_request_headers_sent, 'send_start'),
+                         (config.on_request_end, 'headers_end')):
+        signal.append(mark(name))
+    return config
+
+
+class AsyncAPI(API):
+    """ Asyncio Spoonacular API
+
+    Has the same endpoint methods as `API`, but each one returns an
+    awaitable resolving to a requests.Response. All calls share one
+    pooled aiohttp session and the instance's rate limiter.
+
+        async with AsyncAPI(api_key) as api:
+            responses = await asyncio.gather(*[
+                api.get_recipe_information(id) for id in ids])
+    """
+
+    def __init__(self, api_key, connection_limit=100, **kwargs):
+        """ Asyncio Spoonacular API Constructor
+
+        :param api_key: key provided by Spoonacular (str), or several keys
+            to spread the calls across (KeyPool)
+        :param connection_limit: max number of simultaneous connections (int)
+
+        See `API` for the remaining keyword arguments.
+        """
+        super().__init__(api_key, **kwargs)
+        self.connection_limit = connection_limit
+        self._client = None
+
+    def __enter__(self):
+        raise TypeError("Use 'async with' with an AsyncAPI, so its session is closed.")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _get_client(self):
+        """ Returns the pooled aiohttp session, creating it on the running loop """
+        if self._client is None or self._client.closed:
+            import aiohttp
+            connector = aiohttp.TCPConnector(limit=self.connection_limit)
+            trace_configs = [_timings_trace_config()] if self.metrics is not None else None
+            self._client = aiohttp.ClientSession(
+                connector=connector, headers=DEFAULT_HEADERS, trace_configs=trace_configs,
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._client
+
+    def _default_transport(self):
+        return None  # Requests go out on the aiohttp session
+
+    async def close(self):
+        """ Closes the pooled connections """
+        if self.transport is not None:
+            self.transport.close()
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def _send(self, endpoint, path, method, query_, params_, json_):
+        """ Answers a call from the cache, an identical call in flight, or the API """
+        started = time.perf_counter()
+        key, response = self._cached_response(endpoint, path, method, params_)
+        if response is not None:
+            if self.metrics is not None:
+                self.metrics.record_call(endpoint, method, started, response, attempts=0, cache='hit')
+            return response
+        coalesce_key = self._coalesce_key(endpoint, path, method, params_, key)
+        if coalesce_key is not None:
+            fetched = []
+
+            def fetch():
+                fetched.append(True)
+                return self._fetch(endpoint, key, path, method, query_, params_, json_)
+
+            try:
+                response = await self.coalescer.call_async(coalesce_key, fetch)
+            except Exception as e:
+                if not fetched:
+                    self._record_coalesced(endpoint, method, started, error=e)
+                raise
+            if not fetched:
+                self._record_coalesced(endpoint, method, started, response)
+            return response
+        return await self._fetch(endpoint, key, path, method, query_, params_, json_)
+
+    async def _fetch(self, endpoint, key, path, method, query_, params_, json_):
+        """ Sends a request to the API once it clears the quota and rate limiter """
+        started = time.perf_counter()
+        cost = self.determineCostOfEndpoint(endpoint, query=query_,
+                                            params=params_, json=json_)
+        response = failure = None
+        attempt = -1
+        try:
+            if self.scheduler is not None:
+                # Wait for the call's turn; this also holds its quota and rate limiter capacity
+                await self.scheduler.acquire_async(endpoint, cost, self.quota, self.rate_limiter)
+            elif self.key_pool is None and not self.quota.try_reserve(cost):
+                # Refuse (or queue, off the event loop) calls that would exceed the quota
+                await asyncio.get_running_loop().run_in_executor(None, self.quota.reserve, cost)
+            try:
+                for attempt in itertools.count():
+                    if attempt or self.scheduler is None:
+                        wait = self.rate_limiter.reserve(cost)  # Enforce rate limiting
+                        if wait:
+                            await asyncio.sleep(wait)
+                    response = error = None
+                    try:
+                        if self.key_pool is not None:
+                            response = await self._transmit_pooled(cost, path, method, query_,
+                                                                   params_, json_)
+                        else:
+                            response = await self._transmit(path, method, query_, params_, json_)
+                    except self.retry.exceptions as e:
+                        error = e
+                    delay = self.retry.delay(attempt, response=response, error=error, method=method)
+                    if delay is None:
+                        if error is not None:
+                            raise error
+                        break
+                    await asyncio.sleep(delay)
+            finally:
+                if self.quota is not None:
+                    self.quota.release(cost, response.headers if response is not None else None)
+                if self.scheduler is not None:
+                    self.scheduler.release()
+        except Exception as e:
+            failure = e
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_call(endpoint, method, started, response, failure, attempt + 1,
+                                         'miss' if key is not None else None,
+                                         cost if attempt >= 0 else None)
+        self._cache_response(key, endpoint, response)
+        return response
+
+    async def _transmit_pooled(self, cost, path, method, query_, params_, json_):
+        """ Sends the HTTP request with a key of the pool (see `API._transmit_pooled`) """
+        for _ in range(len(self.key_pool)):
+            # Wait for a key off the event loop unless one can take the call right away
+            picked = self.key_pool.try_reserve(cost)
+            if picked is None:
+                picked = await asyncio.get_running_loop().run_in_executor(
+                    None, self.key_pool.reserve, cost)
+            pooled, wait = picked
+            response = None
+            try:
+                if wait:
+                    await asyncio.sleep(wait)
+                response = await self._transmit(path, method, query_, params_, json_, pooled.key)
+            finally:
+                refused = self.key_pool.release(pooled, cost, response)
+            if not refused:
+                break
+        return response
+
+    async def _transmit(self, path, method, query_, params_, json_, api_key=None):
+        """ Sends the HTTP request on the pooled aiohttp session, with `api_key` or the instance's key
+
+        aiohttp's connection errors and timeouts are raised as their
+        requests equivalents, so one retry policy covers both clients.
+        """
+        import aiohttp
+        uri = self.api_root + path
+        params_ = dict(params_ or {}, apiKey=api_key or self.api_key)
+        client = self._get_client()
+        data, headers = encode_fields(query_), None
+        if json_ is not None and not data:
+            data, headers = encode_json(json_)
+        marks = {}
+        try:
+            async with client.request(method, uri, data=data, headers=headers,
+                                      params=encode_fields(params_),
+                                      trace_request_ctx=marks) as resp:
+                content = await resp.read()
+        except asyncio.TimeoutError as e:
+            raise requests.exceptions.Timeout(e)
+        except aiohttp.ClientConnectionError as e:
+            raise requests.exceptions.ConnectionError(e)
+        response = build_response(resp.status, resp.headers, content,
+                                  url=str(resp.url), reason=resp.reason)
+        if marks:
+            response.timings = span_timings(marks)
+        return response
+
+    async def getRemainingCallsFromApi(self):
+        """ Returns the remaining number of API requests, results, etc. """
+        if self.key_pool is not None:
+            for pooled in self.key_pool.keys:
+                response = await self._transmit('', 'GET', None, None, None, pooled.key)
+                pooled.quota.remaining = self.getRemainingCallsFromHeader(response.headers)
+            return self.callsRemaining
+        response = await self._transmit('', 'GET', None, None, None)
+        self.callsRemaining = self.getRemainingCallsFromHeader(response.headers)
+        return self.callsRemaining
+
+    """ --------------- BULK Helpers --------------- """
+
+    async def iter_recipe_information(self, ids, includeNutrition=None, chunk_size=100, max_workers=4):
+        """ Yields the information for any number of recipes, in the order of `ids`
+
+        Async generator version of `API.iter_recipe_information`, with
+        up to `max_workers` bulk calls in flight as tasks:
+
+            async for recipe in api.iter_recipe_information(ids):
+                ...
+        """
+        async def fetch(chunk):
+            response = await self.get_recipe_information_bulk(
+                ','.join(str(id) for id in chunk), includeNutrition=includeNutrition)
+            return self._bulk_recipes(response, includeNutrition)
+
+        pending = deque()
+        try:
+            batches = self._recipe_batches(ids, includeNutrition, chunk_size)
+            for batch, missing in itertools.chain(batches, [(None, None)]):
+                if batch is not None:
+                    pending.append((batch, asyncio.ensure_future(fetch(missing)) if missing else None))
+                while pending and (batch is None or len(pending) > max_workers):
+                    done, task = pending.popleft()
+                    fetched = await task if task is not None else {}
+                    for id, recipe in done:
+                        recipe = recipe if recipe is not None else fetched.get(id)
+                        if recipe is not None:
+                            yield recipe
+        finally:
+            for _, task in pending:
+                if task is not None:
+                    task.cancel()
+
+    async def iter_search_recipes_complex(self, query, max_results=None, page_size=100, offset=0,
+                                          **kwargs):
+        """ Yields every recipe matching a `search_recipes_complex` search
+
+        Async generator version of `API.iter_search_recipes_complex`: the
+        next page is fetched as a task while the current one is consumed.
+        """
+        _check_search_kwargs(kwargs)
+        end = offset + max_results if max_results is not None else None
+
+        async def fetch(offset_, number):
+            return _checked(await self.search_recipes_complex(
+                query, offset=offset_, number=number, **kwargs)).json()
+
+        number = _page_size(page_size, offset, end, None)
+        task = asyncio.ensure_future(fetch(offset, number)) if number > 0 else None
+        try:
+            while task is not None:
+                page = await task
+                results = page.get('results', [])
+                offset += len(results)
+                number = _page_size(page_size, offset, end, page.get('totalResults'))
+                task = asyncio.ensure_future(fetch(offset, number)) if results and number > 0 else None
+                for recipe in results:
+                    yield recipe
+        finally:
+            if task is not None:
+                task.cancel()
+
+    def map(self, endpoint, iterable_of_kwargs, max_workers=8, ordered=True):
+        """ Calls one endpoint for many inputs, at most `max_workers` at a time
+
+        Async generator version of `API.map`, yielding the same
+        BatchResults:
+
+            async for result in api.map('quick_answer', questions):
+                ...
+        """
+        func = getattr(self, endpoint) if isinstance(endpoint, str) else endpoint
+        return map_calls_async(func, iterable_of_kwargs, max_workers=max_workers, ordered=ordered)
@@ -6,10 +6,21 @@
 API details and documentation: https://spoonacular.com/food-api
 """
 
-import requests
-import socket
+import itertools
 import time
-import inspect
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from . import codec
+from .batch import map_calls
+from .cache import UNCACHEABLE_ENDPOINTS, cache_key
+from .canonical import canonical_fields
+from .endpoints import COST_FUNCTIONS, endpoint_methods
+from .keypool import KeyPool
+from .quota import QuotaAccountant
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .transport import RequestsTransport, build_response
 
 
 def formatMethodName(name):
@@ -17,58 +28,238 @@ def formatMethodName(name):
     return name.replace(' ', '_')
 
 
+def _checked(response):
+    """ Raises if a call failed, otherwise returns the response """
+    response.raise_for_status()
+    return response
+
+
+def _page_size(page_size, offset, end, total):
+    """ Returns the number of results to ask for in the search page at `offset` """
+    number = page_size
+    for limit in (end, total):
+        if limit is not None:
+            number = min(number, limit - offset)
+    return number
+
+
+def _check_search_kwargs(kwargs):
+    if 'number' in kwargs:
+        raise TypeError("The number of results per request is set by page_size, not number.")
+
+
+@endpoint_methods
 class API(object):
     """Spoonacular API"""
 
     # Endpoint
     from .endpoint_quotas import endpoint_quotas
 
-    # Create a persistent requests connection
-    session = requests.Session()
-    session.headers = {"Application": "spoonacular",
-                       "Content-Type": "application/x-www-form-urlencoded"}
-
-    def __init__(self, api_key, timeout=5, sleep_time=1.5, allow_extra_calls=False):
+    def __init__(self, api_key, timeout=5, sleep_time=1.5, allow_extra_calls=False,
+                 rate_limiter=None, quota=None, cache=None, retry=None, transport=None,
+                 coalescer=None, metrics=None, scheduler=None, burst=1):
         """ Spoonacular API Constructor
 
-        :param api_key: key provided by Spoonacular (str)
+        :param api_key: key provided by Spoonacular (str), or several keys
+            to spread the calls across (KeyPool)
         :param timeout: time before quitting on response (seconds)
-        :param sleep_time: time to wait between requests (seconds)
+        :param sleep_time: minimum average time between requests (seconds),
+            used to build the default rate limiter (without a KeyPool,
+            whose keys have their own)
         :param allow_extra_calls: override the API call limit (bool)
+        :param rate_limiter: shared limiter for all calls (RateLimiter)
+        :param quota: tracks and enforces the remaining quota (QuotaAccountant)
+        :param cache: opt-in cache for GET responses (ResponseCache)
+        :param retry: when to retry failed calls (RetryPolicy)
+        :param transport: connection pool owned by this instance (RequestsTransport)
+        :param coalescer: opt-in sharing of identical concurrent GET calls (RequestCoalescer)
+        :param metrics: opt-in collector of an event per call (Metrics)
+        :param scheduler: opt-in ordering of competing calls by priority class (PriorityScheduler)
+        :param burst: back-to-back calls allowed by the default rate limiter
+            before it spaces them `sleep_time` apart (int)
         """
 
         assert api_key != '', 'Must supply a non-empty API key.'
-        self.api_key = api_key
+        self.key_pool = api_key if isinstance(api_key, KeyPool) else None
+        if self.key_pool is not None and (quota is not None or scheduler is not None):
+            raise ValueError("The keys of a KeyPool track their own quota; "
+                             "it can't be used with a quota or scheduler.")
+        self.api_key = api_key if self.key_pool is None else None
         self.api_root = "https://api.spoonacular.com/"
         self.timeout = timeout
-        self.sleep_time = max(sleep_time, 1)  # Rate limiting TODO: Make this immutable
+        self.sleep_time = sleep_time
         self.allow_extra_calls = allow_extra_calls
-
-    def _make_request(self, path, method='GET', endpoint=None,
-                      query_=None, params_=None, json_=None):
-        """ Make a request to the API """
-
-        # Check if the API call cost will exceed the quota
-        endpoint = inspect.stack()[1].function
+        if rate_limiter is None:
+            rate = 1.0 / sleep_time if sleep_time and self.key_pool is None else None
+            rate_limiter = RateLimiter(requests_per_second=rate, burst=burst)
+        self.rate_limiter = rate_limiter
+        if quota is None and self.key_pool is None:
+            quota = QuotaAccountant(enforce=not allow_extra_calls)
+        self.quota = quota
+        self.cache = cache
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.transport = transport if transport is not None else self._default_transport()
+        self.coalescer = coalescer
+        self.metrics = metrics
+        self.scheduler = scheduler
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """ Closes the instance's pooled connections """
+        self.transport.close()
+
+    def _default_transport(self):
+        """ Returns the transport used when none is given """
+        return RequestsTransport()
+
+    @property
+    def session(self):
+        """ The transport's requests.Session, or None if it doesn't use requests """
+        return getattr(self.transport, 'session', None)
+
+    def _make_request(self, path, method, endpoint, query_=None, params_=None, json_=None):
+        """ Make a request to the API
+
+        The form fields and params are put in canonical form first (see
+        `canonical_fields`), so None values are never encoded and
+        equivalent calls share their cache, coalescing and cassette keys.
+        """
+
+        return self._send(endpoint, path, method, canonical_fields(query_),
+                          canonical_fields(params_), json_)
+
+    def _send(self, endpoint, path, method, query_, params_, json_):
+        """ Answers a call from the cache, an identical call in flight, or the API """
+        started = time.perf_counter()
+        key, response = self._cached_response(endpoint, path, method, params_)
+        if response is not None:
+            if self.metrics is not None:
+                self.metrics.record_call(endpoint, method, started, response, attempts=0, cache='hit')
+            return response
+        coalesce_key = self._coalesce_key(endpoint, path, method, params_, key)
+        if coalesce_key is not None:
+            fetched = []
+
+            def fetch():
+                fetched.append(True)
+                return self._fetch(endpoint, key, path, method, query_, params_, json_)
+
+            try:
+                response = self.coalescer.call(coalesce_key, fetch)
+            except Exception as e:
+                if not fetched:
+                    self._record_coalesced(endpoint, method, started, error=e)
+                raise
+            if not fetched:
+                self._record_coalesced(endpoint, method, started, response)
+            return response
+        return self._fetch(endpoint, key, path, method, query_, params_, json_)
+
+    def _record_coalesced(self, endpoint, method, started, response=None, error=None):
+        """ Records a call answered by an identical call in flight """
+        if self.metrics is not None:
+            self.metrics.record_call(endpoint, method, started, response, error,
+                                     attempts=0, cache='coalesced')
+
+    def _coalesce_key(self, endpoint, path, method, params_, key):
+        """ Returns the key identical in-flight calls share, or None not to coalesce """
+        if self.coalescer is None or method != 'GET' or endpoint in UNCACHEABLE_ENDPOINTS:
+            return None
+        return key if key is not None else cache_key(method, path, params_)
+
+    def _fetch(self, endpoint, key, path, method, query_, params_, json_):
+        """ Sends a request to the API once it clears the quota and rate limiter """
+        started = time.perf_counter()
+        cost = self.determineCostOfEndpoint(endpoint, query=query_,
+                                            params=params_, json=json_)
+        response = failure = None
+        attempt = -1
         try:
-            uri = self.api_root + path
-
-            # API auth (temporary kludge)
-            if params_:
-                params_['apiKey'] = self.api_key
-            else:
-                params_ = {'apiKey': self.api_key}
-            response = self.session.request(method, uri,
-                                            timeout=self.timeout,
-                                            data=query_,
-                                            params=params_,
-                                            json=json_)
-        except socket.timeout as e:
-            print("Timeout raised and caught: {}".format(e))
-            return
-        time.sleep(self.sleep_time)  # Enforce rate limiting
+            if self.scheduler is not None:
+                # Wait for the call's turn; this also holds its quota and rate limiter capacity
+                self.scheduler.acquire(endpoint, cost, self.quota, self.rate_limiter)
+            elif self.key_pool is None:
+                self.quota.reserve(cost)  # Refuse calls that would exceed the quota
+            try:
+                for attempt in itertools.count():
+                    if attempt or self.scheduler is None:
+                        self.rate_limiter.acquire(cost)  # Enforce rate limiting
+                    response = error = None
+                    try:
+                        if self.key_pool is not None:
+                            response = self._transmit_pooled(cost, path, method, query_, params_, json_)
+                        else:
+                            response = self._transmit(path, method, query_, params_, json_)
+                    except self.retry.exceptions as e:
+                        error = e
+                    delay = self.retry.delay(attempt, response=response, error=error, method=method)
+                    if delay is None:
+                        if error is not None:
+                            raise error
+                        break
+                    time.sleep(delay)
+            finally:
+                if self.quota is not None:
+                    self.quota.release(cost, response.headers if response is not None else None)
+                if self.scheduler is not None:
+                    self.scheduler.release()
+        except Exception as e:
+            failure = e
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_call(endpoint, method, started, response, failure, attempt + 1,
+                                         'miss' if key is not None else None,
+                                         cost if attempt >= 0 else None)
+        self._cache_response(key, endpoint, response)
+        return response
+
+    def _transmit_pooled(self, cost, path, method, query_, params_, json_):
+        """ Sends the HTTP request with a key of the pool
+
+        A call refused because its key is throttled or out of quota is
+        sent again right away with another key, once per key at most.
+        """
+        for _ in range(len(self.key_pool)):
+            pooled = self.key_pool.acquire(cost)  # Holds the key's quota and takes its rate limiter capacity
+            response = None
+            try:
+                response = self._transmit(path, method, query_, params_, json_, pooled.key)
+            finally:
+                refused = self.key_pool.release(pooled, cost, response)
+            if not refused:
+                break
         return response
 
+    def _cached_response(self, endpoint, path, method, params_):
+        """ Looks a GET call up in the cache, returning (cache key, response) """
+        if self.cache is None or method != 'GET' or not self.cache.ttl_for(endpoint):
+            return None, None
+        key = cache_key(method, path, params_)
+        return key, self.cache.get(key)
+
+    def _cache_response(self, key, endpoint, response):
+        """ Caches a successful response to a cacheable call """
+        if key is not None and response is not None and response.status_code == 200:
+            self.cache.set(key, response, self.cache.ttl_for(endpoint))
+
+    def _transmit(self, path, method, query_, params_, json_, api_key=None):
+        """ Sends the HTTP request, with `api_key` or the instance's key """
+        uri = self.api_root + path
+
+        # API auth (temporary kludge)
+        params_ = dict(params_ or {}, apiKey=api_key or self.api_key)
+        return self.transport.request(method, uri,
+                                      timeout=self.timeout,
+                                      data=query_,
+                                      params=params_,
+                                      json=json_)
+
     def getRemainingCallsFromHeader(self, headers):
         """ Extracts the remaining number of API calls from the headers"""
         return {'requests': int(headers['X-RateLimit-requests-Remaining']),
@@ -77,14 +268,32 @@ class API(object):
 
     def getRemainingCallsFromApi(self):
         """ Returns the remaining number of API requests, results, etc. """
-        headers = self.session.request('get', self.api_root).headers
-        print(headers.keys())
-        print()
-        print(headers)
-        print()
+        if self.key_pool is not None:
+            for pooled in self.key_pool.keys:
+                headers = self.transport.request('GET', self.api_root, timeout=self.timeout,
+                                                 params={'apiKey': pooled.key}).headers
+                pooled.quota.remaining = self.getRemainingCallsFromHeader(headers)
+            return self.callsRemaining
+        headers = self.transport.request('GET', self.api_root, timeout=self.timeout,
+                                         params={'apiKey': self.api_key}).headers
         self.callsRemaining = self.getRemainingCallsFromHeader(headers)
         return self.callsRemaining
 
+    @property
+    def callsRemaining(self):
+        """ Remaining quota, kept up to date from every response's headers
+            (of all the keys together, with a KeyPool)
+        """
+        if self.key_pool is not None:
+            return self.key_pool.remaining
+        return self.quota.remaining
+
+    @callsRemaining.setter
+    def callsRemaining(self, remaining):
+        if self.key_pool is not None:
+            raise AttributeError("Each key of a KeyPool has its own balance.")
+        self.quota.remaining = remaining
+
     def costIsLessThanRemaining(self, cost_of_call):
         """ Checks if the cost of a call is more than the amount remaining """
         for category in ['requests', 'tinyrequests', 'results']:
@@ -94,32 +303,10 @@ class API(object):
 
     def determineCostOfEndpoint(self, endpoint, **kwargs):
         """ Returns the amount of each type of quota a particular endpoint call will use up"""
-        if endpoint in self.endpoint_quotas:
-            quotas = self.endpoint_quotas[endpoint]
-
-            # Determine the total cost (in API quotas) for the API call
-            cost = {}
-            for quota in ['requests', 'tinyrequests', 'results']:
-                amount, qualifier = quotas[quota]['amount'], quotas[quota]['qualifier']
-                if qualifier in ['per ingredient']:
-                    ingredients = kwargs['json']['ingredients']
-                    ingredients = [ingredients] if isinstance(ingredients, str) else ingredients
-                    cost[quota] = amount * len(ingredients)
-                elif qualifier in ['per recipe']:
-                    cost[quota] = amount * len(kwargs['params']['ids'].split(','))
-                elif qualifier in ['per product']:
-                    cost[quota] = amount * len(kwargs['json'])
-                elif qualifier in ['per parsed ingredient']:
-                    cost[quota] = amount * len(kwargs['query']['ingredientList'].split('\n'))
-                elif qualifier in ['per result']:
-                    cost[quota] = amount * int(kwargs['params']['number'])
-                elif qualifier in ['per wine found']:
-                    # TODO: Contact Spoonacular about this quota info
-                    cost[quota] = amount * 3*int(kwargs['params']['number'])
-                else:
-                    cost[quota] = amount
-            return cost
-        return None
+        cost = COST_FUNCTIONS.get(endpoint)
+        if cost is None:
+            return None
+        return cost(kwargs.get('query'), kwargs.get('params'), kwargs.get('json'))
 
     @property  # Not sure if this should be a property
     def minCallsRemaining(self):
@@ -130,431 +317,155 @@ class API(object):
         """ Returns False if any category of API request has run out """
         return self.minCallsRemaining >= 10
 
-    """ --------------- COMPUTE Endpoints --------------- """
-
-    def classify_a_grocery_product(self, product):
-        """ Given a grocery product title, this endpoint allows
-            you to detect what basic ingredient it is.
-            https://spoonacular.com/food-api/docs#classify-a-grocery-product
-        """
-        endpoint = "food/products/classify"
-        url_json = product
-        quota = {'requests': 0, 'tinyrequests': 1, 'results': 0}
-        return self._make_request(endpoint, method="POST", json_=url_json)
-
-    def classify_cuisine(self, ingredientList, title):
-        """ Classify the recipe's cuisine.
-            https://spoonacular.com/food-api/docs#classify-cuisine
-        """
-        endpoint = "recipes/cuisine"
-        url_query = {"ingredientList": ingredientList, "title": title}
-        url_params = {}
-        return self._make_request(endpoint, method="POST", query_=url_query, params_=url_params)
-
-    def classify_grocery_products_batch(self, products):
-        """ Given a set of product jsons, get back classified products.
-            https://spoonacular.com/food-api/docs#classify-grocery-products-(batch)
-        """
-        endpoint = "food/products/classifyBatch"
-        url_json = products
-        return self._make_request(endpoint, method="POST", json_=url_json)
+    """ --------------- BULK Helpers --------------- """
 
-    def convert_amounts(self, ingredientName, targetUnit, sourceAmount=None, sourceUnit=None):
-        """ Convert amounts like "2 cups of flour to grams".
-            https://spoonacular.com/food-api/docs#convert-amounts
-        """
-        endpoint = "recipes/convert"
-        url_query = {}
-        url_params = {"ingredientName": ingredientName, "sourceAmount": sourceAmount, "sourceUnit": sourceUnit, "targetUnit": targetUnit}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def generate_meal_plan(self, diet=None, exclude=None, targetCalories=None, timeFrame=None):
-        """ Generate a meal plan with three meals per day (breakfast,
-            lunch, and dinner).
-            https://spoonacular.com/food-api/docs#generate-meal-plan
-        """
-        endpoint = "recipes/mealplans/generate"
-        url_query = {}
-        url_params = {"diet": diet, "exclude": exclude, "targetCalories": targetCalories, "timeFrame": timeFrame}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def guess_nutrition_by_dish_name(self, title):
-        """ Guess the macro nutrients of a dish given its title.
-            https://spoonacular.com/food-api/docs#guess-nutrition-by-dish-name
-        """
-        endpoint = "recipes/guessNutrition"
-        url_query = {}
-        url_params = {"title": title}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def map_ingredients_to_grocery_products(self, ingredients, servings):
-        """ Map a set of ingredients to products you can buy in
-            the grocery store.
-            https://spoonacular.com/food-api/docs#map-ingredients-to-grocery-products
-        """
-        endpoint = "food/ingredients/map"
-        url_json = {"ingredients": ingredients, "servings": servings}
-        return self._make_request(endpoint, method="POST", json_=url_json)
-
-    def match_recipes_to_daily_calories(self, targetCalories, timeFrame):
-        """ Find multiple recipes that, when added up reach your
-            daily caloric needs.
-            https://spoonacular.com/food-api/docs#match-recipes-to-daily-calories
-        """
-        endpoint = "recipes/mealplans/generate"
-        url_query = {}
-        url_params = {"targetCalories": targetCalories, "timeFrame": timeFrame}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def quick_answer(self, q):
-        """ Answer a nutrition related natural language question.
-            https://spoonacular.com/food-api/docs#quick-answer
-        """
-        endpoint = "recipes/quickAnswer"
-        url_query = {}
-        url_params = {"q": q}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def summarize_recipe(self, id):
-        """ Summarize the recipe in a short text.
-            https://spoonacular.com/food-api/docs#summarize-recipe
-        """
-        endpoint = "recipes/{id}/summary".format(id=id)
-        url_query = {}
-        url_params = {}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def visualize_equipment(self, instructions, defaultCss=None, showBacklink=None, view=None):
-        """ Visualize the equipment used to make a recipe.
-            https://spoonacular.com/food-api/docs#visualize-equipment
-        """
-        endpoint = "recipes/visualizeEquipment"
-        url_query = {"defaultCss": defaultCss, "instructions": instructions, "showBacklink": showBacklink, "view": view}
-        url_params = {}
-        return self._make_request(endpoint, method="POST", query_=url_query, params_=url_params)
-
-    def visualize_ingredients(self, ingredientList, servings, defaultCss=None, measure=None, showBacklink=None, view=None):
-        """ Visualize ingredients of a recipe.
-            https://spoonacular.com/food-api/docs#visualize-ingredients
-        """
-        endpoint = "recipes/visualizeIngredients"
-        url_query = {"defaultCss": defaultCss, "ingredientList": ingredientList, "measure": measure, "servings": servings, "showBacklink": showBacklink, "view": view}
-        url_params = {}
-        return self._make_request(endpoint, method="POST", query_=url_query, params_=url_params)
-
-    def visualize_price_breakdown(self, ingredientList, servings, defaultCss=None, mode=None, showBacklink=None):
-        """ Visualize the price breakdown of a recipe.
-            https://spoonacular.com/food-api/docs#visualize-price-breakdown
-        """
-        endpoint = "recipes/visualizePriceEstimator"
-        url_query = {"defaultCss": defaultCss, "ingredientList": ingredientList, "mode": mode, "servings": servings, "showBacklink": showBacklink}
-        url_params = {}
-        return self._make_request(endpoint, method="POST", query_=url_query, params_=url_params)
-
-    def visualize_recipe_nutrition(self, ingredientList, servings, defaultCss=None, showBacklink=None):
-        """ Visualize a recipe's nutritional information.
-            https://spoonacular.com/food-api/docs#visualize-recipe-nutrition
-        """
-        endpoint = "recipes/visualizeNutrition"
-        url_query = {"defaultCss": defaultCss, "ingredientList": ingredientList, "servings": servings, "showBacklink": showBacklink}
-        url_params = {}
-        return self._make_request(endpoint, method="POST", query_=url_query, params_=url_params)
-
-    def visualize_recipe_nutrition_by_id(self, id, defaultCss=None):
-        """ Visualize a recipe's nutrition data.
-            https://spoonacular.com/food-api/docs#visualize-recipe-nutrition-by-id
-        """
-        endpoint = "recipes/{id}/nutritionWidget".format(id=id)
-        url_query = {}
-        url_params = {"defaultCss": defaultCss}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
+    def iter_recipe_information(self, ids, includeNutrition=None, chunk_size=100, max_workers=4):
+        """ Yields the information for any number of recipes, in the order of `ids`
 
-    """ --------------- SEARCH Endpoints --------------- """
+        The IDs are split into `get_recipe_information_bulk` calls of at
+        most `chunk_size` recipes, sent concurrently through the rate
+        limiter. With a cache, recipes already cached by
+        `get_recipe_information` are not fetched again, and fetched
+        recipes are cached for it. Recipes the API doesn't return are
+        skipped.
 
-    def autocomplete_ingredient_search(self, query, intolerances=None, metaInformation=None, number=None):
-        """ Autocomplete a search for an ingredient.
-            https://spoonacular.com/food-api/docs#autocomplete-ingredient-search
-        """
-        endpoint = "food/ingredients/autocomplete"
-        url_query = {}
-        url_params = {"intolerances": intolerances, "metaInformation": metaInformation, "number": number, "query": query}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def autocomplete_recipe_search(self, query, number=None):
-        """ Autocomplete a partial input to possible recipe names.
-            https://spoonacular.com/food-api/docs#autocomplete-recipe-search
-        """
-        endpoint = "recipes/autocomplete"
-        url_query = {}
-        url_params = {"number": number, "query": query}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def get_comparable_products(self, upc):
-        """ Find comparable products to the given one.
-            https://spoonacular.com/food-api/docs#get-comparable-products
+        :param ids: recipe IDs (iterable)
+        :param includeNutrition: include nutrition data (bool)
+        :param chunk_size: max number of recipes per request (int)
+        :param max_workers: max number of requests in flight (int)
         """
-        endpoint = "food/products/upc/{upc}/comparable".format(upc=upc)
-        url_query = {}
-        url_params = {}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def get_dish_pairing_for_wine(self, wine):
-        """ Get a dish that goes well with a given wine.
-            https://spoonacular.com/food-api/docs#get-dish-pairing-for-wine
-        """
-        endpoint = "food/wine/dishes"
-        url_query = {}
-        url_params = {"wine": wine}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def get_ingredient_substitutes(self, ingredientName):
-        """ Get ingredient substitutes by ingredient name.
-            https://spoonacular.com/food-api/docs#get-ingredient-substitutes
-        """
-        endpoint = "food/ingredients/substitutes"
-        url_query = {}
-        url_params = {"ingredientName": ingredientName}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def get_ingredient_substitutes_by_id(self, id):
-        """ Search for substitutes for a given ingredient.
-            https://spoonacular.com/food-api/docs#get-ingredient-substitutes-by-id
-        """
-        endpoint = "food/ingredients/{id}/substitutes".format(id=id)
-        url_query = {}
-        url_params = {}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def get_random_recipes(self, limitLicense=None, number=None, tags=None):
-        """ Find random (popular) recipes.
-            https://spoonacular.com/food-api/docs#get-random-recipes
-        """
-        endpoint = "recipes/random"
-        url_query = {}
-        url_params = {"limitLicense": limitLicense, "number": number, "tags": tags}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def get_similar_recipes(self, id):
-        """ Find recipes which are similar to the given one.
-            https://spoonacular.com/food-api/docs#get-similar-recipes
-        """
-        endpoint = "recipes/{id}/similar".format(id=id)
-        url_query = {}
-        url_params = {}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def get_wine_description(self, wine):
-        """ Get the description of a certain wine, e.g. "malbec",
-            "riesling", or "merlot".
-            https://spoonacular.com/food-api/docs#get-wine-description
-        """
-        endpoint = "food/wine/description"
-        url_query = {}
-        url_params = {"wine": wine}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def get_wine_pairing(self, food, maxPrice=None):
-        """ Find a wine that goes well with a food. Food can be
-            a dish name ("steak"), an ingredient name ("salmon"),
-            or a cuisine ("italian").
-            https://spoonacular.com/food-api/docs#get-wine-pairing
-        """
-        endpoint = "food/wine/pairing"
-        url_query = {}
-        url_params = {"food": food, "maxPrice": maxPrice}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def get_wine_recommendation(self, wine, maxPrice=None, minRating=None, number=None):
-        """ Get a specific wine recommendation (concrete product)
-            for a given wine, e.g. "merlot".
-            https://spoonacular.com/food-api/docs#get-wine-recommendation
-        """
-        endpoint = "food/wine/recommendation"
-        url_query = {}
-        url_params = {"maxPrice": maxPrice, "minRating": minRating, "number": number, "wine": wine}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def search_grocery_products_by_upc(self, upc):
-        """ Get information about a food product given its UPC.
-            https://spoonacular.com/food-api/docs#search-grocery-products-by-upc
-        """
-        endpoint = "food/products/upc/{upc}".format(upc=upc)
-        url_query = {}
-        url_params = {}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def search_recipes_by_ingredients(self, ingredients, fillIngredients=None, limitLicense=None, number=None, ranking=None):
-        """ Find recipes that use as many of the given ingredients
-            as possible and have as little as possible missing
-            ingredients. This is a whats in your fridge API endpoint.
-            https://spoonacular.com/food-api/docs#search-recipes-by-ingredients
-        """
-        endpoint = "recipes/findByIngredients"
-        url_query = {}
-        url_params = {"fillIngredients": fillIngredients, "ingredients": ingredients, "limitLicense": limitLicense, "number": number, "ranking": ranking}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def search_recipes_complex(self, query, **kwargs):
-        """ Search through hundreds of thousands of recipes using advanced
-            filtering and ranking. NOTE: This method combines searching by
-            query, by ingredients, and by nutrients into one endpoint.
-            https://spoonacular.com/food-api/docs#Search-Recipes-Complex
-        """
-        endpoint = "recipes/complexSearch"
-        url_query = {}
-        url_params = {"query": query, **kwargs}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def search_site_content(self, query):
-        """ Search spoonacular's site content. You'll be able to
-            find everything that you could also find using the
-            search suggests on spoonacular.com. This is a suggest
-            API so you can send partial strings as queries.
-            https://spoonacular.com/food-api/docs#search-site-content
-        """
-        endpoint = "food/site/search"
-        url_query = {}
-        url_params = {"query": query}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    """ --------------- CHAT Endpoints --------------- """
-
-    def get_conversation_suggests(self, query, number=None):
-        """ This endpoint returns suggestions for things the user
-            can say or ask the chat bot.
-            https://spoonacular.com/food-api/docs#get-conversation-suggests
-        """
-        endpoint = "food/converse/suggest"
-        url_query = {}
-        url_params = {"number": number, "query": query}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def talk_to_a_chatbot(self, text, contextId=None):
-        """ This endpoint can be used to have a conversation about
-            food with the spoonacular chat bot. Use the chat
-            suggests endpoint to show your user what he or she
-            can say.
-            https://spoonacular.com/food-api/docs#talk-to-a-chatbot
-        """
-        endpoint = "food/converse"
-        url_query = {}
-        url_params = {"contextId": contextId, "text": text}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    """ --------------- DATA Endpoints --------------- """
+        def fetch(chunk):
+            response = self.get_recipe_information_bulk(
+                ','.join(str(id) for id in chunk), includeNutrition=includeNutrition)
+            return self._bulk_recipes(response, includeNutrition)
 
-    def get_a_random_food_joke(self):
-        """ Get a random joke that includes or is about food.
-            https://spoonacular.com/food-api/docs#get-a-random-food-joke
-        """
-        endpoint = "food/jokes/random"
-        url_query = {}
-        url_params = {}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def get_analyzed_recipe_instructions(self, id, stepBreakdown=None):
-        """ Get an analyzed breakdown of a recipe's instructions.
-            Each step is enriched with the ingredients and the
-            equipment that is used.
-            https://spoonacular.com/food-api/docs#get-analyzed-recipe-instructions
-        """
-        endpoint = "recipes/{id}/analyzedInstructions".format(id=id)
-        url_query = {}
-        url_params = {"stepBreakdown": stepBreakdown}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def get_food_information(self, id, amount=None, unit=None):
-        """ Get information about a certain food (ingredient).
-            https://spoonacular.com/food-api/docs#get-food-information
-        """
-        endpoint = "food/ingredients/{id}/information".format(id=id)
-        url_query = {}
-        url_params = {"amount": amount, "unit": unit}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def get_product_information(self, id):
-        """ Get information about a packaged food product.
-            https://spoonacular.com/food-api/docs#get-product-information
-        """
-        endpoint = "food/products/{id}".format(id=id)
-        url_query = {}
-        url_params = {}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def get_random_food_trivia(self):
-        """ Returns random food trivia.
-            https://spoonacular.com/food-api/docs#get-random-food-trivia
-        """
-        endpoint = "food/trivia/random"
-        url_query = {}
-        url_params = {}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def get_recipe_information(self, id, includeNutrition=None):
-        """ Get information about a recipe.
-            https://spoonacular.com/food-api/docs#get-recipe-information
-        """
-        endpoint = "recipes/{id}/information".format(id=id)
-        url_query = {}
-        url_params = {"includeNutrition": includeNutrition}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def get_recipe_information_bulk(self, ids, includeNutrition=None):
-        """ Get information about multiple recipes at once. That
-            is equivalent of calling the Get Recipe Information
-            endpoint multiple times but is faster. Note that
-            each returned recipe counts as one request.
-            https://spoonacular.com/food-api/docs#get-recipe-information-bulk
-        """
-        endpoint = "recipes/informationBulk"
-        url_query = {}
-        url_params = {"ids": ids, "includeNutrition": includeNutrition}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    """ --------------- EXTRACT Endpoints --------------- """
-
-    def analyze_a_recipe_search_query(self, q):
-        """ Parse a recipe search query to find out its intention.
-            https://spoonacular.com/food-api/docs#analyze-a-recipe-search-query
-        """
-        endpoint = "recipes/queries/analyze"
-        url_query = {}
-        url_params = {"q": q}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def analyze_recipe_instructions(self, instructions):
-        """ Extract ingredients and equipment from the recipe instruction
-            steps.
-            https://spoonacular.com/food-api/docs#analyze-recipe-instructions
-        """
-        endpoint = "recipes/analyzeInstructions"
-        url_query = {"instructions": instructions}
-        url_params = {}
-        return self._make_request(endpoint, method="POST", query_=url_query, params_=url_params)
-
-    def detect_food_in_text(self, text):
-        """ Detect ingredients and dishes in texts.
-            https://spoonacular.com/food-api/docs#detect-food-in-text
-        """
-        endpoint = "food/detect"
-        url_query = {"text": text}
-        url_params = {}
-        return self._make_request(endpoint, method="POST", query_=url_query, params_=url_params)
-
-    def extract_recipe_from_website(self, url, forceExtraction=None):
-        """ Extract recipe data from a recipe blog or Web page.
-            https://spoonacular.com/food-api/docs#extract-recipe-from-website
-        """
-        endpoint = "recipes/extract"
-        url_query = {}
-        url_params = {"forceExtraction": forceExtraction, "url": url}
-        return self._make_request(endpoint, method="GET", query_=url_query, params_=url_params)
-
-    def parse_ingredients(self, ingredientList, servings=1, includeNutrition=None):
-        """ Extract an ingredient from plain text.
-            https://spoonacular.com/food-api/docs#parse-ingredients
-        """
-        endpoint = "recipes/parseIngredients"
-        url_query = {"ingredientList": ingredientList, "servings": servings}
-        url_params = {"includeNutrition": includeNutrition}
-        return self._make_request(endpoint, method="POST", query_=url_query, params_=url_params)
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        pending = deque()
+        try:
+            batches = self._recipe_batches(ids, includeNutrition, chunk_size)
+            for batch, missing in itertools.chain(batches, [(None, None)]):
+                if batch is not None:
+                    pending.append((batch, executor.submit(fetch, missing) if missing else None))
+                while pending and (batch is None or len(pending) > max_workers):
+                    done, future = pending.popleft()
+                    fetched = future.result() if future is not None else {}
+                    for id, recipe in done:
+                        recipe = recipe if recipe is not None else fetched.get(id)
+                        if recipe is not None:
+                            yield recipe
+        finally:
+            # Don't wait for, or pay for, the chunks of a consumer that stopped early
+            for _, future in pending:
+                if future is not None:
+                    future.cancel()
+            executor.shutdown(wait=False)
+
+    def _recipe_batches(self, ids, includeNutrition, chunk_size):
+        """ Yields (batch, missing) pairs: each batch is the next run of
+            (ID, cached recipe or None) pairs, with at most `chunk_size` IDs
+            missing from the cache
+        """
+        ids = iter(ids)
+        while True:
+            batch, missing = [], []
+            for id in ids:
+                recipe = self._cached_recipe(id, includeNutrition)
+                batch.append((str(id), recipe))
+                if recipe is None:
+                    missing.append(id)
+                    if len(missing) == chunk_size:
+                        break
+            if not batch:
+                return
+            yield batch, missing
+
+    def _bulk_recipes(self, response, includeNutrition):
+        """ Returns the recipes of a bulk call by ID, caching each one """
+        response = _checked(response)
+        recipes = {str(recipe['id']): recipe for recipe in response.json()}
+        for id, recipe in recipes.items():
+            self._cache_recipe(id, includeNutrition, recipe, response.headers)
+        return recipes
+
+    def _cached_recipe(self, id, includeNutrition):
+        """ Returns a recipe cached by `get_recipe_information`, or None """
+        if self.cache is None or not self.cache.ttl_for('get_recipe_information'):
+            return None
+        key = cache_key('GET', 'recipes/{id}/information'.format(id=id),
+                        {'includeNutrition': includeNutrition})
+        response = self.cache.get(key)
+        return response.json() if response is not None else None
+
+    def _cache_recipe(self, id, includeNutrition, recipe, headers):
+        """ Caches one recipe from a bulk call as a `get_recipe_information` response """
+        ttl = self.cache.ttl_for('get_recipe_information') if self.cache is not None else 0
+        if ttl:
+            key = cache_key('GET', 'recipes/{id}/information'.format(id=id),
+                            {'includeNutrition': includeNutrition})
+            content = codec.dumps(recipe)
+            content_type = headers.get('Content-Type', 'application/json')
+            self.cache.set(key, build_response(200, {'Content-Type': content_type}, content), ttl)
+
+    def iter_search_recipes_complex(self, query, max_results=None, page_size=100, offset=0, **kwargs):
+        """ Yields every recipe matching a `search_recipes_complex` search
+
+        Pages of `page_size` results are fetched one at a time, and the
+        next page is fetched in the background while the current one is
+        consumed. Iteration stops at the search's `totalResults` or
+        after `max_results` recipes. Each page's 'per result' cost is
+        checked against the quota before it is fetched, and the last
+        page only asks for the results still needed.
+
+        :param query: the recipe search query (str)
+        :param max_results: max number of recipes to yield (int)
+        :param page_size: number of results per request (int)
+        :param offset: number of results to skip (int)
+
+        Other keyword arguments, except `number`, are passed on to
+        `search_recipes_complex`.
+        """
+        _check_search_kwargs(kwargs)
+        end = offset + max_results if max_results is not None else None
+
+        def fetch(offset_, number):
+            return _checked(self.search_recipes_complex(
+                query, offset=offset_, number=number, **kwargs)).json()
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = None
+        try:
+            number = _page_size(page_size, offset, end, None)
+            future = executor.submit(fetch, offset, number) if number > 0 else None
+            while future is not None:
+                page = future.result()
+                results = page.get('results', [])
+                offset += len(results)
+                number = _page_size(page_size, offset, end, page.get('totalResults'))
+                future = executor.submit(fetch, offset, number) if results and number > 0 else None
+                for recipe in results:
+                    yield recipe
+        finally:
+            # Don't wait for the prefetched page of a consumer that stopped early
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def map(self, endpoint, iterable_of_kwargs, max_workers=8, ordered=True):
+        """ Calls one endpoint for many inputs on a bounded thread pool
+
+        All calls share the instance's rate limiter and quota. Yields a
+        BatchResult(index, kwargs, response, error) per input, in input
+        order or, with `ordered=False`, as calls complete. A failed call
+        sets `error` and does not stop the batch.
+
+            titles = ({'title': title} for title in dish_titles)
+            for result in api.map('guess_nutrition_by_dish_name', titles):
+                ...
+
+        :param endpoint: endpoint method or its name (str)
+        :param iterable_of_kwargs: keyword arguments for each call (iterable of dicts)
+        :param max_workers: max number of calls in flight (int)
+        :param ordered: yield results in input order (bool)
+        """
+        func = getattr(self, endpoint) if isinstance(endpoint, str) else endpoint
+        return map_calls(func, iterable_of_kwargs, max_workers=max_workers, ordered=ordered)
@@ -0,0 +1,381 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+Running many Spoonacular API calls at once
+"""
+
+import asyncio
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+BatchResult = namedtuple('BatchResult', ['index', 'kwargs', 'response', 'error'])
+BatchResult.__doc__ = """ The outcome of one call in a batch
+
+    :param index: position of the call's inputs in the batch (int)
+    :param kwargs: the call's keyword arguments (dict)
+    :param response: the call's response, if it got one (requests.Response)
+    :param error: the exception the call raised, if it failed (Exception)
+    """
+
+
+def _call(func, index, kwargs):
+    try:
+        response = func(**kwargs)
+        response.raise_for_status()
+        return BatchResult(index, kwargs, response, None)
+    except Exception as e:
+        return BatchResult(index, kwargs, getattr(e, 'response', None), e)
+
+
+def map_calls(func, iterable_of_kwargs, max_workers=8, ordered=True):
+    """ Calls `func(**kwargs)` for every kwargs on a bounded thread pool
+
+    Yields a BatchResult per call, in input order or as calls complete.
+    Errors, including error responses, are collected in the results
+    instead of stopping the batch. Inputs are read lazily, so only a
+    few calls per worker are queued at a time.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = deque() if ordered else set()
+    try:
+        for index, kwargs in enumerate(iterable_of_kwargs):
+            future = executor.submit(_call, func, index, kwargs)
+            if ordered:
+                pending.append(future)
+                if len(pending) > 2 * max_workers:
+                    yield pending.popleft().result()
+            else:
+                pending.add(future)
+                if len(pending) > 2 * max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+        if ordered:
+            for future in pending:
+                yield future.result()
+        else:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+    finally:
+        # Calls not started yet aren't sent for a consumer that stopped early
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+async def _call_async(func, index, kwargs, semaphore):
+    async with semaphore:
+        try:
+            response = await func(**kwargs)
+            response.raise_for_status()
+            return BatchResult(index, kwargs, response, None)
+        except Exception as e:
+            return BatchResult(index, kwargs, getattr(e, 'response', None), e)
+
+
+async def map_calls_async(func, iterable_of_kwargs, max_workers=8, ordered=True):
+    """ Async generator version of `map_calls`, awaiting `func(**kwargs)`
+
+    Calls run as tasks, at most `max_workers` at a time. Tasks not
+    consumed when the generator is closed are cancelled.
+    """
+    semaphore = asyncio.Semaphore(max_workers)
+    pending = deque() if ordered else set()
+    try:
+        for index, kwargs in enumerate(iterable_of_kwargs):
+            task = asyncio.ensure_future(_call_async(func, index, kwargs, semaphore))
+            if ordered:
+                pending.append(task)
+                if len(pending) > 2 * max_workers:
+                    yield await pending.popleft()
+            else:
+                pending.add(task)
+                if len(pending) > 2 * max_workers:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+        if ordered:
+            while pending:
+                yield await pending.popleft()
+        else:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+class _Batch(object):
+    def __init__(self):
+        self.items = []
+        self.futures = []
+
+
+def _is_async(api):
+    """ Checks if an API client's endpoint methods return awaitables """
+    from .aio import AsyncAPI
+    return isinstance(api, AsyncAPI)
+
+
+class MicroBatcher(object):
+    """ Groups single items from concurrent callers into batched calls
+
+    Items are collected until `max_size` items are waiting or the first
+    one has waited `max_wait` seconds, then sent together with one call
+    to `send_batch(group, items)`. That call returns one result per item
+    (an exception instance fails just that item; a different number of
+    results fails the whole batch with LookupError). Items only share a
+    batch with items of the same `group`.
+
+    Items submitted from coroutines are batched with the items of the
+    same event loop, and their batches are sent from that loop without
+    blocking it: with `await send_batch_async(group, items)` if given,
+    otherwise by running `send_batch` in the loop's executor.
+    """
+
+    def __init__(self, send_batch, max_size=20, max_wait=0.05, send_batch_async=None):
+        """ Micro-batcher constructor
+
+        :param send_batch: function sending one batch, `send_batch(group, items)`
+        :param max_size: max number of items per batch (int)
+        :param max_wait: longest time an item waits for its batch to fill (seconds)
+        :param send_batch_async: coroutine function sending one batch of
+            items submitted from coroutines, `send_batch_async(group, items)`
+        """
+        self.send_batch = send_batch
+        self.send_batch_async = send_batch_async
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.batches_sent = 0
+        self.items_sent = 0
+        self._lock = threading.Lock()
+        self._pending = {}  # By (group, event loop or None)
+
+    def _add(self, key, item, future):
+        """ Adds an item to the batch waiting under `key`
+
+        Returns the batch and whether it is full, in which case it is no
+        longer waiting and the caller sends it.
+        """
+        with self._lock:
+            batch = self._pending.get(key)
+            if batch is None:
+                batch = self._pending[key] = _Batch()
+                loop = key[1]
+                if loop is None:
+                    timer = threading.Timer(self.max_wait, self._dispatch, (key, batch))
+                    timer.daemon = True
+                    timer.start()
+                else:
+                    loop.call_later(self.max_wait, self._dispatch, key, batch)
+            batch.items.append(item)
+            batch.futures.append(future)
+            full = len(batch.items) >= self.max_size
+            if full:
+                self._take(key)
+            return batch, full
+
+    def submit(self, item, group=None):
+        """ Queues an item and returns a Future for its result """
+        future = Future()
+        key = (group, None)
+        batch, full = self._add(key, item, future)
+        if full:
+            self._send(key, batch)
+        return future
+
+    async def submit_async(self, item, group=None):
+        """ Queues an item from a coroutine and waits for its result """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (group, loop)
+        batch, full = self._add(key, item, future)
+        if full:
+            self._send(key, batch)
+        return await future
+
+    def flush(self):
+        """ Sends every waiting batch right away """
+        with self._lock:
+            pending = list(self._pending.items())
+        for key, batch in pending:
+            self._dispatch(key, batch)
+
+    def _take(self, key):
+        batch = self._pending.pop(key)
+        self.batches_sent += 1
+        self.items_sent += len(batch.items)
+
+    def _dispatch(self, key, batch):
+        """ Sends a waiting batch, unless it was already sent """
+        with self._lock:
+            if self._pending.get(key) is not batch:
+                return
+            self._take(key)
+        self._send(key, batch)
+
+    def _send(self, key, batch):
+        """ Sends a batch: right away for threads' items, as a task on
+            their event loop for coroutines' items
+        """
+        group, loop = key
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self._send_async(group, loop, batch), loop)
+            return
+        try:
+            results = self.send_batch(group, batch.items)
+        except Exception as e:
+            _settle(batch, error=e)
+            return
+        _settle(batch, results)
+
+    async def _send_async(self, group, loop, batch):
+        try:
+            if self.send_batch_async is not None:
+                results = await self.send_batch_async(group, batch.items)
+            else:
+                results = await loop.run_in_executor(None, self.send_batch, group, batch.items)
+        except Exception as e:
+            _settle(batch, error=e)
+            return
+        _settle(batch, results)
+
+
+def _settle(batch, results=None, error=None):
+    """ Sets the result of each item of a sent batch, skipping the callers that gave up """
+    if error is None:
+        results = list(results)
+    if error is None and len(results) != len(batch.futures):
+        error = LookupError("Sent {} items but got {} results back".format(
+            len(batch.futures), len(results)))
+    if error is not None:
+        results = [error] * len(batch.futures)
+    for future, result in zip(batch.futures, results):
+        if future.done():
+            continue
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+
+class IngredientParser(MicroBatcher):
+    """ Batches single-line `parse_ingredients` calls into multi-line ones
+
+    `parse_ingredients` costs one request plus one result per line, so
+    sending lines from concurrent callers together saves a request and
+    a round-trip for every line after the first.
+
+        parser = IngredientParser(api)
+        ingredient = parser.parse("2 cups of flour")
+    """
+
+    def __init__(self, api, max_size=20, max_wait=0.05):
+        """ Ingredient parser constructor
+
+        :param api: client used to send the batches (API or AsyncAPI)
+        :param max_size: max number of lines per call (int)
+        :param max_wait: longest time a line waits for its batch to fill (seconds)
+        """
+        self.api = api
+        self.is_async = _is_async(api)
+        super().__init__(self._parse_lines, max_size=max_size, max_wait=max_wait,
+                         send_batch_async=self._parse_lines_async if self.is_async else None)
+
+    def parse(self, line, servings=1, includeNutrition=None):
+        """ Parses one ingredient line, returning the parsed ingredient (dict) """
+        if self.is_async:
+            raise TypeError("Use parse_async with an AsyncAPI.")
+        return self.submit(self._line(line), (servings, includeNutrition)).result()
+
+    async def parse_async(self, line, servings=1, includeNutrition=None):
+        """ Parses one ingredient line from a coroutine """
+        return await self.submit_async(self._line(line), (servings, includeNutrition))
+
+    @staticmethod
+    def _line(line):
+        line = line.strip()
+        if not line or '\n' in line:
+            raise ValueError("Expected a single ingredient line, got {!r}".format(line))
+        return line
+
+    def _parse_lines(self, group, lines):
+        servings, includeNutrition = group
+        return self._match(lines, self.api.parse_ingredients(
+            '\n'.join(lines), servings=servings, includeNutrition=includeNutrition))
+
+    async def _parse_lines_async(self, group, lines):
+        servings, includeNutrition = group
+        return self._match(lines, await self.api.parse_ingredients(
+            '\n'.join(lines), servings=servings, includeNutrition=includeNutrition))
+
+    @staticmethod
+    def _match(lines, response):
+        """ Returns the parsed ingredient of each line """
+        response.raise_for_status()
+        parsed = response.json()
+        if len(parsed) == len(lines):
+            return parsed
+        # Some lines weren't parsed, so match the others on their original text
+        by_line = {ingredient.get('original'): ingredient for ingredient in parsed}
+        return [by_line.get(line, LookupError("Couldn't parse {!r}".format(line)))
+                for line in lines]
+
+
+class ProductClassifier(MicroBatcher):
+    """ Batches `classify_a_grocery_product` calls into `classify_grocery_products_batch` ones
+
+    Concurrent callers classify one product each and the products are
+    sent together, one request per batch instead of one per product.
+
+        classifier = ProductClassifier(api)
+        product = classifier.classify({"title": "Kroger Vitamin A & D Milk",
+                                       "upc": "", "plu_code": ""})
+    """
+
+    def __init__(self, api, max_size=50, max_wait=0.05):
+        """ Product classifier constructor
+
+        :param api: client used to send the batches (API or AsyncAPI)
+        :param max_size: max number of products per call (int)
+        :param max_wait: longest time a product waits for its batch to fill (seconds)
+        """
+        self.api = api
+        self.is_async = _is_async(api)
+        super().__init__(self._classify_products, max_size=max_size, max_wait=max_wait,
+                         send_batch_async=self._classify_products_async if self.is_async else None)
+
+    def classify(self, product):
+        """ Classifies one grocery product, returning its classification (dict)
+
+        :param product: the product, as passed to `classify_a_grocery_product` (dict)
+        """
+        if self.is_async:
+            raise TypeError("Use classify_async with an AsyncAPI.")
+        return self.submit(product).result()
+
+    async def classify_async(self, product):
+        """ Classifies one grocery product from a coroutine """
+        return await self.submit_async(product)
+
+    def _classify_products(self, group, products):
+        return self._check(products, self.api.classify_grocery_products_batch(products))
+
+    async def _classify_products_async(self, group, products):
+        return self._check(products, await self.api.classify_grocery_products_batch(products))
+
+    @staticmethod
+    def _check(products, response):
+        """ Returns the classification of each product """
+        response.raise_for_status()
+        classified = response.json()
+        if len(classified) != len(products):
+            raise LookupError("Sent {} products but got {} classifications back".format(
+                len(products), len(classified)))
+        return classified
@@ -0,0 +1,248 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+Response caching for idempotent Spoonacular API calls
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from .canonical import request_key
+from .transport import build_response, redact_url
+
+# Endpoints whose responses are meant to differ from call to call
+UNCACHEABLE_ENDPOINTS = frozenset([
+    'generate_meal_plan', 'get_a_random_food_joke', 'get_random_food_trivia',
+    'get_random_recipes', 'match_recipes_to_daily_calories', 'talk_to_a_chatbot',
+])
+
+
+def cache_key(method, path, params=None):
+    """ Builds a cache key from the endpoint path and canonical params
+
+    None values and the API key are left out and the remaining params
+    are sorted, so equivalent calls share a key.
+    """
+    return request_key(method, path, params).decode('utf-8')
+
+
+class BaseCache(object):
+    """ Time-to-live rules and hit/miss counters shared by the caches """
+
+    def __init__(self, ttl=3600, ttls=None):
+        """ Cache constructor
+
+        :param ttl: default time-to-live for cached responses (seconds)
+        :param ttls: time-to-live overrides by endpoint name, 0 to disable (dict)
+        """
+        self.ttl = ttl
+        self.ttls = dict.fromkeys(UNCACHEABLE_ENDPOINTS, 0)
+        self.ttls.update(ttls or {})
+        self.hits = 0
+        self.misses = 0
+
+    def ttl_for(self, endpoint):
+        """ Returns the time-to-live for an endpoint's responses (seconds) """
+        return self.ttls.get(endpoint, self.ttl)
+
+    def stats(self):
+        """ Returns the cache's size and hit/miss counters """
+        return {'size': len(self), 'hits': self.hits, 'misses': self.misses}
+
+
+class ResponseCache(BaseCache):
+    """ Bounded in-memory LRU cache of API responses
+
+    Entries expire after a per-endpoint time-to-live. When the cache is
+    full, the least recently used entry is evicted.
+    """
+
+    def __init__(self, maxsize=1024, ttl=3600, ttls=None, clock=time.monotonic):
+        """ Response cache constructor
+
+        :param maxsize: max number of cached responses (int)
+        :param ttl: default time-to-live for cached responses (seconds)
+        :param ttls: time-to-live overrides by endpoint name, 0 to disable (dict)
+        :param clock: monotonic time function (seconds)
+        """
+        super().__init__(ttl=ttl, ttls=ttls)
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """ Returns a fresh copy of the cached response, or None """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return build_response(*entry[1:])
+
+    def set(self, key, response, ttl):
+        """ Caches a response for `ttl` seconds """
+        entry = (self._clock() + ttl, response.status_code, dict(response.headers),
+                 response.content, redact_url(response.url), response.reason)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """ Empties the cache and resets the counters """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class SQLiteCache(BaseCache):
+    """ Persistent response cache in a SQLite file
+
+    The database runs in WAL mode, so several processes can read and
+    write the same file at once and the cache survives restarts. Large
+    bodies are zlib-compressed. Once the stored bodies exceed
+    `max_bytes`, expired and then least recently used entries are
+    evicted.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            expires REAL NOT NULL,
+            accessed REAL NOT NULL,
+            size INTEGER NOT NULL,
+            status INTEGER NOT NULL,
+            headers TEXT NOT NULL,
+            url TEXT,
+            reason TEXT,
+            compressed INTEGER NOT NULL,
+            content BLOB NOT NULL
+        )"""
+
+    def __init__(self, path, max_bytes=256 * 2**20, ttl=86400, ttls=None,
+                 compress_min_size=1024, evict_interval=100, timeout=30,
+                 clock=time.time):
+        """ SQLite cache constructor
+
+        :param path: database file, shared by every process using the cache (str)
+        :param max_bytes: max total size of the stored bodies (int)
+        :param ttl: default time-to-live for cached responses (seconds)
+        :param ttls: time-to-live overrides by endpoint name, 0 to disable (dict)
+        :param compress_min_size: compress bodies at least this large (bytes)
+        :param evict_interval: check the cache's size every this many writes (int)
+        :param timeout: how long to wait for another process's write lock (seconds)
+        :param clock: wall-clock time function, shared across processes (seconds)
+        """
+        super().__init__(ttl=ttl, ttls=ttls)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.compress_min_size = compress_min_size
+        self.evict_interval = evict_interval
+        self.timeout = timeout
+        self._clock = clock
+        self._writes = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()  # Guards the counters
+        with self._connection() as db:
+            db.execute(self._SCHEMA)
+            db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def _connection(self):
+        """ Returns this thread's connection to the database """
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.timeout)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key):
+        """ Returns the cached response, or None """
+        now = self._clock()
+        with self._connection() as db:
+            row = db.execute("SELECT status, headers, url, reason, compressed, content "
+                             "FROM responses WHERE key = ? AND expires > ?",
+                             (key, now)).fetchone()
+            if row is not None:
+                db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        status, headers, url, reason, compressed, content = row
+        content = zlib.decompress(content) if compressed else bytes(content)
+        # Files written by older versions may still hold URLs with an API key
+        return build_response(status, json.loads(headers), content, url=redact_url(url), reason=reason)
+
+    def set(self, key, response, ttl):
+        """ Caches a response for `ttl` seconds """
+        now = self._clock()
+        content = response.content
+        compressed = len(content) >= self.compress_min_size
+        if compressed:
+            content = zlib.compress(content)
+        with self._connection() as db:
+            db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       (key, now + ttl, now, len(content), response.status_code,
+                        json.dumps(dict(response.headers)), redact_url(response.url), response.reason,
+                        int(compressed), content))
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % self.evict_interval == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """ Drops expired entries, then the least recently used ones
+            until the stored bodies fit in `max_bytes`
+        """
+        with self._connection() as db:
+            db.execute("DELETE FROM responses WHERE expires <= ?", (self._clock(),))
+            total = db.execute("SELECT TOTAL(size) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = db.execute("SELECT key, size FROM responses ORDER BY accessed")
+            stale = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                stale.append((key,))
+                total -= size
+            db.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self):
+        """ Empties the cache and resets the counters """
+        with self._connection() as db:
+            db.execute("DELETE FROM responses")
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        """ Closes this thread's connection to the database """
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = None
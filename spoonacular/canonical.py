@@ -0,0 +1,71 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+Canonical form of API requests, and the keys built from it
+"""
+
+import json
+from urllib.parse import urlencode
+
+# Separator of the list values each param takes, when it isn't a comma
+LIST_SEPARATORS = {'ingredientList': '\n'}
+
+
+def canonical_value(value, separator=','):
+    """ Returns the string a param value is sent as
+
+    Booleans are sent as 'true'/'false', lists as one separated string
+    (sets sorted first), without their None entries, and anything else
+    as str(value).
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [canonical_value(item, separator) for item in value if item is not None]
+        return separator.join(sorted(items) if isinstance(value, (set, frozenset)) else items)
+    return str(value)
+
+
+def canonical_fields(fields):
+    """ Returns the canonical form of a params or form fields dict
+
+    None values and empty lists are dropped, the remaining values are
+    converted with `canonical_value` and the fields are sorted by name,
+    so equivalent calls send the same, shortest query string. Returns
+    None when no field is left.
+    """
+    if not fields:
+        return None
+    canonical = {}
+    for name in sorted(fields):
+        value = fields[name]
+        if value is None:
+            continue
+        value = canonical_value(value, LIST_SEPARATORS.get(name, ','))
+        if value or not isinstance(fields[name], (list, tuple, set, frozenset)):
+            canonical[name] = value
+    return canonical or None
+
+
+def request_key(method, path, params=None, form=None, json_=None):
+    """ Builds a stable byte string identifying a request
+
+    The key holds the method, the path, the canonical query string
+    (without the API key) and, for requests with a body, the canonical
+    form fields and JSON body (with sorted keys). Equivalent calls get
+    the same key, whatever order or types their arguments had.
+    """
+    params = canonical_fields(params)
+    if params and 'apiKey' in params:
+        params = {name: value for name, value in params.items() if name != 'apiKey'}
+    key = '{} {}?{}'.format(method, path, urlencode(params or {}))
+    form = canonical_fields(form)
+    if form:
+        key += '\n' + urlencode(form)
+    if json_ is not None:
+        key += '\n' + json.dumps(json_, sort_keys=True, separators=(',', ':'))
+    return key.encode('utf-8')
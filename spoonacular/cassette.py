@@ -0,0 +1,209 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+Recording API responses to a cassette file and replaying them offline
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import zlib
+from http.client import responses as REASONS
+from urllib.parse import urlsplit
+
+from . import canonical
+from .transport import RequestsTransport, build_response
+
+# File layout: MAGIC, then one record per response (a RECORD header, the
+# headers and the body), then the index (an INDEX_ENTRY per record) and
+# the FOOTER. Without a valid index (the recording process died), the
+# index is rebuilt by scanning the records up to the first one that is
+# cut short or fails its checksum.
+MAGIC = b'SPCASSET2'
+RECORD = struct.Struct('<16sHIII')       # key hash, status, headers length, body length, CRC-32
+INDEX_ENTRY = struct.Struct('<16sQ')     # key hash, record offset
+FOOTER = struct.Struct('<QI8s')          # index offset, number of entries, FOOTER_MAGIC
+FOOTER_MAGIC = b'SPCINDEX'
+
+
+class UnrecordedRequestError(LookupError):
+    """ Raised when replaying a request the cassette has no response for """
+
+    def __init__(self, method, url):
+        self.method = method
+        self.url = url
+        super().__init__("No recorded response for {} {}".format(method, url))
+
+
+def request_key(method, url, params=None, data=None, json_=None):
+    """ Hashes a request's method, path and normalized params and body
+
+    The host and the API key are left out, so a cassette recorded
+    against the API replays against any server with any key.
+    """
+    key = canonical.request_key(method, urlsplit(url).path, params, data, json_)
+    return hashlib.blake2b(key, digest_size=16).digest()
+
+
+def _encode_headers(headers):
+    return '\n'.join('{}: {}'.format(name, value) for name, value in headers.items()).encode('latin-1')
+
+
+def _checksum(key, headers, content):
+    """ CRC-32 of a record's key hash, headers and body """
+    return zlib.crc32(content, zlib.crc32(headers, zlib.crc32(key)))
+
+
+def _decode_headers(data):
+    return dict(line.split(': ', 1) for line in data.decode('latin-1').split('\n') if line)
+
+
+class CassetteTransport(object):
+    """ Records responses to a cassette file, or replays them without a network
+
+    In 'record' mode requests go through `transport` and every response
+    is appended to the cassette. In 'replay' mode the cassette is
+    memory-mapped and requests are answered from it, raising
+    UnrecordedRequestError for requests it doesn't hold. 'auto' mode
+    replays the requests it can and records the others.
+
+    Requests are matched on a hash of their method, path and normalized
+    params and body, without the API key. The last recorded response
+    for a request wins. Only the sync `API` uses transports.
+    """
+
+    def __init__(self, path, mode='replay', transport=None):
+        """ Cassette transport constructor
+
+        :param path: cassette file (str)
+        :param mode: 'record', 'replay' or 'auto' (str)
+        :param transport: transport sending the recorded requests, defaults
+            to a RequestsTransport (RequestsTransport or HTTPXTransport)
+        """
+        if mode not in ('record', 'replay', 'auto'):
+            raise ValueError("Unknown cassette mode: {!r}".format(mode))
+        self.path = path
+        self.mode = mode
+        self._transport = transport
+        self._lock = threading.Lock()
+        self._index = {}
+        self._file = None
+        self._map = None
+        if mode == 'replay':
+            with open(path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._end = self._load_index(self._map)
+        else:
+            exists = os.path.exists(path) and os.path.getsize(path) > 0
+            self._file = open(path, 'r+b' if exists else 'w+b')
+            if exists:
+                with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    self._end = self._load_index(data)
+                self._file.truncate(self._end)  # The index is rewritten on close
+            else:
+                self._file.write(MAGIC)
+                self._end = len(MAGIC)
+            self._file.seek(self._end)
+
+    @property
+    def transport(self):
+        if self._transport is None:
+            self._transport = RequestsTransport()
+        return self._transport
+
+    @property
+    def headers(self):
+        return self.transport.headers
+
+    def __len__(self):
+        return len(self._index)
+
+    def _load_index(self, data):
+        """ Reads the index into `_index` and returns the end of the last record """
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("{} is not a cassette".format(self.path))
+        records_end = len(data)
+        if len(data) >= len(MAGIC) + FOOTER.size:
+            index_offset, count, magic = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+            if magic == FOOTER_MAGIC and len(MAGIC) <= index_offset <= len(data) - FOOTER.size:
+                if index_offset + count * INDEX_ENTRY.size == len(data) - FOOTER.size:
+                    for i in range(count):
+                        key, offset = INDEX_ENTRY.unpack_from(data, index_offset + i * INDEX_ENTRY.size)
+                        self._index[key] = offset
+                    return index_offset
+                records_end = index_offset  # Damaged index, but the records end where it starts
+        # No valid index, so scan the records, stopping at the first one
+        # that is cut short or corrupt, such as the leftovers of an index
+        offset = len(MAGIC)
+        while offset + RECORD.size <= records_end:
+            key, status, headers_length, body_length, checksum = RECORD.unpack_from(data, offset)
+            start = offset + RECORD.size
+            body_start = start + headers_length
+            end = body_start + body_length
+            if end > records_end or checksum != _checksum(key, data[start:body_start], data[body_start:end]):
+                break
+            self._index[key] = offset
+            offset = end
+        return offset
+
+    def _replay(self, key, method, url):
+        offset = self._index.get(key)
+        if offset is None:
+            raise UnrecordedRequestError(method, url)
+        if self._map is not None:
+            _, status, headers_length, body_length, _ = RECORD.unpack_from(self._map, offset)
+            start = offset + RECORD.size
+            headers = self._map[start:start + headers_length]
+            content = self._map[start + headers_length:start + headers_length + body_length]
+        else:
+            # Auto mode reads from the cassette being recorded
+            with self._lock:
+                self._file.seek(offset)
+                _, status, headers_length, body_length, _ = RECORD.unpack(self._file.read(RECORD.size))
+                headers = self._file.read(headers_length)
+                content = self._file.read(body_length)
+                self._file.seek(self._end)
+        return build_response(status, _decode_headers(headers), content,
+                              url=url, reason=REASONS.get(status))
+
+    def _record(self, key, response):
+        headers = _encode_headers(response.headers)
+        content = response.content
+        record = RECORD.pack(key, response.status_code, len(headers), len(content),
+                             _checksum(key, headers, content))
+        with self._lock:
+            self._file.write(record)
+            self._file.write(headers)
+            self._file.write(content)
+            self._index[key] = self._end
+            self._end += RECORD.size + len(headers) + len(content)
+
+    def request(self, method, url, params=None, data=None, json=None, timeout=None):
+        """ Replays or sends and records a request, returning a requests.Response """
+        key = request_key(method, url, params, data, json)
+        if self.mode == 'replay' or (self.mode == 'auto' and key in self._index):
+            return self._replay(key, method, url)
+        response = self.transport.request(method, url, params=params, data=data,
+                                          json=json, timeout=timeout)
+        self._record(key, response)
+        return response
+
+    def close(self):
+        """ Writes the index of a recorded cassette and closes the files """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            with self._lock:
+                self._file.seek(self._end)
+                for key, offset in self._index.items():
+                    self._file.write(INDEX_ENTRY.pack(key, offset))
+                self._file.write(FOOTER.pack(self._end, len(self._index), FOOTER_MAGIC))
+                self._file.close()
+                self._file = None
+        if self._transport is not None:
+            self._transport.close()
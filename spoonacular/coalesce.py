@@ -0,0 +1,109 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+Coalescing identical concurrent Spoonacular API calls
+"""
+
+import asyncio
+import threading
+
+from .transport import build_response, redact_url
+
+# Result of an async call whose leader was cancelled, so a follower sends it instead
+_CANCELLED = object()
+
+
+def copy_response(response):
+    """ Returns a copy of a response that can be handed to another caller,
+        without the API key of the caller that made it
+    """
+    return build_response(response.status_code, dict(response.headers), response.content,
+                          url=redact_url(response.url), reason=response.reason)
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class RequestCoalescer(object):
+    """ Lets identical concurrent calls share one upstream request
+
+    The first caller for a key sends the request. Callers asking for the
+    same key while it is in flight wait for that request and get a copy
+    of its response (or its exception) instead of sending their own.
+    Works for threads (`call`) and coroutines (`call_async`); coroutines
+    only share calls with the coroutines of their own event loop.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._futures = {}  # By (event loop, key)
+
+    def call(self, key, func):
+        """ Returns `func()`, or the result of an identical call already in flight """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy_response(call.response)
+        try:
+            call.response = func()
+            return call.response
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def call_async(self, key, func):
+        """ Returns `await func()`, or the result of an identical call already in flight
+
+        If the task sending the call is cancelled, one of the tasks
+        waiting for it sends the call instead.
+        """
+        key = (asyncio.get_running_loop(), key)
+        coalesced = False
+        while True:
+            with self._lock:
+                future = self._futures.get(key)
+                leader = future is None
+                if leader:
+                    future = self._futures[key] = asyncio.get_running_loop().create_future()
+                elif not coalesced:
+                    coalesced = True
+                    self.coalesced += 1
+            if leader:
+                break
+            response = await asyncio.shield(future)
+            if response is not _CANCELLED:
+                return copy_response(response)
+        try:
+            response = await func()
+            future.set_result(response)
+            return response
+        except asyncio.CancelledError:
+            future.set_result(_CANCELLED)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark as retrieved when no one else was waiting
+            raise
+        finally:
+            with self._lock:
+                del self._futures[key]
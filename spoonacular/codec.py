@@ -0,0 +1,95 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+JSON encoding and decoding of request and response bodies
+"""
+
+import json
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+
+class JSONCodec(object):
+    """ A JSON library's encode and decode functions
+
+    `dumps` always returns bytes and `loads` accepts bytes or str,
+    whichever library is underneath.
+    """
+
+    def __init__(self, name, loads, dumps):
+        """ JSON codec constructor
+
+        :param name: name of the JSON library (str)
+        :param loads: function decoding bytes or str
+        :param dumps: function encoding an object to bytes
+        """
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    def __repr__(self):
+        return '<JSONCodec {}>'.format(self.name)
+
+
+def _orjson_codec():
+    import orjson
+    return JSONCodec('orjson', orjson.loads,
+                     lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS))
+
+
+def _ujson_codec():
+    import ujson
+    return JSONCodec('ujson', ujson.loads,
+                     lambda obj: ujson.dumps(obj, ensure_ascii=False).encode())
+
+
+def _stdlib_codec():
+    return JSONCodec('json', json.loads,
+                     lambda obj: json.dumps(obj, separators=(',', ':')).encode())
+
+
+CODECS = {'orjson': _orjson_codec, 'ujson': _ujson_codec, 'json': _stdlib_codec}
+
+
+def load_codec(name=None):
+    """ Returns the codec of the named JSON library, or of the fastest installed one
+
+    :param name: 'orjson', 'ujson' or 'json' (str)
+    """
+    if name is not None:
+        return CODECS[name]()
+    for name in ('orjson', 'ujson'):
+        try:
+            return CODECS[name]()
+        except ImportError:
+            continue
+    return _stdlib_codec()
+
+
+_codec = load_codec()
+
+
+def get_codec():
+    """ Returns the codec used for every request and response body """
+    return _codec
+
+
+def set_codec(codec):
+    """ Switches the codec used for every request and response body
+
+    :param codec: a JSONCodec, or the name of a JSON library (str)
+    """
+    global _codec
+    _codec = load_codec(codec) if isinstance(codec, str) else codec
+
+
+def loads(data):
+    """ Decodes a JSON body (bytes or str) with the current codec """
+    return _codec.loads(data)
+
+
+def dumps(obj):
+    """ Encodes an object to a JSON body (bytes) with the current codec """
+    return _codec.dumps(obj)
@@ -0,0 +1,455 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+Declarative table of the Spoonacular API endpoints
+
+Each endpoint's HTTP method, path template, arguments and where they
+go in the request (form fields, query params or JSON body) are listed
+once in ENDPOINT_TABLE, next to its quota rule from `endpoint_quotas`.
+At import, every entry is compiled into an API method with a real
+signature that builds its request directly, and every quota rule into
+a cost function, so calls don't format templates or match qualifiers.
+"""
+
+import string
+from collections import namedtuple
+
+from .endpoint_quotas import endpoint_quotas
+from .quota import QUOTA_CATEGORIES
+
+# Spoonacular's default page size when a 'per result' call doesn't set `number`
+DEFAULT_NUMBER_OF_RESULTS = 10
+
+Endpoint = namedtuple('Endpoint', ['name', 'quota', 'cost', 'method', 'path',
+                                   'signature', 'form', 'params', 'json', 'body', 'doc'],
+                      defaults=(None,) * 9)
+Endpoint.__doc__ = """ An API endpoint
+
+    :param name: API method name (str)
+    :param quota: quota rule, from `endpoint_quotas` (dict)
+    :param cost: returns the cost of a call given its `query`, `params`
+        and `json`, by quota category (function)
+    :param method: HTTP method (str)
+    :param path: path template, with {argument} placeholders (str)
+    :param signature: the method's arguments, after self (str)
+    :param form: arguments sent as form fields (tuple)
+    :param params: arguments sent as query params, '**kwargs' passing
+        on any other keyword arguments (tuple)
+    :param json: arguments sent as the keys of a JSON object body (tuple)
+    :param body: argument sent as the whole JSON body (str)
+    :param doc: the method's docstring (str)
+    """
+
+
+def _count_items(value, separator=','):
+    """ Counts the entries in a list or a separated string """
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len([item for item in value.split(separator) if item.strip()])
+    if isinstance(value, (list, tuple)):
+        return sum(_count_items(item, separator) if item is None or isinstance(item, (str, list, tuple))
+                   else 1 for item in value)
+    return 1
+
+
+def _number_of_results(params):
+    return int((params or {}).get('number') or DEFAULT_NUMBER_OF_RESULTS)
+
+
+# How many units a call is charged for, by quota qualifier, from its
+# form fields, query params and JSON body
+QUALIFIER_UNITS = {
+    'per ingredient': lambda query, params, json: _count_items(
+        (json or {}).get('ingredients'), separator='\n'),
+    'per recipe': lambda query, params, json: _count_items((params or {}).get('ids')),
+    'per product': lambda query, params, json: len(json or []),
+    'per parsed ingredient': lambda query, params, json: _count_items(
+        (query or {}).get('ingredientList'), separator='\n'),
+    'per result': lambda query, params, json: _number_of_results(params),
+    # TODO: Contact Spoonacular about this quota info
+    'per wine found': lambda query, params, json: 3 * _number_of_results(params),
+}
+
+
+def cost_function(quota):
+    """ Compiles a quota rule from `endpoint_quotas` into a cost function
+
+    The function takes a call's form fields, query params and JSON body
+    and returns the quota it uses up, by category. Amounts without a
+    known qualifier are charged once per call.
+    """
+    terms = tuple((category, quota[category]['amount'], QUALIFIER_UNITS.get(quota[category]['qualifier']))
+                  for category in QUOTA_CATEGORIES)
+    if all(units is None for _, _, units in terms):
+        fixed = {category: amount for category, amount, _ in terms}
+
+        def cost(query=None, params=None, json=None):
+            return dict(fixed)
+    else:
+        def cost(query=None, params=None, json=None):
+            return {category: amount * units(query, params, json) if units is not None else amount
+                    for category, amount, units in terms}
+    return cost
+
+
+# Cost function of every endpoint with a known quota, including the ones
+# this client has no method for
+COST_FUNCTIONS = {name: cost_function(quota) for name, quota in endpoint_quotas.items()}
+
+
+def _endpoint(name, method, path, signature='', form='', params='', json='', body=None, doc=None):
+    return Endpoint(name, endpoint_quotas.get(name), COST_FUNCTIONS.get(name), method, path,
+                    signature, tuple(form.split()), tuple(params.split()), tuple(json.split()),
+                    body, doc)
+
+
+ENDPOINT_TABLE = [
+    # --------------- COMPUTE Endpoints ---------------
+    _endpoint('classify_a_grocery_product', 'POST', 'food/products/classify',
+              'product',
+              body='product',
+              doc=""" Given a grocery product title, this endpoint allows
+              you to detect what basic ingredient it is.
+              https://spoonacular.com/food-api/docs#classify-a-grocery-product
+              """),
+    _endpoint('classify_cuisine', 'POST', 'recipes/cuisine',
+              'ingredientList, title',
+              form='ingredientList title',
+              doc=""" Classify the recipe's cuisine.
+              https://spoonacular.com/food-api/docs#classify-cuisine
+              """),
+    _endpoint('classify_grocery_products_batch', 'POST', 'food/products/classifyBatch',
+              'products',
+              body='products',
+              doc=""" Given a set of product jsons, get back classified products.
+              https://spoonacular.com/food-api/docs#classify-grocery-products-(batch)
+              """),
+    _endpoint('convert_amounts', 'GET', 'recipes/convert',
+              'ingredientName, targetUnit, sourceAmount=None, sourceUnit=None',
+              params='ingredientName sourceAmount sourceUnit targetUnit',
+              doc=""" Convert amounts like "2 cups of flour to grams".
+              https://spoonacular.com/food-api/docs#convert-amounts
+              """),
+    _endpoint('generate_meal_plan', 'GET', 'recipes/mealplans/generate',
+              'diet=None, exclude=None, targetCalories=None, timeFrame=None',
+              params='diet exclude targetCalories timeFrame',
+              doc=""" Generate a meal plan with three meals per day (breakfast,
+              lunch, and dinner).
+              https://spoonacular.com/food-api/docs#generate-meal-plan
+              """),
+    _endpoint('guess_nutrition_by_dish_name', 'GET', 'recipes/guessNutrition',
+              'title',
+              params='title',
+              doc=""" Guess the macro nutrients of a dish given its title.
+              https://spoonacular.com/food-api/docs#guess-nutrition-by-dish-name
+              """),
+    _endpoint('map_ingredients_to_grocery_products', 'POST', 'food/ingredients/map',
+              'ingredients, servings',
+              json='ingredients servings',
+              doc=""" Map a set of ingredients to products you can buy in
+              the grocery store.
+              https://spoonacular.com/food-api/docs#map-ingredients-to-grocery-products
+              """),
+    _endpoint('match_recipes_to_daily_calories', 'GET', 'recipes/mealplans/generate',
+              'targetCalories, timeFrame',
+              params='targetCalories timeFrame',
+              doc=""" Find multiple recipes that, when added up reach your
+              daily caloric needs.
+              https://spoonacular.com/food-api/docs#match-recipes-to-daily-calories
+              """),
+    _endpoint('quick_answer', 'GET', 'recipes/quickAnswer',
+              'q',
+              params='q',
+              doc=""" Answer a nutrition related natural language question.
+              https://spoonacular.com/food-api/docs#quick-answer
+              """),
+    _endpoint('summarize_recipe', 'GET', 'recipes/{id}/summary',
+              'id',
+              doc=""" Summarize the recipe in a short text.
+              https://spoonacular.com/food-api/docs#summarize-recipe
+              """),
+    _endpoint('visualize_equipment', 'POST', 'recipes/visualizeEquipment',
+              'instructions, defaultCss=None, showBacklink=None, view=None',
+              form='defaultCss instructions showBacklink view',
+              doc=""" Visualize the equipment used to make a recipe.
+              https://spoonacular.com/food-api/docs#visualize-equipment
+              """),
+    _endpoint('visualize_ingredients', 'POST', 'recipes/visualizeIngredients',
+              'ingredientList, servings, defaultCss=None, measure=None, showBacklink=None, view=None',
+              form='defaultCss ingredientList measure servings showBacklink view',
+              doc=""" Visualize ingredients of a recipe.
+              https://spoonacular.com/food-api/docs#visualize-ingredients
+              """),
+    _endpoint('visualize_price_breakdown', 'POST', 'recipes/visualizePriceEstimator',
+              'ingredientList, servings, defaultCss=None, mode=None, showBacklink=None',
+              form='defaultCss ingredientList mode servings showBacklink',
+              doc=""" Visualize the price breakdown of a recipe.
+              https://spoonacular.com/food-api/docs#visualize-price-breakdown
+              """),
+    _endpoint('visualize_recipe_nutrition', 'POST', 'recipes/visualizeNutrition',
+              'ingredientList, servings, defaultCss=None, showBacklink=None',
+              form='defaultCss ingredientList servings showBacklink',
+              doc=""" Visualize a recipe's nutritional information.
+              https://spoonacular.com/food-api/docs#visualize-recipe-nutrition
+              """),
+    _endpoint('visualize_recipe_nutrition_by_id', 'GET', 'recipes/{id}/nutritionWidget',
+              'id, defaultCss=None',
+              params='defaultCss',
+              doc=""" Visualize a recipe's nutrition data.
+              https://spoonacular.com/food-api/docs#visualize-recipe-nutrition-by-id
+              """),
+    # --------------- SEARCH Endpoints ---------------
+    _endpoint('autocomplete_ingredient_search', 'GET', 'food/ingredients/autocomplete',
+              'query, intolerances=None, metaInformation=None, number=None',
+              params='intolerances metaInformation number query',
+              doc=""" Autocomplete a search for an ingredient.
+              https://spoonacular.com/food-api/docs#autocomplete-ingredient-search
+              """),
+    _endpoint('autocomplete_recipe_search', 'GET', 'recipes/autocomplete',
+              'query, number=None',
+              params='number query',
+              doc=""" Autocomplete a partial input to possible recipe names.
+              https://spoonacular.com/food-api/docs#autocomplete-recipe-search
+              """),
+    _endpoint('get_comparable_products', 'GET', 'food/products/upc/{upc}/comparable',
+              'upc',
+              doc=""" Find comparable products to the given one.
+              https://spoonacular.com/food-api/docs#get-comparable-products
+              """),
+    _endpoint('get_dish_pairing_for_wine', 'GET', 'food/wine/dishes',
+              'wine',
+              params='wine',
+              doc=""" Get a dish that goes well with a given wine.
+              https://spoonacular.com/food-api/docs#get-dish-pairing-for-wine
+              """),
+    _endpoint('get_ingredient_substitutes', 'GET', 'food/ingredients/substitutes',
+              'ingredientName',
+              params='ingredientName',
+              doc=""" Get ingredient substitutes by ingredient name.
+              https://spoonacular.com/food-api/docs#get-ingredient-substitutes
+              """),
+    _endpoint('get_ingredient_substitutes_by_id', 'GET', 'food/ingredients/{id}/substitutes',
+              'id',
+              doc=""" Search for substitutes for a given ingredient.
+              https://spoonacular.com/food-api/docs#get-ingredient-substitutes-by-id
+              """),
+    _endpoint('get_random_recipes', 'GET', 'recipes/random',
+              'limitLicense=None, number=None, tags=None',
+              params='limitLicense number tags',
+              doc=""" Find random (popular) recipes.
+              https://spoonacular.com/food-api/docs#get-random-recipes
+              """),
+    _endpoint('get_similar_recipes', 'GET', 'recipes/{id}/similar',
+              'id',
+              doc=""" Find recipes which are similar to the given one.
+              https://spoonacular.com/food-api/docs#get-similar-recipes
+              """),
+    _endpoint('get_wine_description', 'GET', 'food/wine/description',
+              'wine',
+              params='wine',
+              doc=""" Get the description of a certain wine, e.g. "malbec",
+              "riesling", or "merlot".
+              https://spoonacular.com/food-api/docs#get-wine-description
+              """),
+    _endpoint('get_wine_pairing', 'GET', 'food/wine/pairing',
+              'food, maxPrice=None',
+              params='food maxPrice',
+              doc=""" Find a wine that goes well with a food. Food can be
+              a dish name ("steak"), an ingredient name ("salmon"),
+              or a cuisine ("italian").
+              https://spoonacular.com/food-api/docs#get-wine-pairing
+              """),
+    _endpoint('get_wine_recommendation', 'GET', 'food/wine/recommendation',
+              'wine, maxPrice=None, minRating=None, number=None',
+              params='maxPrice minRating number wine',
+              doc=""" Get a specific wine recommendation (concrete product)
+              for a given wine, e.g. "merlot".
+              https://spoonacular.com/food-api/docs#get-wine-recommendation
+              """),
+    _endpoint('search_grocery_products_by_upc', 'GET', 'food/products/upc/{upc}',
+              'upc',
+              doc=""" Get information about a food product given its UPC.
+              https://spoonacular.com/food-api/docs#search-grocery-products-by-upc
+              """),
+    _endpoint('search_recipes_by_ingredients', 'GET', 'recipes/findByIngredients',
+              'ingredients, fillIngredients=None, limitLicense=None, number=None, ranking=None',
+              params='fillIngredients ingredients limitLicense number ranking',
+              doc=""" Find recipes that use as many of the given ingredients
+              as possible and have as little as possible missing
+              ingredients. This is a whats in your fridge API endpoint.
+              https://spoonacular.com/food-api/docs#search-recipes-by-ingredients
+              """),
+    _endpoint('search_recipes_complex', 'GET', 'recipes/complexSearch',
+              'query, **kwargs',
+              params='query **kwargs',
+              doc=""" Search through hundreds of thousands of recipes using advanced
+              filtering and ranking. NOTE: This method combines searching by
+              query, by ingredients, and by nutrients into one endpoint.
+              https://spoonacular.com/food-api/docs#Search-Recipes-Complex
+              """),
+    _endpoint('search_site_content', 'GET', 'food/site/search',
+              'query',
+              params='query',
+              doc=""" Search spoonacular's site content. You'll be able to
+              find everything that you could also find using the
+              search suggests on spoonacular.com. This is a suggest
+              API so you can send partial strings as queries.
+              https://spoonacular.com/food-api/docs#search-site-content
+              """),
+    # --------------- CHAT Endpoints ---------------
+    _endpoint('get_conversation_suggests', 'GET', 'food/converse/suggest',
+              'query, number=None',
+              params='number query',
+              doc=""" This endpoint returns suggestions for things the user
+              can say or ask the chat bot.
+              https://spoonacular.com/food-api/docs#get-conversation-suggests
+              """),
+    _endpoint('talk_to_a_chatbot', 'GET', 'food/converse',
+              'text, contextId=None',
+              params='contextId text',
+              doc=""" This endpoint can be used to have a conversation about
+              food with the spoonacular chat bot. Use the chat
+              suggests endpoint to show your user what he or she
+              can say.
+              https://spoonacular.com/food-api/docs#talk-to-a-chatbot
+              """),
+    # --------------- DATA Endpoints ---------------
+    _endpoint('get_a_random_food_joke', 'GET', 'food/jokes/random',
+              doc=""" Get a random joke that includes or is about food.
+              https://spoonacular.com/food-api/docs#get-a-random-food-joke
+              """),
+    _endpoint('get_analyzed_recipe_instructions', 'GET', 'recipes/{id}/analyzedInstructions',
+              'id, stepBreakdown=None',
+              params='stepBreakdown',
+              doc=""" Get an analyzed breakdown of a recipe's instructions.
+              Each step is enriched with the ingredients and the
+              equipment that is used.
+              https://spoonacular.com/food-api/docs#get-analyzed-recipe-instructions
+              """),
+    _endpoint('get_food_information', 'GET', 'food/ingredients/{id}/information',
+              'id, amount=None, unit=None',
+              params='amount unit',
+              doc=""" Get information about a certain food (ingredient).
+              https://spoonacular.com/food-api/docs#get-food-information
+              """),
+    _endpoint('get_product_information', 'GET', 'food/products/{id}',
+              'id',
+              doc=""" Get information about a packaged food product.
+              https://spoonacular.com/food-api/docs#get-product-information
+              """),
+    _endpoint('get_random_food_trivia', 'GET', 'food/trivia/random',
+              doc=""" Returns random food trivia.
+              https://spoonacular.com/food-api/docs#get-random-food-trivia
+              """),
+    _endpoint('get_recipe_information', 'GET', 'recipes/{id}/information',
+              'id, includeNutrition=None',
+              params='includeNutrition',
+              doc=""" Get information about a recipe.
+              https://spoonacular.com/food-api/docs#get-recipe-information
+              """),
+    _endpoint('get_recipe_information_bulk', 'GET', 'recipes/informationBulk',
+              'ids, includeNutrition=None',
+              params='ids includeNutrition',
+              doc=""" Get information about multiple recipes at once. That
+              is equivalent of calling the Get Recipe Information
+              endpoint multiple times but is faster. Note that
+              each returned recipe counts as one request.
+              https://spoonacular.com/food-api/docs#get-recipe-information-bulk
+              """),
+    # --------------- EXTRACT Endpoints ---------------
+    _endpoint('analyze_a_recipe_search_query', 'GET', 'recipes/queries/analyze',
+              'q',
+              params='q',
+              doc=""" Parse a recipe search query to find out its intention.
+              https://spoonacular.com/food-api/docs#analyze-a-recipe-search-query
+              """),
+    _endpoint('analyze_recipe_instructions', 'POST', 'recipes/analyzeInstructions',
+              'instructions',
+              form='instructions',
+              doc=""" Extract ingredients and equipment from the recipe instruction
+              steps.
+              https://spoonacular.com/food-api/docs#analyze-recipe-instructions
+              """),
+    _endpoint('detect_food_in_text', 'POST', 'food/detect',
+              'text',
+              form='text',
+              doc=""" Detect ingredients and dishes in texts.
+              https://spoonacular.com/food-api/docs#detect-food-in-text
+              """),
+    _endpoint('extract_recipe_from_website', 'GET', 'recipes/extract',
+              'url, forceExtraction=None',
+              params='forceExtraction url',
+              doc=""" Extract recipe data from a recipe blog or Web page.
+              https://spoonacular.com/food-api/docs#extract-recipe-from-website
+              """),
+    _endpoint('parse_ingredients', 'POST', 'recipes/parseIngredients',
+              'ingredientList, servings=1, includeNutrition=None',
+              form='ingredientList servings', params='includeNutrition',
+              doc=""" Extract an ingredient from plain text.
+              https://spoonacular.com/food-api/docs#parse-ingredients
+              """),
+]
+
+# Every endpoint, by method name
+ENDPOINTS = {endpoint.name: endpoint for endpoint in ENDPOINT_TABLE}
+
+_METHOD_SOURCE = '''\
+def {name}(self{signature}):
+    return self._make_request({path}, {method!r}, {name!r}, {form}, {params}, {json})
+'''
+
+
+def _path_source(template):
+    """ Splits a path template into the expression concatenating its pieces """
+    pieces = []
+    for literal, field, _, _ in string.Formatter().parse(template):
+        if literal:
+            pieces.append(repr(literal))
+        if field is not None:
+            pieces.append('str({})'.format(field))
+    return ' + '.join(pieces)
+
+
+def _fields_source(names):
+    """ The dict display of the arguments sent as `names`, or None """
+    if not names:
+        return 'None'
+    return '{{{}}}'.format(', '.join(name if name.startswith('**') else '{!r}: {}'.format(name, name)
+                                     for name in names))
+
+
+def compile_method(endpoint):
+    """ Builds the API method of an endpoint
+
+    The method is generated from source, like namedtuple's methods, so
+    it has the endpoint's real signature and passes the request's path,
+    fields and endpoint name straight to `_make_request`.
+    """
+    source = _METHOD_SOURCE.format(
+        name=endpoint.name, method=endpoint.method, path=_path_source(endpoint.path),
+        signature=', ' + endpoint.signature if endpoint.signature else '',
+        form=_fields_source(endpoint.form), params=_fields_source(endpoint.params),
+        json=endpoint.body or _fields_source(endpoint.json))
+    namespace = {}
+    exec(source, namespace)
+    method = namespace[endpoint.name]
+    method.__doc__ = endpoint.doc
+    method.endpoint = endpoint
+    return method
+
+
+def endpoint_methods(cls):
+    """ Class decorator adding a method for every endpoint in the table
+
+    Methods the class defines itself are left alone.
+    """
+    for endpoint in ENDPOINT_TABLE:
+        if endpoint.name not in cls.__dict__:
+            method = compile_method(endpoint)
+            method.__module__ = cls.__module__
+            method.__qualname__ = '{}.{}'.format(cls.__qualname__, endpoint.name)
+            setattr(cls, endpoint.name, method)
+    return cls
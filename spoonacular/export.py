@@ -0,0 +1,228 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+Streaming export of recipe searches to JSON-lines files
+"""
+
+import gzip
+import json
+import os
+import queue
+import threading
+from collections import deque
+
+from . import codec
+
+_DONE = object()
+
+
+def buffered(iterable, maxsize):
+    """ Iterates over `iterable` in a background thread, staying up to `maxsize` items ahead
+
+    The bounded queue between the two threads lets a slow consumer hold
+    back the producer instead of piling items up in memory. Exceptions
+    raised by the producer are raised by the consumer.
+    """
+    items = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((_DONE, None))
+        except Exception as e:
+            put((_DONE, e))
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+class _Output(object):
+    """ An append-only JSON-lines file that can be cut back to its last checkpoint
+
+    Compressed output is written as one gzip member per checkpoint, so
+    the file stays readable by gzip up to every checkpoint.
+    """
+
+    def __init__(self, path, size, compress):
+        mode = 'r+b' if os.path.exists(path) else 'wb'
+        self._file = open(path, mode)
+        self._file.truncate(size)
+        self._file.seek(size)
+        self._compress = compress
+        self._writer = None
+
+    def write(self, line):
+        if self._writer is None:
+            self._writer = (gzip.GzipFile(fileobj=self._file, mode='wb')
+                            if self._compress else self._file)
+        self._writer.write(line)
+
+    def checkpoint(self):
+        """ Makes everything written so far durable, returning the file's size """
+        if self._writer is not None and self._compress:
+            self._writer.close()
+        self._writer = None
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        if self._writer is not None and self._compress:
+            self._writer.close()
+        self._file.close()
+
+
+class RecipeExporter(object):
+    """ Exports every recipe matching a search to a JSON-lines file
+
+    The export is a pipeline of generators: search result pages, the
+    recipe IDs in them, `get_recipe_information_bulk` calls and the
+    output file. Bounded queues between the stages keep only a few pages
+    and chunks in memory, however large the export.
+
+    Progress is checkpointed every `checkpoint_every` search results.
+    After a crash, running the same export again cuts the output back
+    to the last checkpoint and carries on from there, so at most one
+    checkpoint's worth of recipes are fetched twice.
+
+        exporter = RecipeExporter(api, "pasta.jsonl.gz")
+        exporter.export("pasta", cuisine="italian")
+    """
+
+    def __init__(self, api, path, checkpoint_path=None, compress=None, includeNutrition=None,
+                 page_size=100, chunk_size=100, max_workers=4, queue_size=1000,
+                 checkpoint_every=500):
+        """ Recipe exporter constructor
+
+        :param api: client used for the calls (API)
+        :param path: output file, one recipe per line (str)
+        :param checkpoint_path: progress file, defaults to `path` + '.checkpoint' (str)
+        :param compress: gzip the output, defaults to True when `path` ends with .gz (bool)
+        :param includeNutrition: include nutrition data in the recipes (bool)
+        :param page_size: number of search results per request (int)
+        :param chunk_size: max number of recipes per bulk request (int)
+        :param max_workers: max number of bulk requests in flight (int)
+        :param queue_size: max number of search results queued ahead of the bulk requests (int)
+        :param checkpoint_every: number of search results between checkpoints (int)
+        """
+        self.api = api
+        self.path = path
+        self.checkpoint_path = checkpoint_path or path + '.checkpoint'
+        self.compress = path.endswith('.gz') if compress is None else compress
+        self.includeNutrition = includeNutrition
+        self.page_size = page_size
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.checkpoint_every = checkpoint_every
+
+    def load_checkpoint(self):
+        """ Returns the saved progress, or None """
+        try:
+            with open(self.checkpoint_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _save_checkpoint(self, state):
+        temp_path = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.checkpoint_path)
+
+    def export(self, query, max_results=None, offset=0, **kwargs):
+        """ Exports the search's recipes, resuming a previous run of the same export
+
+        Returns the number of recipes in the output file.
+
+        :param query: the recipe search query (str)
+        :param max_results: max number of search results to export (int)
+        :param offset: number of search results to skip (int)
+
+        Other keyword arguments are passed on to `search_recipes_complex`.
+        """
+        search = {'query': query, 'max_results': max_results, 'offset': offset, 'kwargs': kwargs}
+        state = self.load_checkpoint()
+        if state is None:
+            state = {'search': search, 'offset': offset, 'written': 0, 'size': 0, 'done': False}
+        elif state['search'] != search:
+            raise ValueError("{} holds the progress of another export: {}".format(
+                self.checkpoint_path, state['search']))
+        if state['done']:
+            return state['written']
+
+        remaining = None
+        if max_results is not None:
+            remaining = max_results - (state['offset'] - offset)
+        results = buffered(self.api.iter_search_recipes_complex(
+            query, max_results=remaining, page_size=self.page_size,
+            offset=state['offset'], **kwargs), self.queue_size)
+        # Search offset of every ID sent to the bulk stage, in order
+        offsets = deque()
+
+        def ids():
+            for position, recipe in enumerate(results, state['offset']):
+                offsets.append((recipe['id'], position))
+                yield recipe['id']
+
+        def finished(id):
+            """ Returns the offset following the search result of `id` """
+            while True:
+                id_, position = offsets.popleft()
+                if str(id_) == str(id):
+                    return position + 1
+
+        recipes = self.api.iter_recipe_information(
+            ids(), includeNutrition=self.includeNutrition,
+            chunk_size=self.chunk_size, max_workers=self.max_workers)
+        output = _Output(self.path, state['size'], self.compress)
+        try:
+            checkpointed = state['offset']
+            for recipe in recipes:
+                output.write(codec.dumps(recipe) + b'\n')
+                state['written'] += 1
+                state['offset'] = finished(recipe['id'])
+                if state['offset'] - checkpointed >= self.checkpoint_every:
+                    state['size'] = output.checkpoint()
+                    self._save_checkpoint(state)
+                    checkpointed = state['offset']
+            state['offset'] += len(offsets)  # Results the API had no recipe for
+            state['size'] = output.checkpoint()
+            state['done'] = True
+            self._save_checkpoint(state)
+        finally:
+            recipes.close()
+            results.close()
+            output.close()
+        return state['written']
@@ -0,0 +1,240 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+Spreading API calls across several API keys
+"""
+
+import math
+import threading
+import time
+
+from .quota import QUOTA_CATEGORIES, QuotaAccountant, QuotaExceededError
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+
+# Quota headers are reported and reset per category
+RESET_HEADERS = tuple('X-RateLimit-{}-Reset'.format(category) for category in QUOTA_CATEGORIES)
+
+
+def seconds_to_reset():
+    """ Returns the seconds until the daily quota resets, at midnight UTC """
+    return 86400 - time.time() % 86400
+
+
+def reset_from_headers(headers):
+    """ Reads the seconds until the quota resets from the X-RateLimit-*-Reset headers, or None """
+    resets = [float(headers[name]) for name in RESET_HEADERS if headers.get(name) is not None]
+    return max(resets) if resets else None
+
+
+class PooledKey(object):
+    """ An API key of a KeyPool, with its own quota balance and rate limiter """
+
+    def __init__(self, key, quota, rate_limiter):
+        self.key = key
+        self.quota = quota
+        self.rate_limiter = rate_limiter
+        self.throttled_until = 0.0  # Clock time a 429 response asked to wait until
+        self.exhausted = False  # Refused with a 402 despite the balance
+        self.reset_at = None  # Clock time the balance resets, once known
+        self.in_flight = 0
+        self.calls = 0
+
+    def __repr__(self):
+        return 'PooledKey(...{})'.format(self.key[-4:])
+
+
+class KeyPool(object):
+    """ Spreads API calls across several API keys
+
+    Every key has its own quota balance, learned from the
+    `X-RateLimit-*-Remaining` headers of the responses sent with it,
+    and its own rate limiter. Each call goes out with the key whose rate
+    limiter lets it through soonest, and of those with the most quota
+    left. A key throttled with a 429 response is skipped until its
+    Retry-After passes, and a key out of quota, or refused with a 402,
+    until its quota resets. The calls refused by one key are sent again
+    right away with another one, so the pool's throughput grows with
+    the number of keys.
+
+        api = API(KeyPool([key1, key2, key3]))
+    """
+
+    def __init__(self, keys, sleep_time=1.5, burst=1, category_limits=None, margin=5,
+                 wait=False, timeout=None, throttle_time=1.0, clock=time.monotonic):
+        """ Key pool constructor
+
+        :param keys: keys provided by Spoonacular (list of str)
+        :param sleep_time: minimum average time between requests with each
+            key (seconds), used to build each key's rate limiter
+        :param burst: back-to-back calls allowed with each key (int)
+        :param category_limits: each key's {category: (points per second, burst)} (dict)
+        :param margin: quota points to always leave unspent on each key (int)
+        :param wait: queue calls until a key's quota resets when every key
+            is out of quota, instead of refusing them right away (bool)
+        :param timeout: longest time a queued call waits (seconds)
+        :param throttle_time: how long a key is skipped after a 429 response
+            without a Retry-After header (seconds)
+        :param clock: monotonic time function (seconds)
+        """
+        keys = list(keys)
+        assert keys and all(keys), 'Must supply non-empty API keys.'
+        assert len(set(keys)) == len(keys), 'API keys must be distinct.'
+        rate = 1.0 / sleep_time if sleep_time else None
+        self.keys = [PooledKey(key, QuotaAccountant(margin=margin),
+                               RateLimiter(rate, burst, category_limits, clock=clock))
+                     for key in keys]
+        self.wait = wait
+        self.timeout = timeout
+        self.throttle_time = throttle_time
+        self._clock = clock
+        self._retry_after = RetryPolicy().retry_after
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def remaining(self):
+        """ Last known remaining quota of all the keys together, by category (None until known) """
+        return _total(key.quota.remaining for key in self.keys)
+
+    def available(self):
+        """ Quota that may still be spent with all the keys together, by category """
+        return _total(key.quota.available() for key in self.keys)
+
+    def stats(self):
+        """ Returns the state of each key, in pool order """
+        with self._condition:
+            now = self._clock()
+            return [{'key': repr(key), 'calls': key.calls, 'in_flight': key.in_flight,
+                     'remaining': key.quota.remaining,
+                     'state': ('exhausted' if key.exhausted else
+                               'throttled' if key.throttled_until > now else 'ready')}
+                    for key in self.keys]
+
+    def _refresh(self, key, now):
+        """ Forgets the balance of a key whose quota has reset, so it is tried again """
+        if key.reset_at is not None and now >= key.reset_at:
+            key.quota.remaining = None
+            key.exhausted = False
+            key.reset_at = None
+
+    def _pick(self, cost):
+        """ Holds `cost` on the best key that can take the call
+
+        Returns (key, seconds to wait for its rate limiter), or (None,
+        seconds until a throttled key may be used, None if none is).
+        """
+        now = self._clock()
+        best = rank = throttled = None
+        for index, key in enumerate(self.keys):
+            self._refresh(key, now)
+            if key.exhausted or not key.quota.fits(cost):
+                continue
+            if key.throttled_until > now:
+                throttled = min(throttled or math.inf, key.throttled_until - now)
+                continue
+            available = key.quota.available() or {}
+            headroom = min([available[category] for category, amount in (cost or {}).items()
+                            if amount and category in available] or [math.inf])
+            key_rank = (key.rate_limiter.delay(cost), -headroom, key.in_flight, index)
+            if rank is None or key_rank < rank:
+                best, rank = key, key_rank
+        if best is None or not best.quota.try_reserve(cost):
+            return None, throttled
+        best.in_flight += 1
+        best.calls += 1
+        return best, best.rate_limiter.reserve(cost)
+
+    def _next_reset(self):
+        now = self._clock()
+        resets = [key.reset_at - now for key in self.keys if key.reset_at is not None]
+        return max(0.0, min(resets)) if resets else None
+
+    def try_reserve(self, cost=None):
+        """ Picks a key for a call if one can take it now, without waiting
+
+        Returns (key, seconds to wait for its rate limiter), or None.
+        """
+        with self._condition:
+            key, wait = self._pick(cost)
+            return (key, wait) if key is not None else None
+
+    def reserve(self, cost=None):
+        """ Picks a key for a call, holding its quota and reserving its rate limiter capacity
+
+        Waits for throttled keys to be usable again. Raises
+        QuotaExceededError if no key has quota left for the call (after
+        waiting up to `timeout` for a quota reset when `wait` is set).
+        Returns (key, seconds to wait for its rate limiter).
+
+        :param cost: quota points used by the call, by category (dict)
+        """
+        deadline = self._clock() + self.timeout if self.timeout is not None else None
+        with self._condition:
+            while True:
+                key, wait = self._pick(cost)
+                if key is not None:
+                    return key, wait
+                if wait is None:
+                    # Every key is out of quota
+                    if not self.wait:
+                        raise QuotaExceededError(cost, self.available())
+                    wait = self._next_reset()
+                if deadline is not None:
+                    remaining = deadline - self._clock()
+                    if remaining <= 0:
+                        raise QuotaExceededError(cost, self.available())
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._condition.wait(wait)
+
+    def acquire(self, cost=None):
+        """ Blocks until a key can take the call and returns it (see `reserve`) """
+        key, wait = self.reserve(cost)
+        if wait:
+            time.sleep(wait)
+        return key
+
+    def release(self, key, cost, response=None):
+        """ Settles a call sent with `key`, updating the key from the response
+
+        Returns True if the response shows the key is throttled (429) or
+        out of quota (402), so the call may be sent again with another key.
+
+        :param key: the key returned by `reserve`
+        :param cost: the cost passed to `reserve`
+        :param response: the response, or None if the call failed
+        """
+        headers = response.headers if response is not None else None
+        key.quota.release(cost, headers)
+        status = response.status_code if response is not None else None
+        with self._condition:
+            now = self._clock()
+            key.in_flight -= 1
+            if headers is not None:
+                reset = reset_from_headers(headers)
+                if reset is None and (status == 402 or key.quota.remaining is not None):
+                    reset = seconds_to_reset()
+                if reset is not None:
+                    key.reset_at = now + reset
+            if status == 429:
+                retry_after = self._retry_after(response)
+                key.throttled_until = now + (retry_after if retry_after is not None else self.throttle_time)
+            elif status == 402:
+                key.exhausted = True
+            self._condition.notify_all()
+        return status in (402, 429)
+
+
+def _total(balances):
+    """ Sums the known balances, by category """
+    total = None
+    for balance in balances:
+        if balance is not None:
+            total = total or dict.fromkeys(QUOTA_CATEGORIES, 0)
+            for category, amount in balance.items():
+                total[category] = total.get(category, 0) + amount
+    return total
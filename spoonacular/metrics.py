@@ -0,0 +1,233 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+Per-call instrumentation: events, histograms and a Prometheus exporter
+"""
+
+import bisect
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+from .quota import QUOTA_CATEGORIES
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Timings = namedtuple('Timings', ['dns', 'connect', 'ttfb', 'total'])
+Timings.__doc__ = """ How long a call took, in seconds
+
+    :param dns: resolving the host name, if measured
+    :param connect: opening the connection (and TLS handshake), if a new one was opened
+    :param ttfb: from sending the request to receiving the response headers
+    :param total: the whole call, including rate limiting and retries
+    """
+
+CallEvent = namedtuple('CallEvent', ['endpoint', 'method', 'status', 'bytes', 'timings',
+                                     'attempts', 'cache', 'quota', 'error'])
+CallEvent.__doc__ = """ What happened during one API call
+
+    :param endpoint: endpoint method name (str)
+    :param method: HTTP method (str)
+    :param status: response status code, None if the call raised (int)
+    :param bytes: size of the response body (int)
+    :param timings: how long the call took (Timings)
+    :param attempts: number of requests sent, 0 for a cache hit or a
+        coalesced call (int)
+    :param cache: 'hit', 'miss', 'coalesced' for a call answered by an
+        identical call in flight, or None if the call wasn't cacheable (str)
+    :param quota: quota spent by the call, by category (dict)
+    :param error: name of the exception the call raised, if any (str)
+    """
+
+
+class Histogram(object):
+    """ Counts observations in cumulative buckets, Prometheus-style """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # The last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """ Estimates a quantile by interpolating within its bucket """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower  # Past the last bucket
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def cumulative(self):
+        """ Yields (upper bound, cumulative count) pairs, ending with +Inf """
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+
+class _EndpointStats(object):
+    def __init__(self, buckets):
+        self.duration = Histogram(buckets)
+        self.ttfb = Histogram(buckets)
+        self.statuses = defaultdict(int)
+        self.bytes = 0
+        self.retries = 0
+        self.cache = defaultdict(int)
+        self.quota = defaultdict(float)
+
+
+class Metrics(object):
+    """ Collects an event per API call
+
+    Events are aggregated into per-endpoint latency histograms and
+    counters (statuses, bytes, retries, cache hits and misses, quota
+    spent), and passed to every callback. Callbacks run on the calling
+    thread, so they should be quick; exceptions they raise propagate to
+    the caller.
+
+        metrics = Metrics(callbacks=[print])
+        api = API(api_key, metrics=metrics)
+        ...
+        print(metrics.to_prometheus())
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, callbacks=()):
+        """ Metrics constructor
+
+        :param buckets: upper bounds of the latency histogram buckets (seconds)
+        :param callbacks: functions called with every CallEvent (list)
+        """
+        self.buckets = tuple(buckets)
+        self.callbacks = list(callbacks)
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback):
+        """ Calls `callback(event)` for every call from now on """
+        self.callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self.callbacks.remove(callback)
+
+    def record_call(self, endpoint, method, started, response=None, error=None,
+                    attempts=1, cache=None, quota=None):
+        """ Builds the CallEvent of a finished call and records it
+
+        :param started: time.perf_counter() when the call started (float)
+        """
+        total = time.perf_counter() - started
+        timings = getattr(response, 'timings', None) or {}
+        self.record(CallEvent(
+            endpoint=endpoint, method=method,
+            status=response.status_code if response is not None else None,
+            bytes=len(response.content) if response is not None else 0,
+            timings=Timings(timings.get('dns'), timings.get('connect'), timings.get('ttfb'), total),
+            attempts=attempts, cache=cache, quota=dict(quota or {}),
+            error=type(error).__name__ if error is not None else None))
+
+    def record(self, event):
+        """ Aggregates an event and passes it to the callbacks """
+        with self._lock:
+            stats = self._endpoints.get(event.endpoint)
+            if stats is None:
+                stats = self._endpoints[event.endpoint] = _EndpointStats(self.buckets)
+            stats.duration.observe(event.timings.total)
+            if event.timings.ttfb is not None:
+                stats.ttfb.observe(event.timings.ttfb)
+            stats.statuses[event.status if event.status is not None else event.error] += 1
+            stats.bytes += event.bytes
+            stats.retries += max(0, event.attempts - 1)
+            if event.cache is not None:
+                stats.cache[event.cache] += 1
+            for category, amount in event.quota.items():
+                stats.quota[category] += amount
+        for callback in self.callbacks:
+            callback(event)
+
+    def summary(self):
+        """ Returns the aggregated numbers of every endpoint called, by endpoint name
+
+        Latency percentiles are estimated from the histogram buckets.
+        """
+        with self._lock:
+            return {endpoint: {
+                'calls': stats.duration.count,
+                'statuses': dict(stats.statuses),
+                'p50': stats.duration.quantile(0.5),
+                'p99': stats.duration.quantile(0.99),
+                'mean': stats.duration.sum / stats.duration.count,
+                'bytes': stats.bytes,
+                'retries': stats.retries,
+                'cache': dict(stats.cache),
+                'quota': dict(stats.quota),
+            } for endpoint, stats in self._endpoints.items()}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def to_prometheus(self, prefix='spoonacular'):
+        """ Renders the aggregated metrics in the Prometheus text exposition format """
+        lines = []
+
+        def header(name, kind, help):
+            lines.append('# HELP {}_{} {}'.format(prefix, name, help))
+            lines.append('# TYPE {}_{} {}'.format(prefix, name, kind))
+
+        def sample(name, labels, value):
+            labels = ','.join('{}="{}"'.format(key, str(label).replace('"', '\\"'))
+                              for key, label in labels)
+            lines.append('{}_{}{{{}}} {}'.format(prefix, name, labels, _format(value)))
+
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            for name, attribute, help in (
+                    ('call_duration_seconds', 'duration', 'Duration of API calls, including retries'),
+                    ('time_to_first_byte_seconds', 'ttfb', 'Time from sending a request to its response headers')):
+                header(name, 'histogram', help)
+                for endpoint, stats in endpoints:
+                    histogram = getattr(stats, attribute)
+                    for bound, count in histogram.cumulative():
+                        le = '+Inf' if bound == float('inf') else _format(bound)
+                        sample(name + '_bucket', [('endpoint', endpoint), ('le', le)], count)
+                    sample(name + '_sum', [('endpoint', endpoint)], histogram.sum)
+                    sample(name + '_count', [('endpoint', endpoint)], histogram.count)
+            header('calls_total', 'counter', 'API calls by response status or exception')
+            for endpoint, stats in endpoints:
+                for status, count in sorted(stats.statuses.items(), key=str):
+                    sample('calls_total', [('endpoint', endpoint), ('status', status)], count)
+            header('response_bytes_total', 'counter', 'Size of the response bodies')
+            for endpoint, stats in endpoints:
+                sample('response_bytes_total', [('endpoint', endpoint)], stats.bytes)
+            header('retries_total', 'counter', 'Requests sent again after a failure')
+            for endpoint, stats in endpoints:
+                sample('retries_total', [('endpoint', endpoint)], stats.retries)
+            header('cache_lookups_total', 'counter', 'Cache lookups by result')
+            for endpoint, stats in endpoints:
+                for result, count in sorted(stats.cache.items()):
+                    sample('cache_lookups_total', [('endpoint', endpoint), ('result', result)], count)
+            header('quota_spent_total', 'counter', 'Quota points spent, by category')
+            for endpoint, stats in endpoints:
+                for category in QUOTA_CATEGORIES:
+                    if category in stats.quota:
+                        sample('quota_spent_total', [('endpoint', endpoint), ('category', category)],
+                               stats.quota[category])
+        return '\n'.join(lines) + '\n'
+
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
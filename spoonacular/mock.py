@@ -0,0 +1,553 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+A local stand-in for the Spoonacular API, for offline tests and benchmarks
+
+    with MockSpoonacular(latency=0.05, rate_limit_rate=0.01) as server:
+        api = API("any-key")
+        api.api_root = server.url
+
+Or from a shell: `python -m spoonacular.mock --port 8080 --latency 0.05`
+"""
+
+import argparse
+import json
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlsplit
+
+from .endpoints import COST_FUNCTIONS
+from .quota import QUOTA_CATEGORIES
+
+# The free plan's daily quota
+DEFAULT_LIMITS = {'requests': 150, 'tinyrequests': 1500, 'results': 1500}
+
+TITLES = ['Pasta with Garlic, Scallions, Cauliflower & Breadcrumbs', 'Red Lentil Soup with Chicken',
+          'Asparagus and Pea Soup', 'Garlicky Kale', 'Slow Cooker Beef Stew',
+          'Chocolate Chip Cookies', 'Thai Basil Chicken', 'Mushroom Risotto']
+INGREDIENTS = [(1001, 'butter', 1.0, 'tbsp', 'Milk, Eggs, Other Dairy'),
+               (10011135, 'cauliflower florets', 2.0, 'cups', 'Produce'),
+               (1102047, 'salt and pepper', 4.0, 'servings', 'Spices and Seasonings'),
+               (11215, 'garlic', 5.0, 'cloves', 'Produce'),
+               (20420, 'pasta', 6.0, 'ounces', 'Pasta and Rice'),
+               (11291, 'scallions', 3.0, '', 'Produce'),
+               (4053, 'olive oil', 2.0, 'tbsp', 'Oil, Vinegar, Salad Dressing')]
+NUTRIENTS = [('Calories', 584.46, 'kcal'), ('Fat', 19.79, 'g'), ('Saturated Fat', 3.76, 'g'),
+             ('Carbohydrates', 83.84, 'g'), ('Sugar', 4.01, 'g'), ('Cholesterol', 0.0, 'mg'),
+             ('Sodium', 660.96, 'mg'), ('Protein', 19.23, 'g'), ('Fiber', 6.75, 'g'),
+             ('Vitamin C', 55.72, 'mg'), ('Iron', 3.03, 'mg'), ('Calcium', 83.21, 'mg')]
+
+
+def _nutrition():
+    return {'nutrients': [{'name': name, 'amount': amount, 'unit': unit,
+                           'percentOfDailyNeeds': round(amount / 20, 2)}
+                          for name, amount, unit in NUTRIENTS],
+            'caloricBreakdown': {'percentProtein': 13.08, 'percentFat': 30.29, 'percentCarbs': 56.63},
+            'weightPerServing': {'amount': 280, 'unit': 'g'}}
+
+
+def _ingredient(index, original=None, nutrition=False):
+    id, name, amount, unit, aisle = INGREDIENTS[index % len(INGREDIENTS)]
+    ingredient = {'id': id, 'name': name, 'amount': amount, 'unit': unit, 'aisle': aisle,
+                  'image': '{}.jpg'.format(name.replace(' ', '-')), 'consistency': 'solid',
+                  'meta': [], 'original': original or '{} {} {}'.format(amount, unit, name)}
+    if nutrition:
+        ingredient['nutrition'] = _nutrition()
+    return ingredient
+
+
+def _summary(id):
+    return {'id': id, 'title': TITLES[id % len(TITLES)], 'image':
+            'https://spoonacular.com/recipeImages/{}-312x231.jpg'.format(id), 'imageType': 'jpg'}
+
+
+def _recipe(id, nutrition=False):
+    recipe = dict(_summary(id), servings=2 + id % 4, readyInMinutes=15 + id % 60,
+                  sourceUrl='https://example.com/recipes/{}'.format(id),
+                  vegetarian=id % 3 == 0, vegan=id % 6 == 0, glutenFree=id % 4 == 0,
+                  dairyFree=id % 5 == 0, pricePerServing=163.15, healthScore=19 + id % 80,
+                  cuisines=['Italian'] if id % 2 else [], diets=['lacto ovo vegetarian'],
+                  dishTypes=['lunch', 'main course', 'dinner'],
+                  summary='A <b>delicious</b> recipe that serves <b>{}</b>.'.format(2 + id % 4),
+                  instructions='Cook the pasta. Add the garlic. Serve.',
+                  extendedIngredients=[_ingredient(id + i) for i in range(5 + id % 3)])
+    if nutrition:
+        recipe['nutrition'] = _nutrition()
+    return recipe
+
+
+def _truthy(value):
+    return value is not None and value.lower() == 'true'
+
+
+def _param(request, name, default=None):
+    values = request['params'].get(name) or request['form'].get(name)
+    return values[0] if values else default
+
+
+def _number(request, default=10):
+    return int(_param(request, 'number', default))
+
+
+def _html(title):
+    return '<div class="spoonacular-widget"><h3>{}</h3></div>'.format(title)
+
+
+def _complex_search(request):
+    offset, number = int(_param(request, 'offset', 0)), _number(request)
+    total = request['server'].total_results
+    ids = range(offset, max(offset, min(offset + number, total)))
+    return {'results': [_summary(id) for id in ids], 'offset': offset,
+            'number': number, 'totalResults': total}
+
+
+def _information_bulk(request):
+    nutrition = _truthy(_param(request, 'includeNutrition'))
+    return [_recipe(int(id), nutrition) for id in _param(request, 'ids', '').split(',') if id]
+
+
+def _parse_ingredients(request):
+    nutrition = _truthy(_param(request, 'includeNutrition'))
+    lines = [line for line in _param(request, 'ingredientList', '').split('\n') if line.strip()]
+    return [_ingredient(i, line.strip(), nutrition) for i, line in enumerate(lines)]
+
+
+def _classify(product):
+    title = product.get('title', '')
+    return {'cleanTitle': title, 'image': 'https://spoonacular.com/cdn/ingredients_100x100/milk.png',
+            'category': 'milk', 'breadcrumbs': ['milk', 'dairy'], 'usdaCode': 1077}
+
+
+def _lines(value):
+    """ Returns the non-empty lines of a newline separated string or of a list """
+    if isinstance(value, str):
+        value = value.split('\n')
+    return [line for line in value or [] if isinstance(line, str) and line.strip()]
+
+
+def _map_ingredients(request):
+    lines = _lines((request['json'] or {}).get('ingredients'))
+    return [{'original': line, 'originalName': line, 'ingredientImage': 'milk.png', 'meta': [],
+             'products': [{'id': 209939 + i, 'title': 'Kroger {}'.format(line), 'upc': '011110000000'}]}
+            for i, line in enumerate(lines)]
+
+
+def _product(id):
+    return {'id': id, 'title': 'Kroger Vitamin A & D Reduced Fat 2% Milk', 'upc': '011110038364',
+            'price': 299, 'aisle': 'Milk, Eggs, Other Dairy', 'badges': ['kosher', 'gluten_free'],
+            'breadcrumbs': ['milk', 'dairy'], 'ingredientList': 'Reduced Fat Milk, Vitamin A Palmitate',
+            'nutrition': _nutrition()}
+
+
+def _wine(index):
+    return {'id': 428278 + index, 'title': 'Merlot {}'.format(2015 + index),
+            'description': 'Ripe plum and black cherry.', 'price': '$17.99',
+            'imageUrl': 'https://spoonacular.com/productImages/428278-312x231.jpg',
+            'averageRating': 0.9, 'ratingCount': 11, 'score': 0.87,
+            'link': 'https://www.amazon.com/dp/B00C5ROFX4'}
+
+
+def _meal_plan(request):
+    return {'meals': [dict(_summary(id), readyInMinutes=30, servings=2) for id in (655219, 649931, 632583)],
+            'nutrients': {'calories': 2000.0, 'protein': 80.1, 'fat': 70.2, 'carbohydrates': 250.3}}
+
+
+# Method, path template, endpoint name and fixture of every path the client calls
+ROUTES = [
+    ('POST', 'food/products/classify', 'classify_a_grocery_product',
+     lambda request: _classify(request['json'] or {})),
+    ('POST', 'food/products/classifyBatch', 'classify_grocery_products_batch',
+     lambda request: [_classify(product) for product in request['json'] or []]),
+    ('POST', 'recipes/cuisine', 'classify_cuisine',
+     lambda request: {'cuisine': 'Mediterranean', 'cuisines': ['Mediterranean', 'Italian'],
+                      'confidence': 0.85}),
+    ('GET', 'recipes/convert', 'convert_amounts',
+     lambda request: {'sourceAmount': float(_param(request, 'sourceAmount', 2.5)),
+                      'sourceUnit': _param(request, 'sourceUnit', 'cups'), 'targetAmount': 312.5,
+                      'targetUnit': _param(request, 'targetUnit'), 'answer': '2.5 cups flour = 312.5 grams'}),
+    ('GET', 'recipes/mealplans/generate', 'generate_meal_plan', _meal_plan),
+    ('GET', 'recipes/guessNutrition', 'guess_nutrition_by_dish_name',
+     lambda request: {name: {'value': amount, 'unit': unit, 'confidenceRange95Percent':
+                             {'min': amount * 0.9, 'max': amount * 1.1}, 'standardDeviation': 10.0}
+                      for name, amount, unit in (('calories', 584.0, 'calories'), ('fat', 19.8, 'g'),
+                                                 ('protein', 19.2, 'g'), ('carbs', 83.8, 'g'))}),
+    ('POST', 'food/ingredients/map', 'map_ingredients_to_grocery_products', _map_ingredients),
+    ('GET', 'recipes/quickAnswer', 'quick_answer',
+     lambda request: {'answer': 'There are 173 calories in 2 carrots.', 'type': 'NUTRITION',
+                      'image': 'https://spoonacular.com/cdn/ingredients_100x100/carrots.jpg'}),
+    ('GET', 'recipes/{id}/summary', 'summarize_recipe',
+     lambda request: {'id': int(request['args']['id']), 'title': TITLES[0],
+                      'summary': 'A <b>vegetarian</b> recipe with <b>584 calories</b>.'}),
+    ('POST', 'recipes/visualizeEquipment', 'visualize_equipment', lambda request: _html('Equipment')),
+    ('POST', 'recipes/visualizeIngredients', 'visualize_ingredients', lambda request: _html('Ingredients')),
+    ('POST', 'recipes/visualizePriceEstimator', 'visualize_price_breakdown',
+     lambda request: _html('Price Breakdown')),
+    ('POST', 'recipes/visualizeNutrition', 'visualize_recipe_nutrition', lambda request: _html('Nutrition')),
+    ('GET', 'recipes/{id}/nutritionWidget', 'visualize_recipe_nutrition_by_id',
+     lambda request: _html('Nutrition')),
+    ('GET', 'food/ingredients/autocomplete', 'autocomplete_ingredient_search',
+     lambda request: [{'name': '{} {}'.format(_param(request, 'query', ''), i), 'image': 'apple.jpg'}
+                      for i in range(_number(request))]),
+    ('GET', 'recipes/autocomplete', 'autocomplete_recipe_search',
+     lambda request: [{'id': 600000 + i, 'title': '{} {}'.format(_param(request, 'query', ''), i)}
+                      for i in range(_number(request))]),
+    ('GET', 'food/products/upc/{upc}/comparable', 'get_comparable_products',
+     lambda request: {'comparableProducts': {'calories': [], 'likes': [], 'price': [
+         {'difference': -0.51, 'id': 209939, 'image': 'https://spoonacular.com/productImages/209939.jpg',
+          'title': 'Kroger 2% Milk', 'upc': '011110038364'}], 'protein': [], 'spoonacular_score': [],
+         'sugar': []}}),
+    ('GET', 'food/wine/dishes', 'get_dish_pairing_for_wine',
+     lambda request: {'pairings': ['tuna', 'salmon', 'lasagna'],
+                      'text': 'Merlot is a dry red wine which goes well with tuna and lasagna.'}),
+    ('GET', 'food/ingredients/substitutes', 'get_ingredient_substitutes',
+     lambda request: {'ingredient': _param(request, 'ingredientName'), 'status': 'success',
+                      'substitutes': ['1 cup = 7/8 cup shortening and 1/2 tsp salt'],
+                      'message': 'Found 1 substitutes for the ingredient.'}),
+    ('GET', 'food/ingredients/{id}/substitutes', 'get_ingredient_substitutes_by_id',
+     lambda request: {'ingredient': 'butter', 'status': 'success',
+                      'substitutes': ['1 cup = 7/8 cup shortening and 1/2 tsp salt'],
+                      'message': 'Found 1 substitutes for the ingredient.'}),
+    ('GET', 'recipes/random', 'get_random_recipes',
+     lambda request: {'recipes': [_recipe(random.randint(1, 10**6)) for _ in range(_number(request, 1))]}),
+    ('GET', 'recipes/{id}/similar', 'get_similar_recipes',
+     lambda request: [dict(_summary(int(request['args']['id']) + i), readyInMinutes=45, servings=2)
+                      for i in range(1, 4)]),
+    ('GET', 'food/wine/description', 'get_wine_description',
+     lambda request: {'wineDescription': 'Merlot is a dry red wine with soft tannins.'}),
+    ('GET', 'food/wine/pairing', 'get_wine_pairing',
+     lambda request: {'pairedWines': ['merlot', 'cabernet sauvignon', 'pinot noir'],
+                      'pairingText': 'Merlot, Cabernet Sauvignon, and Pinot Noir are great choices.',
+                      'productMatches': [_wine(0)]}),
+    ('GET', 'food/wine/recommendation', 'get_wine_recommendation',
+     lambda request: {'recommendedWines': [_wine(i) for i in range(_number(request))],
+                      'totalFound': 24}),
+    ('GET', 'food/products/upc/{upc}', 'search_grocery_products_by_upc',
+     lambda request: dict(_product(30004), upc=request['args']['upc'])),
+    ('GET', 'recipes/findByIngredients', 'search_recipes_by_ingredients',
+     lambda request: [dict(_summary(640000 + i), usedIngredientCount=2, missedIngredientCount=1,
+                           likes=1, usedIngredients=[], missedIngredients=[], unusedIngredients=[])
+                      for i in range(_number(request))]),
+    ('GET', 'recipes/complexSearch', 'search_recipes_complex', _complex_search),
+    ('GET', 'food/site/search', 'search_site_content',
+     lambda request: {'Articles': [], 'Grocery Products': [], 'Menu Items': [],
+                      'Recipes': [{'dataPoints': [], 'image': 'https://spoonacular.com/recipeImages/1.jpg',
+                                   'link': 'https://spoonacular.com/recipes/1', 'name': TITLES[0]}]}),
+    ('GET', 'food/converse/suggest', 'get_conversation_suggests',
+     lambda request: {'suggests': {'_': [{'name': 'chicken recipes'} for _ in range(_number(request, 5))]},
+                      'words': ['chicken']}),
+    ('GET', 'food/converse', 'talk_to_a_chatbot',
+     lambda request: {'answerText': "Here are some recipes you'll like.", 'media': []}),
+    ('GET', 'food/jokes/random', 'get_a_random_food_joke',
+     lambda request: {'text': "Any salad can be a Caesar salad if you stab it enough."}),
+    ('GET', 'recipes/{id}/analyzedInstructions', 'get_analyzed_recipe_instructions',
+     lambda request: [{'name': '', 'steps': [
+         {'number': 1, 'step': 'Cook the pasta.', 'ingredients': [], 'equipment': []},
+         {'number': 2, 'step': 'Add the garlic.', 'ingredients': [], 'equipment': []}]}]),
+    ('GET', 'food/ingredients/{id}/information', 'get_food_information',
+     lambda request: dict(_ingredient(int(request['args']['id'])), id=int(request['args']['id']),
+                          possibleUnits=['g', 'oz', 'cup'], estimatedCost={'value': 18.22, 'unit': 'US Cents'},
+                          nutrition=_nutrition())),
+    ('GET', 'food/products/{id}', 'get_product_information',
+     lambda request: _product(int(request['args']['id']))),
+    ('GET', 'food/trivia/random', 'get_random_food_trivia',
+     lambda request: {'text': 'Carrots were originally purple.'}),
+    ('GET', 'recipes/{id}/information', 'get_recipe_information',
+     lambda request: _recipe(int(request['args']['id']), _truthy(_param(request, 'includeNutrition')))),
+    ('GET', 'recipes/informationBulk', 'get_recipe_information_bulk', _information_bulk),
+    ('GET', 'recipes/queries/analyze', 'analyze_a_recipe_search_query',
+     lambda request: {'cuisines': [], 'dishes': [{'name': 'burger'}], 'ingredients': [], 'modifiers': []}),
+    ('POST', 'recipes/analyzeInstructions', 'analyze_recipe_instructions',
+     lambda request: {'parsedInstructions': [{'name': '', 'steps': [{'number': 1, 'step': 'Put the garlic '
+                      'in a pan.'}]}], 'ingredients': [_ingredient(3)], 'equipment': []}),
+    ('POST', 'food/detect', 'detect_food_in_text',
+     lambda request: {'annotations': [{'annotation': 'cheeseburger', 'tag': 'dish'}]}),
+    ('GET', 'recipes/extract', 'extract_recipe_from_website',
+     lambda request: dict(_recipe(1), sourceUrl=_param(request, 'url'))),
+    ('POST', 'recipes/parseIngredients', 'parse_ingredients', _parse_ingredients),
+]
+
+
+def _compile(template):
+    pattern = re.sub(r'\\{(\w+)\\}', r'(?P<\1>[^/]+)', re.escape(template))
+    return re.compile('^/{}$'.format(pattern))
+
+
+# Static paths are matched before templated ones, so recipes/informationBulk
+# isn't taken for recipes/{id}/information and food/products/classify for
+# food/products/{id}
+_ROUTES = sorted([(method, _compile(template), name, fixture)
+                  for method, template, name, fixture in ROUTES],
+                 key=lambda route: route[1].groups)
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 256
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.connections = set()
+        self.connections_opened = 0
+
+    def process_request(self, request, client_address):
+        self.connections.add(request)
+        self.connections_opened += 1
+        super().process_request(request, client_address)
+
+    def shutdown_request(self, request):
+        self.connections.discard(request)
+        super().shutdown_request(request)
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)  # Dropped connections are expected
+
+    def server_close(self):
+        """ Also drops kept-alive connections, so clients don't reuse them """
+        super().server_close()
+        for connection in list(self.connections):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class MockSpoonacular(object):
+    """ Serves fixture responses for every path of the Spoonacular API
+
+    Each call spends its endpoint's quota cost from a daily balance
+    reported in X-RateLimit-*-Limit/Remaining headers, and is refused
+    with a 402 once the balance runs out; with `per_key`, each API key
+    has a balance of its own, in `balances`. Latency, rate limiting (429)
+    and server errors (5xx) can be injected at random or one at a time
+    with `fail_next`. `responders` maps a path to a function building
+    the JSON payload from the request record, replacing the fixture.
+    Every request is recorded in `requests`.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, limits=None,
+                 remaining=None, rate_limit_rate=0.0, error_rate=0.0, retry_after=1,
+                 responders=None, total_results=5000, seed=None, per_key=False):
+        """ Mock server constructor
+
+        :param host: interface to listen on (str)
+        :param port: port to listen on, 0 for any free port (int)
+        :param latency: time taken by every response (seconds)
+        :param jitter: random extra time taken by every response, up to (seconds)
+        :param limits: daily quota, by category (dict)
+        :param remaining: quota left at start, by category, defaults to `limits` (dict)
+        :param rate_limit_rate: share of calls answered with a 429 (float)
+        :param error_rate: share of calls answered with a 500, 502 or 503 (float)
+        :param retry_after: Retry-After header of the 429 responses (seconds)
+        :param responders: payload functions by path, replacing the fixtures (dict)
+        :param total_results: number of results of every recipe search (int)
+        :param seed: seed of the injected failures and jitter (int)
+        :param per_key: keep a separate balance for each API key, each
+            starting at `remaining` (bool)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.remaining = dict(self.limits, **(remaining or {}))
+        self.per_key = per_key
+        self.balances = {}
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.responders = responders or {}
+        self.total_results = total_results
+        self.requests = []
+        self.failures = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def connections_opened(self):
+        return self._server.connections_opened
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}/'.format(host, port)
+
+    def start(self):
+        """ Starts serving in a background thread """
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """ Stops serving and drops open connections """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def fail_next(self, status, count=1, headers=None):
+        """ Answers the next `count` requests with an error status """
+        with self._lock:
+            self.failures.extend([(status, headers or {})] * count)
+
+    def route(self, path):
+        """ Returns the endpoint name, fixture and path arguments of a path """
+        for method, pattern, name, fixture in _ROUTES:
+            match = pattern.match(path)
+            if match is not None:
+                return name, fixture, match.groupdict()
+        return None, None, {}
+
+    def cost(self, endpoint, request):
+        """ Returns the quota cost of a call, by category """
+        cost = COST_FUNCTIONS.get(endpoint)
+        if cost is None:
+            return {'requests': 1}
+        single = lambda fields: {key: values[0] for key, values in fields.items()}  # noqa: E731
+        return cost(single(request['form']), single(request['params']), request['json'])
+
+    def payload(self, request, fixture):
+        """ Returns the JSON payload (or HTML page, for a str) answering a request,
+            or None for unknown paths
+        """
+        responder = self.responders.get(request['path'])
+        if responder is not None:
+            return responder(request)
+        if fixture is None:
+            return None
+        return fixture(request)
+
+    def _failure(self):
+        """ Returns an injected (status, headers), or None """
+        if self.failures:
+            return self.failures.pop(0)
+        if self.rate_limit_rate and self._random.random() < self.rate_limit_rate:
+            return 429, {'Retry-After': str(self.retry_after)}
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self._random.choice((500, 502, 503)), {}
+        return None
+
+    def _quota_headers(self, remaining):
+        headers = {}
+        for category in QUOTA_CATEGORIES:
+            headers['X-RateLimit-{}-Limit'.format(category)] = str(self.limits[category])
+            headers['X-RateLimit-{}-Remaining'.format(category)] = str(max(0, remaining[category]))
+        headers['X-RateLimit-requests-Reset'] = str(int(86400 - time.time() % 86400))
+        return headers
+
+    def _handle(self, command, target, content_type, body):
+        """ Answers a request, returning (status, headers, payload) """
+        url = urlsplit(target)
+        endpoint, fixture, args = self.route(url.path)
+        request = {'method': command, 'path': url.path, 'params': parse_qs(url.query),
+                   'body': body, 'args': args, 'endpoint': endpoint, 'server': self,
+                   'form': parse_qs(body) if 'form-urlencoded' in content_type else {},
+                   'json': json.loads(body) if 'json' in content_type and body else None}
+        cost = self.cost(endpoint, request)
+        with self._lock:
+            self.requests.append(request)
+            balance = self.remaining
+            if self.per_key:
+                key = request['params'].get('apiKey', [None])[0]
+                balance = self.balances.setdefault(key, dict(self.remaining))
+            failure = self._failure()
+            if failure is None and any(balance.get(category, 0) < amount
+                                       for category, amount in cost.items() if amount):
+                failure = 402, {}
+            if failure is None:
+                for category, amount in cost.items():
+                    balance[category] = balance.get(category, 0) - amount
+            remaining = dict(balance)
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if failure is not None:
+            status, headers = failure
+            payload = {'status': 'failure', 'code': status,
+                       'message': 'Your daily points limit has been reached.' if status == 402
+                       else 'The request failed.'}
+        else:
+            status, headers = 200, {}
+            payload = self.payload(request, fixture)
+            if payload is None:
+                status, payload = 404, {'status': 'failure', 'code': 404, 'message': 'Not found'}
+        return status, dict(self._quota_headers(remaining), **headers), payload
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode() if length else ''
+                try:
+                    status, headers, payload = server._handle(
+                        self.command, self.path, self.headers.get('Content-Type', ''), body)
+                except Exception as e:
+                    status, headers = 500, {}
+                    payload = {'status': 'failure', 'code': 500,
+                               'message': '{}: {}'.format(type(e).__name__, e)}
+                if isinstance(payload, str):
+                    content, content_type = payload.encode(), 'text/html;charset=utf-8'
+                else:
+                    content, content_type = json.dumps(payload).encode(), 'application/json'
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = _respond
+            do_POST = _respond
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds per response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="random extra seconds per response")
+    parser.add_argument('--requests', type=int, default=10**9, help="daily 'requests' quota")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="share of 429 responses")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of 5xx responses")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--per-key', action='store_true', help="separate quota for each API key")
+    args = parser.parse_args()
+    server = MockSpoonacular(host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+                             limits={'requests': args.requests, 'tinyrequests': args.requests,
+                                     'results': args.requests},
+                             rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate,
+                             seed=args.seed, per_key=args.per_key)
+    print(server.url, flush=True)
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
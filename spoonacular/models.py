@@ -0,0 +1,210 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+Typed, lazily decoded wrappers around Spoonacular API responses
+"""
+
+from . import codec
+
+
+class Field(object):
+    """ A model attribute read from a key of the model's JSON data
+
+    Fields with a `model` wrap their value (or, with `many`, each item
+    of their value) in that model the first time they are read. The
+    wrapped value is kept, so later reads cost nothing.
+    """
+
+    __slots__ = ('key', 'model', 'many', 'name')
+
+    def __init__(self, key=None, model=None, many=False):
+        """ Field constructor
+
+        :param key: JSON key of the field, defaults to the attribute name (str)
+        :param model: model wrapping the field's value (Model subclass)
+        :param many: the value is a list of `model` items (bool)
+        """
+        self.key = key
+        self.model = model
+        self.many = many
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        if self.key is None:
+            self.key = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        if self.model is None:
+            return instance.data.get(self.key)
+        nested = instance._nested
+        if nested is None:
+            nested = instance._nested = {}
+        elif self.name in nested:
+            return nested[self.name]
+        value = instance.data.get(self.key)
+        if value is not None:
+            value = [self.model(item) for item in value] if self.many else self.model(value)
+        nested[self.name] = value
+        return value
+
+
+class Model(object):
+    """ Base class of the typed response objects
+
+    A model is built either from decoded JSON data or from a response's
+    raw body, which is only decoded the first time a field is read.
+    Nested objects are wrapped on first access. Keys without a declared
+    field are still available with `model['key']` and `model.get(key)`.
+    """
+
+    __slots__ = ('_data', '_raw', '_nested')
+
+    def __init__(self, data=None, raw=None):
+        """ Model constructor
+
+        :param data: decoded JSON object (dict)
+        :param raw: the object's JSON encoding, decoded on first use (bytes)
+        """
+        if data is None and raw is None:
+            raise ValueError("A model needs either its data or its raw JSON body")
+        self._data = data
+        self._raw = raw
+        self._nested = None
+
+    @classmethod
+    def from_response(cls, response):
+        """ Wraps a response holding one object, without decoding it yet """
+        response.raise_for_status()
+        return cls(raw=response.content)
+
+    @classmethod
+    def from_response_list(cls, response):
+        """ Wraps each object of a response holding a list of them """
+        response.raise_for_status()
+        return [cls(item) for item in codec.loads(response.content)]
+
+    @property
+    def data(self):
+        """ The decoded JSON object (dict) """
+        if self._data is None:
+            self._data = codec.loads(self._raw)
+        return self._data
+
+    @property
+    def raw(self):
+        """ The object's JSON encoding, as received when available (bytes) """
+        if self._raw is None:
+            self._raw = codec.dumps(self._data)
+        return self._raw
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.data == other.data
+
+    __hash__ = None
+
+    def __repr__(self):
+        for name in ('id', 'title', 'name'):
+            value = self.data.get(name)
+            if value is not None:
+                return '<{} {}={!r}>'.format(type(self).__name__, name, value)
+        return '<{}>'.format(type(self).__name__)
+
+
+class Nutrient(Model):
+    __slots__ = ()
+    name = Field()
+    amount = Field()
+    unit = Field()
+    percent_of_daily_needs = Field('percentOfDailyNeeds')
+
+
+class Nutrition(Model):
+    __slots__ = ()
+    nutrients = Field(model=Nutrient, many=True)
+    caloric_breakdown = Field('caloricBreakdown')
+    weight_per_serving = Field('weightPerServing')
+
+
+class Ingredient(Model):
+    __slots__ = ()
+    id = Field()
+    name = Field()
+    original = Field()
+    amount = Field()
+    unit = Field()
+    aisle = Field()
+    image = Field()
+    consistency = Field()
+    meta = Field()
+    nutrition = Field(model=Nutrition)
+
+
+class Recipe(Model):
+    __slots__ = ()
+    id = Field()
+    title = Field()
+    image = Field()
+    servings = Field()
+    ready_in_minutes = Field('readyInMinutes')
+    source_url = Field('sourceUrl')
+    summary = Field()
+    instructions = Field()
+    cuisines = Field()
+    diets = Field()
+    dish_types = Field('dishTypes')
+    vegetarian = Field()
+    vegan = Field()
+    gluten_free = Field('glutenFree')
+    dairy_free = Field('dairyFree')
+    price_per_serving = Field('pricePerServing')
+    health_score = Field('healthScore')
+    extended_ingredients = Field('extendedIngredients', model=Ingredient, many=True)
+    nutrition = Field(model=Nutrition)
+
+
+class Product(Model):
+    __slots__ = ()
+    id = Field()
+    title = Field()
+    upc = Field()
+    image = Field()
+    price = Field()
+    aisle = Field()
+    badges = Field()
+    breadcrumbs = Field()
+    ingredient_list = Field('ingredientList')
+    nutrition = Field(model=Nutrition)
+
+
+class WineProduct(Model):
+    __slots__ = ()
+    id = Field()
+    title = Field()
+    description = Field()
+    price = Field()
+    image_url = Field('imageUrl')
+    average_rating = Field('averageRating')
+    rating_count = Field('ratingCount')
+    score = Field()
+    link = Field()
+
+
+class WinePairing(Model):
+    __slots__ = ()
+    paired_wines = Field('pairedWines')
+    pairing_text = Field('pairingText')
+    product_matches = Field('productMatches', model=WineProduct, many=True)
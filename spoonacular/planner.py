@@ -0,0 +1,237 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+Quota cost estimates and schedules for large batches of planned calls
+"""
+
+import bisect
+import itertools
+import math
+from collections import namedtuple
+
+from .endpoint_quotas import endpoint_quotas
+from .endpoints import ENDPOINTS, QUALIFIER_UNITS, cost_function
+from .quota import QUOTA_CATEGORIES
+
+# Slack allowed when comparing summed float costs against a budget
+_EPSILON = 1e-9
+
+Schedule = namedtuple('Schedule', ['days', 'costs', 'unschedulable'])
+Schedule.__doc__ = """ Planned calls split into days that each fit the quota
+
+    :param days: indices of the calls to send each day, in queue order (list of lists)
+    :param costs: quota spent each day, by category (list of dicts)
+    :param unschedulable: indices of the calls costing more than a whole
+        day's quota, which can never be sent (list)
+    """
+
+
+def _load_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _unit_reader(name, scaled):
+    """ Compiles the function returning a call's units, by category, from its keyword arguments
+
+    Arguments are named after the fields they are sent as, so the
+    keyword arguments stand in for the form fields, params and JSON
+    object the unit counts read from; only a whole-body argument has to
+    be looked up.
+    """
+    endpoint = ENDPOINTS.get(name)
+    body = endpoint.body if endpoint is not None else None
+
+    def units(kwargs):
+        json = kwargs.get(body) if body is not None else kwargs
+        units = [1] * len(QUOTA_CATEGORIES)
+        for i, count in scaled:
+            units[i] = count(kwargs, kwargs, json)
+        return units
+    return units
+
+
+class CostModel(object):
+    """ Estimates the quota cost of many planned calls at once
+
+    With NumPy, the quota rules are compiled once into a table of
+    amounts by endpoint and category. Each planned call is reduced to
+    its endpoint's row and the number of units (recipes, results,
+    ingredients...) it is charged for, and the costs of a whole batch
+    are computed as arrays. Without NumPy, arrays don't pay off, so
+    each call is priced by its endpoint's cost function, as
+    `API.determineCostOfEndpoint` does, minus the per-call lookups.
+
+        model = CostModel()
+        calls = [('get_recipe_information_bulk', {'ids': chunk}) for chunk in chunks]
+        print(model.total(calls))
+        schedule = model.schedule(calls, limits={'requests': 150, 'tinyrequests': 1500,
+                                                 'results': 1500},
+                                  remaining=api.quota.available())
+    """
+
+    def __init__(self, quotas=None, use_numpy=None):
+        """ Cost model constructor
+
+        :param quotas: quota rules by endpoint name, defaults to `endpoint_quotas` (dict)
+        :param use_numpy: compute with NumPy arrays, defaults to True when
+            NumPy is installed (bool)
+        """
+        quotas = endpoint_quotas if quotas is None else quotas
+        self.names = sorted(quotas)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        amounts = [[quotas[name][category]['amount'] for category in QUOTA_CATEGORIES]
+                   for name in self.names]
+        # Categories charged per unit, with the function counting the units
+        self._readers = []
+        for name in self.names:
+            scaled = tuple((i, QUALIFIER_UNITS[quotas[name][category]['qualifier']])
+                           for i, category in enumerate(QUOTA_CATEGORIES)
+                           if quotas[name][category]['qualifier'] in QUALIFIER_UNITS)
+            self._readers.append(_unit_reader(name, scaled) if scaled else None)
+        self._functions = [cost_function(quotas[name]) for name in self.names]
+        self._bodies = [ENDPOINTS[name].body if name in ENDPOINTS else None for name in self.names]
+        self.numpy = _load_numpy() if use_numpy is not False else None
+        if use_numpy and self.numpy is None:
+            raise ImportError("use_numpy=True requires NumPy")
+        self.amounts = self.numpy.array(amounts, dtype=float) if self.numpy is not None else amounts
+
+    def _row(self, name):
+        try:
+            return self.index[name]
+        except KeyError:
+            raise ValueError("No quota rule for endpoint {!r}".format(name))
+
+    def units(self, name, kwargs=None):
+        """ Returns the number of units a call is charged for, by category
+
+        Categories charged a flat amount per call count one unit.
+        """
+        reader = self._readers[self._row(name)]
+        return reader(kwargs or {}) if reader is not None else [1] * len(QUOTA_CATEGORIES)
+
+    def encode(self, calls):
+        """ Reduces planned calls to their endpoint rows and units
+
+        :param calls: (endpoint name, keyword arguments) pairs (iterable)
+        """
+        rows, units = [], []
+        flat = [1] * len(QUOTA_CATEGORIES)
+        for name, kwargs in calls:
+            row = self.index.get(name)
+            if row is None:
+                row = self._row(name)  # Raises
+            reader = self._readers[row]
+            rows.append(row)
+            units.append(reader(kwargs) if reader is not None else flat)
+        return rows, units
+
+    def costs(self, calls):
+        """ Returns the cost of every planned call, one row per call and a
+            column per category (an N x 3 array, or a list of lists without NumPy)
+        """
+        if self.numpy is None:
+            return [list(cost.values()) for cost in self._priced(calls)]
+        np = self.numpy
+        rows, units = self.encode(calls)
+        return self.amounts[np.array(rows, dtype=np.intp)] * np.array(units, dtype=float).reshape(-1, 3)
+
+    def total(self, calls):
+        """ Returns the total cost of the planned calls, by category """
+        if self.numpy is not None:
+            return self._sum(self.costs(calls))
+        total = [0] * len(QUOTA_CATEGORIES)
+        for cost in self._priced(calls):
+            for i, amount in enumerate(cost.values()):
+                total[i] += amount
+        return dict(zip(QUOTA_CATEGORIES, total))
+
+    def _priced(self, calls):
+        """ Yields the cost of each planned call, by category in QUOTA_CATEGORIES order """
+        functions, bodies, index = self._functions, self._bodies, self.index
+        for name, kwargs in calls:
+            row = index.get(name)
+            if row is None:
+                row = self._row(name)  # Raises
+            body = bodies[row]
+            yield functions[row](kwargs, kwargs, kwargs.get(body) if body is not None else kwargs)
+
+    def total_counts(self, counts, kwargs=None):
+        """ Returns the total cost of a number of calls to each endpoint
+
+        :param counts: number of calls by endpoint name (dict)
+        :param kwargs: keyword arguments of a typical call, by endpoint
+            name, for endpoints charged per unit (dict)
+        """
+        kwargs = kwargs or {}
+        names = list(counts)
+        units = [self.units(name, kwargs.get(name)) for name in names]
+        if self.numpy is not None:
+            np = self.numpy
+            rows = self.amounts[np.array([self._row(name) for name in names], dtype=np.intp)]
+            weights = np.array([counts[name] for name in names], dtype=float)
+            totals = weights @ (rows * np.array(units, dtype=float).reshape(-1, 3))
+            return dict(zip(QUOTA_CATEGORIES, totals.tolist()))
+        return self._sum([[counts[name] * amount * unit
+                           for amount, unit in zip(self.amounts[self._row(name)], units_)]
+                          for name, units_ in zip(names, units)])
+
+    def _sum(self, costs):
+        if self.numpy is not None:
+            return dict(zip(QUOTA_CATEGORIES, costs.reshape(-1, 3).sum(axis=0).tolist()))
+        return {category: sum(row[i] for row in costs) for i, category in enumerate(QUOTA_CATEGORIES)}
+
+    def schedule(self, calls, limits, remaining=None, max_days=None):
+        """ Splits planned calls into days that fit the quota, keeping their order
+
+        Each day takes the longest run of the next calls that fits its
+        budget: `remaining` on the first day, then the daily `limits`.
+        Calls costing more than a whole day's limits are left out and
+        listed as unschedulable.
+
+        :param calls: (endpoint name, keyword arguments) pairs (iterable)
+        :param limits: daily quota, by category (dict)
+        :param remaining: quota left today, by category, defaults to `limits` (dict)
+        :param max_days: stop after this many days, leaving the remaining
+            calls unscheduled (int)
+        """
+        costs = self.costs(calls)
+        limit = [limits.get(category, math.inf) for category in QUOTA_CATEGORIES]
+        today = limit if remaining is None else [
+            remaining.get(category, math.inf) for category in QUOTA_CATEGORIES]
+        # Running totals only grow, so the end of each day is found by a
+        # binary search of each category's running total
+        if self.numpy is not None:
+            np = self.numpy
+            costs = costs.reshape(-1, 3)
+            fits = (costs <= np.array(limit) + _EPSILON).all(axis=1)
+            order, unschedulable = np.flatnonzero(fits).tolist(), np.flatnonzero(~fits).tolist()
+            columns = list(np.cumsum(costs[fits], axis=0).T)
+
+            def search(column, value):
+                return int(np.searchsorted(column, value, side='right'))
+        else:
+            order, unschedulable = [], []
+            for index, cost in enumerate(costs):
+                fits = all(amount <= bound + _EPSILON for amount, bound in zip(cost, limit))
+                (order if fits else unschedulable).append(index)
+            columns = [list(itertools.accumulate(costs[index][i] for index in order))
+                       for i in range(len(QUOTA_CATEGORIES))]
+            search = bisect.bisect_right
+
+        days, spent = [], []
+        start, base, budget = 0, [0.0] * len(QUOTA_CATEGORIES), today
+        while start < len(order) and (max_days is None or len(days) < max_days):
+            end = max(start, min(search(column, reached + amount + _EPSILON)
+                                 for column, reached, amount in zip(columns, base, budget)))
+            reached = [float(column[end - 1]) if end else 0.0 for column in columns]
+            days.append(order[start:end])
+            spent.append({category: after - before for category, after, before
+                          in zip(QUOTA_CATEGORIES, reached, base)})
+            start, base, budget = end, reached, limit
+        return Schedule(days, spent, unschedulable)
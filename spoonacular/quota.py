@@ -0,0 +1,135 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+In-memory accounting of the account's daily API quota
+"""
+
+import threading
+
+QUOTA_CATEGORIES = ('requests', 'tinyrequests', 'results')
+
+
+class QuotaExceededError(Exception):
+    """ Raised when a call would spend more quota than the account has left """
+
+    def __init__(self, cost, available):
+        self.cost = cost
+        self.available = available
+        super().__init__("Call costs {} but only {} is available.".format(cost, available))
+
+
+def remaining_from_headers(headers):
+    """ Reads the X-RateLimit-*-Remaining response headers
+
+    Returns None when the response doesn't carry quota headers.
+    """
+    remaining = {}
+    for category in QUOTA_CATEGORIES:
+        value = headers.get('X-RateLimit-{}-Remaining'.format(category))
+        if value is not None:
+            remaining[category] = int(float(value))
+    return remaining or None
+
+
+class QuotaAccountant(object):
+    """ Tracks the remaining quota and checks each call against it
+
+    The balance is learned from the headers of every response, so no
+    extra round-trip is needed. Calls in flight are held against the
+    balance until their response arrives, so concurrent callers can't
+    overspend it between them.
+    """
+
+    def __init__(self, remaining=None, margin=5, enforce=True, wait=False, timeout=None):
+        """ Quota accountant constructor
+
+        :param remaining: known remaining quota, by category (dict)
+        :param margin: quota points to always leave unspent, by category (int)
+        :param enforce: refuse calls that would exceed the balance (bool)
+        :param wait: queue over-budget calls until the balance is refreshed
+            instead of refusing them right away (bool)
+        :param timeout: longest time a queued call waits (seconds)
+        """
+        self.margin = margin
+        self.enforce = enforce
+        self.wait = wait
+        self.timeout = timeout
+        self._remaining = dict(remaining) if remaining else None
+        self._pending = dict.fromkeys(QUOTA_CATEGORIES, 0)
+        self._condition = threading.Condition()
+
+    @property
+    def remaining(self):
+        """ Last known remaining quota by category (None until known) """
+        with self._condition:
+            return dict(self._remaining) if self._remaining is not None else None
+
+    @remaining.setter
+    def remaining(self, remaining):
+        with self._condition:
+            self._remaining = dict(remaining) if remaining is not None else None
+            self._condition.notify_all()
+
+    def available(self):
+        """ Quota that may still be spent, after the margin and calls in flight """
+        with self._condition:
+            return self._available()
+
+    def _available(self):
+        if self._remaining is None:
+            return None
+        return {category: self._remaining[category] - self._pending[category] - self.margin
+                for category in self._remaining}
+
+    def _fits(self, cost):
+        available = self._available()
+        if available is None or not cost:
+            return True
+        return all(cost.get(category, 0) <= amount
+                   for category, amount in available.items() if cost.get(category, 0))
+
+    def fits(self, cost):
+        """ Checks if a call of the given cost fits in the balance """
+        with self._condition:
+            return self._fits(cost)
+
+    def try_reserve(self, cost):
+        """ Holds `cost` against the balance if it fits, without waiting """
+        with self._condition:
+            if self.enforce and not self._fits(cost):
+                return False
+            self._hold(cost)
+            return True
+
+    def reserve(self, cost):
+        """ Holds `cost` against the balance for a call about to be sent
+
+        Raises QuotaExceededError if the call doesn't fit (after waiting
+        up to `timeout` for a refreshed balance when `wait` is set).
+        """
+        with self._condition:
+            if self.enforce and not self._fits(cost):
+                if not (self.wait and self._condition.wait_for(
+                        lambda: self._fits(cost), self.timeout)):
+                    raise QuotaExceededError(cost, self._available())
+            self._hold(cost)
+
+    def _hold(self, cost):
+        for category, amount in (cost or {}).items():
+            self._pending[category] = self._pending.get(category, 0) + amount
+
+    def release(self, cost, headers=None):
+        """ Settles a finished call, updating the balance from its response headers
+
+        :param cost: the cost passed to `reserve`
+        :param headers: response headers, or None if the call failed
+        """
+        remaining = remaining_from_headers(headers) if headers is not None else None
+        with self._condition:
+            for category, amount in (cost or {}).items():
+                self._pending[category] -= amount
+            if remaining:
+                self._remaining = dict(self._remaining or {}, **remaining)
+            self._condition.notify_all()
@@ -0,0 +1,139 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+Client-side rate limiting for the Spoonacular API
+"""
+
+import threading
+import time
+
+
+class TokenBucket(object):
+    """ Thread-safe token bucket
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    Callers reserve tokens up front; when the bucket is empty the
+    balance goes negative and the caller is told how long to wait, so
+    concurrent callers are served in the order they asked.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        """ Token bucket constructor
+
+        :param rate: tokens added per second (float)
+        :param capacity: maximum number of stored tokens, i.e. the burst size
+        :param clock: monotonic time function (seconds)
+        """
+        assert rate > 0, 'Token bucket rate must be positive.'
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._clock = clock
+        self._tokens = self.capacity
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    @property
+    def tokens(self):
+        """ Number of tokens currently available (negative when oversubscribed) """
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def reserve(self, amount=1):
+        """ Takes `amount` tokens and returns the seconds to wait before using them """
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def delay(self, amount=1):
+        """ Returns the seconds until `amount` tokens (at most a full bucket) are available, taking none """
+        with self._lock:
+            self._refill()
+            return max(0.0, (min(amount, self.capacity) - self._tokens) / self.rate)
+
+    def try_acquire(self, amount=1):
+        """ Takes `amount` tokens only if they are available right now """
+        with self._lock:
+            self._refill()
+            if self._tokens < amount:
+                return False
+            self._tokens -= amount
+            return True
+
+    def acquire(self, amount=1):
+        """ Blocks until `amount` tokens are available and takes them """
+        wait = self.reserve(amount)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class RateLimiter(object):
+    """ Throttles calls to the API
+
+    A single limiter is meant to be shared by every thread using an
+    `API` instance. Each HTTP call takes one token from the request
+    bucket, and optionally the call's cost from the bucket for each
+    quota category ('requests', 'tinyrequests', 'results').
+    """
+
+    def __init__(self, requests_per_second=None, burst=1, category_limits=None,
+                 clock=time.monotonic):
+        """ Rate limiter constructor
+
+        :param requests_per_second: HTTP calls allowed per second (None for no limit)
+        :param burst: number of back-to-back calls allowed when the bucket is full
+        :param category_limits: {category: (points per second, burst)} (dict)
+        :param clock: monotonic time function (seconds)
+        """
+        self.bucket = None
+        if requests_per_second:
+            self.bucket = TokenBucket(requests_per_second, burst, clock=clock)
+        self.categories = {}
+        for category, (rate, capacity) in (category_limits or {}).items():
+            self.categories[category] = TokenBucket(rate, capacity, clock=clock)
+
+    def reserve(self, cost=None):
+        """ Reserves capacity for one call and returns the seconds to wait
+
+        :param cost: quota points used by the call, by category (dict)
+        """
+        wait = 0.0
+        if self.bucket is not None:
+            wait = self.bucket.reserve(1)
+        if cost and self.categories:
+            for category, bucket in self.categories.items():
+                amount = cost.get(category, 0)
+                if amount:
+                    wait = max(wait, bucket.reserve(amount))
+        return wait
+
+    def delay(self, cost=None):
+        """ Returns the seconds until a call could go through without waiting, reserving nothing
+
+        :param cost: quota points used by the call, by category (dict)
+        """
+        wait = 0.0
+        if self.bucket is not None:
+            wait = self.bucket.delay(1)
+        if cost and self.categories:
+            for category, bucket in self.categories.items():
+                amount = cost.get(category, 0)
+                if amount:
+                    wait = max(wait, bucket.delay(amount))
+        return wait
+
+    def acquire(self, cost=None):
+        """ Blocks until the call is allowed through """
+        wait = self.reserve(cost)
+        if wait:
+            time.sleep(wait)
+        return wait
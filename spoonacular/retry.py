@@ -0,0 +1,150 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+Retrying failed Spoonacular API calls
+"""
+
+import random
+import socket
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from .ratelimit import TokenBucket
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+RETRY_EXCEPTIONS = (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                    socket.timeout)
+# Methods safe to send twice: others, like the POST endpoints charging
+# per ingredient or product, may have been processed before failing
+RETRY_METHODS = frozenset(['GET', 'HEAD'])
+# Failures showing the API never processed the request, retried for every method
+UNPROCESSED_STATUSES = frozenset([429])
+UNSENT_EXCEPTIONS = (requests.exceptions.ConnectTimeout,)
+
+
+class RetryBudget(object):
+    """ Caps retries to a fraction of the calls being made
+
+    Every call deposits `ratio` of a retry into the budget and every
+    retry withdraws a whole one, plus a small allowance of retries per
+    second. When many calls fail at once the budget runs dry and calls
+    fail fast instead of multiplying the load on the API.
+    """
+
+    def __init__(self, ratio=0.2, min_retries_per_second=10, max_balance=100):
+        """ Retry budget constructor
+
+        :param ratio: retries earned per call (float)
+        :param min_retries_per_second: retries always allowed per second (float)
+        :param max_balance: max number of retries saved up (float)
+        """
+        self.ratio = ratio
+        self.max_balance = max_balance
+        self._balance = 0.0
+        self._lock = threading.Lock()
+        self._allowance = None
+        if min_retries_per_second:
+            self._allowance = TokenBucket(min_retries_per_second, min_retries_per_second)
+
+    def deposit(self):
+        """ Records a call """
+        with self._lock:
+            self._balance = min(self.max_balance, self._balance + self.ratio)
+
+    def withdraw(self):
+        """ Takes one retry from the budget, returning False if there is none left """
+        if self._allowance is not None and self._allowance.try_acquire():
+            return True
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+class RetryPolicy(object):
+    """ Decides whether and when to retry a failed call
+
+    Rate-limited (429) and server error (5xx) responses, connection
+    errors and timeouts are retried with capped exponential backoff and
+    full jitter. A `Retry-After` header from the API takes precedence.
+    Calls with other methods than `methods` are only retried when the
+    API can't have processed them: after a 429 response, or when the
+    connection couldn't be opened in time.
+    """
+
+    def __init__(self, max_attempts=3, backoff_base=0.5, backoff_cap=30,
+                 statuses=RETRY_STATUSES, exceptions=RETRY_EXCEPTIONS,
+                 respect_retry_after=True, budget=None, methods=RETRY_METHODS):
+        """ Retry policy constructor
+
+        :param max_attempts: max number of attempts per call, including the first (int)
+        :param backoff_base: backoff before the first retry (seconds)
+        :param backoff_cap: longest backoff, and longest Retry-After honored (seconds)
+        :param statuses: HTTP status codes to retry (set)
+        :param exceptions: exception types to retry (tuple)
+        :param respect_retry_after: wait as long as the Retry-After header says (bool)
+        :param budget: shared budget limiting the overall share of retries (RetryBudget)
+        :param methods: HTTP methods retried on any of `statuses` and
+            `exceptions` (set)
+        """
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.statuses = frozenset(statuses)
+        self.exceptions = tuple(exceptions)
+        self.respect_retry_after = respect_retry_after
+        self.budget = budget if budget is not None else RetryBudget()
+        self.methods = frozenset(methods)
+
+    def backoff(self, attempt):
+        """ Returns a random delay, up to the exponential backoff for `attempt` """
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def retry_after(self, response):
+        """ Returns the delay requested by the response's Retry-After header, or None """
+        value = response.headers.get('Retry-After') if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def delay(self, attempt, response=None, error=None, method=None):
+        """ Returns how long to wait before retrying a call, or None not to retry
+
+        :param attempt: number of attempts already made, minus one (int)
+        :param response: the attempt's response, if any
+        :param error: the exception the attempt raised, if any
+        :param method: the call's HTTP method, if known (str)
+        """
+        if attempt == 0:
+            self.budget.deposit()
+        idempotent = method is None or method in self.methods
+        if error is not None:
+            retryable = isinstance(error, self.exceptions) and (
+                idempotent or isinstance(error, UNSENT_EXCEPTIONS))
+        else:
+            retryable = response is not None and response.status_code in self.statuses and (
+                idempotent or response.status_code in UNPROCESSED_STATUSES)
+        if not retryable or attempt + 1 >= self.max_attempts:
+            return None
+        delay = self.retry_after(response) if self.respect_retry_after else None
+        if delay is None:
+            delay = self.backoff(attempt)
+        elif delay > self.backoff_cap:
+            return None
+        if not self.budget.withdraw():
+            return None
+        return delay
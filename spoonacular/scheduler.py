@@ -0,0 +1,312 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+Quota-aware priority scheduling of API calls
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import itertools
+import threading
+import time
+from collections import defaultdict, deque, namedtuple
+
+from .quota import QuotaExceededError
+
+PriorityClass = namedtuple('PriorityClass', ['name', 'priority', 'weight', 'share', 'endpoints'])
+PriorityClass.__doc__ = """ A class of API calls scheduled together
+
+    :param name: class name (str)
+    :param priority: classes with a lower number always go first (int)
+    :param weight: share of the turns among classes of the same priority (float)
+    :param share: part of the daily quota reserved for this class, which
+        lower priority classes may not spend (float, 0 to 1)
+    :param endpoints: names of the endpoint methods in this class (iterable)
+    """
+
+DEFAULT_CLASSES = (
+    PriorityClass('interactive', 0, 1.0, 0.2, frozenset([
+        'autocomplete_ingredient_search', 'autocomplete_recipe_search', 'get_conversation_suggests',
+        'quick_answer', 'talk_to_a_chatbot'])),
+    PriorityClass('default', 1, 1.0, 0.1, frozenset()),
+    PriorityClass('background', 2, 1.0, 0.0, frozenset([
+        'get_recipe_information_bulk', 'search_recipes_complex'])),
+)
+
+# Priority class chosen with `PriorityScheduler.priority`, per thread and task
+_override = contextvars.ContextVar('spoonacular_priority_class', default=None)
+
+
+class _Ticket(object):
+    __slots__ = ('name', 'cost', 'tag', 'sequence', 'preempted', 'loop', 'future')
+
+    def __init__(self, name, cost, tag, sequence):
+        self.name = name
+        self.cost = cost
+        self.tag = tag
+        self.sequence = sequence
+        self.preempted = False
+        self.loop = None  # Event loop of an asyncio caller, woken through `future`
+        self.future = None
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class PriorityScheduler(object):
+    """ Decides which queued API call goes next when calls compete
+
+    Calls are sorted into priority classes by endpoint. Whenever the
+    rate limiter lets a call through, it goes to the first call of the
+    most urgent class: classes with a lower `priority` number always go
+    first, and classes of the same priority take turns by weighted fair
+    queuing on the quota points their calls cost, so one class's large
+    calls don't crowd out another's small ones. Within a class, calls go
+    in the order they were made.
+
+    Each class's `share` of the daily quota is reserved for it: calls of
+    lower priority classes are held back (preempted) once sending them
+    would leave less headroom, in the `X-RateLimit-*-Remaining` balance
+    tracked by the API's QuotaAccountant, than the shares of the classes
+    above them. Held calls go out again when the balance is refreshed,
+    or raise QuotaExceededError after `timeout` (right away without
+    `wait`).
+
+        scheduler = PriorityScheduler()
+        api = API(api_key, scheduler=scheduler)
+        with scheduler.priority('background'):
+            crawl(api)
+    """
+
+    def __init__(self, classes=DEFAULT_CLASSES, default='default', limits=None, wait=True,
+                 timeout=None):
+        """ Priority scheduler constructor
+
+        :param classes: the priority classes (list of PriorityClass)
+        :param default: class of the endpoints no class lists (str)
+        :param limits: daily quota by category, which the shares are parts
+            of, defaults to the largest balance seen (dict)
+        :param wait: hold preempted calls until the balance is refreshed
+            instead of refusing them right away (bool)
+        :param timeout: longest time a preempted call is held (seconds)
+        """
+        self.classes = {klass.name: klass for klass in classes}
+        if default not in self.classes:
+            raise ValueError("Unknown default priority class: {!r}".format(default))
+        self.default = default
+        self.limits = dict(limits) if limits else None
+        self.wait = wait
+        self.timeout = timeout
+        self._by_endpoint = {endpoint: klass.name for klass in classes for endpoint in klass.endpoints}
+        # Quota share held back from each class for the classes above it
+        self._reserved = {klass.name: sum(other.share for other in classes
+                                          if other.priority < klass.priority)
+                          for klass in classes}
+        self._levels = [sorted(name for name, klass in self.classes.items() if klass.priority == priority)
+                        for priority in sorted({klass.priority for klass in classes})]
+        self._queues = {name: deque() for name in self.classes}
+        self._finish = dict.fromkeys(self.classes, 0.0)
+        self._virtual = 0.0
+        self._sequence = itertools.count()
+        self._seen = {}
+        self._condition = threading.Condition()
+        self._async_tickets = set()
+        self.admitted = defaultdict(int)
+        self.preempted = defaultdict(int)
+
+    def classify(self, endpoint):
+        """ Returns the name of the priority class of a call to `endpoint` """
+        name = _override.get()
+        if name is not None:
+            return name
+        return self._by_endpoint.get(endpoint, self.default)
+
+    @contextlib.contextmanager
+    def priority(self, name):
+        """ Puts every call made in the block, in this thread or task, in class `name` """
+        if name not in self.classes:
+            raise ValueError("Unknown priority class: {!r}".format(name))
+        token = _override.set(name)
+        try:
+            yield
+        finally:
+            _override.reset(token)
+
+    def stats(self):
+        """ Returns the number of queued, admitted and preempted calls, by class """
+        with self._condition:
+            return {name: {'queued': len(self._queues[name]), 'admitted': self.admitted[name],
+                           'preempted': self.preempted[name]} for name in self.classes}
+
+    def _has_headroom(self, name, cost, available):
+        """ Checks that a call leaves the quota reserved for the classes above its own """
+        reserved = self._reserved[name]
+        if not reserved or not available or not cost:
+            return True
+        limits = self.limits or self._seen
+        return all(available[category] - amount >= reserved * limits[category]
+                   for category, amount in cost.items()
+                   if amount and category in available and category in limits)
+
+    def _next(self, available):
+        """ Returns the ticket that goes next, skipping the classes held back """
+        for level in self._levels:
+            best = None
+            for name in level:
+                queue = self._queues[name]
+                if queue and self._has_headroom(name, queue[0].cost, available):
+                    if best is None or (queue[0].tag, queue[0].sequence) < (best.tag, best.sequence):
+                        best = queue[0]
+            if best is not None:
+                return best
+        return None
+
+    def _enqueue(self, name, cost):
+        klass = self.classes[name]
+        size = max(1.0, sum((cost or {}).values()))
+        tag = max(self._virtual, self._finish[name]) + size / klass.weight
+        self._finish[name] = tag
+        ticket = _Ticket(name, cost, tag, next(self._sequence))
+        self._queues[name].append(ticket)
+        return ticket
+
+    def _observe(self, quota):
+        for category, amount in (quota.remaining or {}).items():
+            self._seen[category] = max(self._seen.get(category, 0), amount)
+
+    def try_acquire(self, endpoint, cost, quota, rate_limiter, priority_class=None):
+        """ Admits a call only if it can go right away, without queuing
+
+        Returns True once the call's quota is held and its rate limiter
+        capacity taken, like `acquire`, and False otherwise.
+        """
+        name = priority_class or self.classify(endpoint)
+        with self._condition:
+            if any(self._queues.values()) or rate_limiter.delay(cost) > 0:
+                return False
+            self._observe(quota)
+            if not self._has_headroom(name, cost, quota.available()) or not quota.try_reserve(cost):
+                return False
+            rate_limiter.reserve(cost)
+            self.admitted[name] += 1
+            return True
+
+    def _notify(self):
+        """ Wakes every queued call, threads and asyncio tasks alike, to check its turn again """
+        self._condition.notify_all()
+        for ticket in self._async_tickets:
+            if ticket.future is not None:
+                try:
+                    ticket.loop.call_soon_threadsafe(_wake, ticket.future)
+                except RuntimeError:
+                    pass  # The loop was closed
+
+    def _dequeue(self, ticket):
+        self._queues[ticket.name].remove(ticket)
+        self._async_tickets.discard(ticket)
+        self._notify()
+
+    def _poll(self, ticket, quota, rate_limiter, deadline):
+        """ Checks whether a queued call may go now
+
+        Returns (True, None) once it may, otherwise (False, the longest
+        time to wait before checking again, None for until woken).
+        Raises QuotaExceededError if the call is preempted and can't wait.
+        """
+        self._observe(quota)
+        available = quota.available()
+        if self._next(available) is ticket:
+            delay = rate_limiter.delay(ticket.cost)
+            if delay <= 0:
+                return True, None
+            return False, delay  # A more urgent call may arrive meanwhile
+        if not self._has_headroom(ticket.name, ticket.cost, available):
+            if not ticket.preempted:
+                ticket.preempted = True
+                self.preempted[ticket.name] += 1
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if not self.wait or (remaining is not None and remaining <= 0):
+                raise QuotaExceededError(ticket.cost, available)
+            return False, remaining
+        return False, None
+
+    def _admit(self, ticket, quota, rate_limiter):
+        """ Holds an admitted call's quota and takes its rate limiter capacity
+
+        Returns (whether the quota was held, seconds to wait for the
+        rate limiter).
+        """
+        self._virtual = ticket.tag
+        self.admitted[ticket.name] += 1
+        return quota.try_reserve(ticket.cost), rate_limiter.reserve(ticket.cost)
+
+    def acquire(self, endpoint, cost, quota, rate_limiter, priority_class=None):
+        """ Waits for a call's turn, then holds its quota and takes its rate limiter capacity
+
+        Raises QuotaExceededError if the call is preempted and can't
+        wait, or doesn't fit the quota at all (see QuotaAccountant).
+
+        :param endpoint: endpoint method name (str)
+        :param cost: quota points used by the call, by category (dict)
+        :param quota: the API's QuotaAccountant
+        :param rate_limiter: the API's RateLimiter
+        :param priority_class: class of the call, defaults to `classify(endpoint)` (str)
+        """
+        name = priority_class or self.classify(endpoint)
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        with self._condition:
+            ticket = self._enqueue(name, cost)
+            try:
+                while True:
+                    ready, wait = self._poll(ticket, quota, rate_limiter, deadline)
+                    if ready:
+                        break
+                    self._condition.wait(wait)
+            finally:
+                self._dequeue(ticket)
+            reserved, wait = self._admit(ticket, quota, rate_limiter)
+        if not reserved:
+            quota.reserve(cost)  # Raises, or waits for a refreshed balance
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, endpoint, cost, quota, rate_limiter, priority_class=None):
+        """ Coroutine version of `acquire`, waiting on the event loop instead of blocking a thread """
+        name = priority_class or self.classify(endpoint)
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        loop = asyncio.get_running_loop()
+        with self._condition:
+            ticket = self._enqueue(name, cost)
+            ticket.loop = loop
+            self._async_tickets.add(ticket)
+        admitted = False
+        try:
+            while True:
+                with self._condition:
+                    ready, wait = self._poll(ticket, quota, rate_limiter, deadline)
+                    if ready:
+                        self._dequeue(ticket)
+                        admitted = True
+                        reserved, wait = self._admit(ticket, quota, rate_limiter)
+                        break
+                    ticket.future = loop.create_future()
+                await asyncio.wait([ticket.future], timeout=wait)
+        finally:
+            if not admitted:
+                with self._condition:
+                    self._dequeue(ticket)
+        if not reserved:
+            # Raises, or waits (off the event loop) for a refreshed balance
+            await loop.run_in_executor(None, quota.reserve, cost)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def release(self):
+        """ Wakes the queued calls after a call finished, so they check the refreshed balance """
+        with self._condition:
+            self._notify()
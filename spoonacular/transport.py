@@ -0,0 +1,227 @@
+# Spoonacular API
+# Copyright 2018 John W. Miller
+# See LICENSE for details.
+
+"""
+HTTP transports for the Spoonacular API
+"""
+
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from . import codec
+
+DEFAULT_HEADERS = {"Application": "spoonacular",
+                   "Content-Type": "application/x-www-form-urlencoded"}
+
+
+class Response(requests.Response):
+    """ A requests.Response whose json() decodes with the JSON codec
+
+    Transports that can measure them set `timings` to the DNS, connect
+    and time-to-first-byte durations of the request (see `span_timings`).
+    """
+
+    timings = None
+
+    def json(self, **kwargs):
+        if kwargs:
+            return super().json(**kwargs)
+        try:
+            return codec.loads(self.content)
+        except ValueError as e:
+            raise requests.exceptions.JSONDecodeError(str(e), self.text, 0)
+
+
+class _Adapter(HTTPAdapter):
+    """ An HTTPAdapter building Response objects """
+
+    def build_response(self, req, resp):
+        response = super().build_response(req, resp)
+        response.__class__ = Response
+        return response
+
+
+def build_response(status_code, headers, content, url=None, reason=None):
+    """ Builds a Response from an already-read response body
+
+    Lets responses that did not come from a requests.Session (asyncio
+    transports, caches, ...) be used exactly like the ones that did.
+    """
+    response = Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers or {})
+    response._content = content
+    response.url = url
+    response.reason = reason
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+
+def redact_url(url):
+    """ Returns `url` without its apiKey param, so it can be stored or shared """
+    if not url or 'apiKey=' not in url:
+        return url
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+             if name != 'apiKey']
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def span_timings(marks):
+    """ Turns time.perf_counter() marks taken while sending a request into durations
+
+    :param marks: times by event: 'dns_start', 'dns_end', 'connect_start',
+        'connect_end', 'send_start', 'headers_end' (dict)
+    """
+    def span(start, end):
+        if start in marks and end in marks:
+            return marks[end] - marks[start]
+        return None
+    return {'dns': span('dns_start', 'dns_end'), 'connect': span('connect_start', 'connect_end'),
+            'ttfb': span('send_start', 'headers_end')}
+
+
+def encode_fields(fields):
+    """ Encodes a params/form dict the way requests does: drops None
+        values, repeats keys for list values and stringifies the rest
+    """
+    if not fields:
+        return None
+    encoded = []
+    for key, value in fields.items():
+        if value is None:
+            continue
+        values = value if isinstance(value, (list, tuple)) else [value]
+        encoded.extend((key, str(v)) for v in values if v is not None)
+    return encoded
+
+
+def encode_json(json):
+    """ Encodes a JSON request body with the JSON codec
+
+    Returns the body and the headers to send it with.
+    """
+    return codec.dumps(json), codec.JSON_HEADERS
+
+
+class RequestsTransport(object):
+    """ Sends requests over a pooled requests.Session
+
+    Each API instance owns its transport, so the connection pool can be
+    sized for the number of threads sharing that instance.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False,
+                 keep_alive=True, headers=None):
+        """ Requests transport constructor
+
+        :param pool_connections: number of hosts to keep connection pools for (int)
+        :param pool_maxsize: max number of connections kept open per host (int)
+        :param pool_block: wait for a free connection instead of opening a
+            throwaway one when the pool is exhausted (bool)
+        :param keep_alive: reuse connections between requests (bool)
+        :param headers: headers sent with every request (dict)
+        """
+        self.session = requests.Session()
+        adapter = _Adapter(pool_connections=pool_connections,
+                           pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(DEFAULT_HEADERS if headers is None else headers)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    @property
+    def headers(self):
+        return self.session.headers
+
+    def request(self, method, url, params=None, data=None, json=None, timeout=None):
+        """ Sends a request and returns a requests.Response """
+        headers = None
+        if json is not None and not data:
+            data, headers = encode_json(json)
+        response = self.session.request(method, url, params=params, data=data,
+                                        headers=headers, timeout=timeout)
+        # requests only measures the time to the response headers, connecting included
+        response.timings = {'ttfb': response.elapsed.total_seconds()}
+        return response
+
+    def close(self):
+        """ Closes the pooled connections """
+        self.session.close()
+
+
+class HTTPXTransport(object):
+    """ Sends requests over a pooled httpx.Client, optionally with HTTP/2
+
+    HTTP/2 multiplexes concurrent requests over a single connection.
+    Requires `httpx` (and `h2` for HTTP/2). Connection errors and
+    timeouts are raised as their requests equivalents.
+    """
+
+    # httpcore trace events, without their http11./http2. prefix, and their marks
+    _TRACE_MARKS = {'connection.connect_tcp.started': 'connect_start',
+                    'connection.connect_tcp.complete': 'connect_end',
+                    'connection.start_tls.complete': 'connect_end',
+                    'send_request_headers.started': 'send_start',
+                    'receive_response_headers.complete': 'headers_end'}
+
+    def __init__(self, http2=True, max_connections=100, max_keepalive_connections=20,
+                 keepalive_expiry=5.0, headers=None):
+        """ httpx transport constructor
+
+        :param http2: negotiate HTTP/2 with the server (bool)
+        :param max_connections: max number of open connections (int)
+        :param max_keepalive_connections: max number of idle connections kept open (int)
+        :param keepalive_expiry: how long idle connections are kept open (seconds)
+        :param headers: headers sent with every request (dict)
+        """
+        import httpx
+        self._httpx = httpx
+        limits = httpx.Limits(max_connections=max_connections,
+                              max_keepalive_connections=max_keepalive_connections,
+                              keepalive_expiry=keepalive_expiry)
+        self.client = httpx.Client(http2=http2, limits=limits,
+                                   headers=DEFAULT_HEADERS if headers is None else headers)
+
+    @property
+    def headers(self):
+        return self.client.headers
+
+    def request(self, method, url, params=None, data=None, json=None, timeout=None):
+        """ Sends a request and returns a requests.Response """
+        form = content = headers = None
+        if data:
+            form = {}
+            for key, value in encode_fields(data):
+                form.setdefault(key, []).append(value)
+        elif json is not None:
+            content, headers = encode_json(json)
+        marks = {}
+
+        def trace(event, info):
+            mark = self._TRACE_MARKS.get(event.split('.', 1)[1] if event.startswith('http') else event)
+            if mark is not None:
+                marks[mark] = time.perf_counter()
+
+        try:
+            response = self.client.request(method, url, params=encode_fields(params),
+                                           data=form, content=content, headers=headers,
+                                           timeout=timeout, extensions={'trace': trace})
+        except self._httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e)
+        except self._httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e)
+        response = build_response(response.status_code, response.headers, response.content,
+                                  url=str(response.url), reason=response.reason_phrase)
+        response.timings = span_timings(marks)
+        return response
+
+    def close(self):
+        """ Closes the pooled connections """
+        self.client.close()
@@ -0,0 +1,48 @@
+""" Local stand-in for the Spoonacular API used by the offline tests """
+
+import unittest
+
+from spoonacular.mock import MockSpoonacular
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Skips the tests sending AsyncAPI calls when aiohttp isn't installed
+requires_aiohttp = unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+
+
+def bulk_recipes(request):
+    """ Answers get_recipe_information_bulk with a recipe for every requested ID except 13 """
+    ids = request['params']['ids'][0].split(',')
+    return [{'id': int(id), 'title': 'Recipe {}'.format(id)} for id in ids if id != '13']
+
+
+class FakeSpoonacular(MockSpoonacular):
+    """ Serves a JSON echo of each request after an optional delay
+
+    Each response carries X-RateLimit-*-Remaining headers, with one
+    'requests' point spent per call. `responders` maps a path to a
+    function building the JSON payload from the request record.
+
+        with FakeSpoonacular(latency=0.1) as server:
+            api = API('key')
+            api.api_root = server.url
+    """
+
+    def __init__(self, latency=0.0, remaining=None, responders=None):
+        limits = {category: max(amount, (remaining or {}).get(category, 0))
+                  for category, amount in {'requests': 150, 'tinyrequests': 1500,
+                                           'results': 1500}.items()}
+        super().__init__(latency=latency, limits=limits, remaining=remaining,
+                         responders=responders)
+
+    def cost(self, endpoint, request):
+        return {'requests': 1}
+
+    def payload(self, request, fixture):
+        responder = self.responders.get(request['path'])
+        if responder is not None:
+            return responder(request)
+        return {key: request[key] for key in ('method', 'path', 'params', 'body')}
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import time
+import unittest
+from spoonacular import AsyncAPI
+from tests.fake_server import FakeSpoonacular, requires_aiohttp
+
+
+def run(api, coroutine_function):
+    """ Runs `coroutine_function(api)` on a new event loop, closing the api's session after """
+    async def main():
+        async with api:
+            return await coroutine_function(api)
+
+    return asyncio.run(main())
+
+
+@requires_aiohttp
+class TestAsyncAPI(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeSpoonacular(latency=0.2).__enter__()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.__exit__(None, None, None)
+
+    def setUp(self):
+        self.api = AsyncAPI('test-key', sleep_time=0)
+        self.api.api_root = self.server.url
+
+    def test_same_methods_as_sync_api(self):
+        """ Endpoint methods return awaitables resolving to responses """
+        response = run(self.api, lambda api: api.get_recipe_information(479101, includeNutrition=False))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['path'], '/recipes/479101/information')
+        self.assertEqual(data['params']['includeNutrition'], ['false'])
+        self.assertEqual(data['params']['apiKey'], ['test-key'])
+
+    def test_post_form_and_json(self):
+        async def calls(api):
+            return (await api.parse_ingredients('1 apple\n2 eggs', servings=2),
+                    await api.classify_grocery_products_batch([{'title': 'Milk'}]))
+
+        parsed, classified = run(self.api, calls)
+        self.assertEqual(parsed.json()['method'], 'POST')
+        self.assertIn('servings=2', parsed.json()['body'])
+        self.assertEqual(json.loads(classified.json()['body']), [{'title': 'Milk'}])
+
+    def test_concurrent_throughput_scales(self):
+        """ Calls sharing one event loop overlap instead of queueing """
+        async def timed(api, n):
+            start = time.monotonic()
+            await asyncio.gather(*[api.quick_answer('q{}'.format(i))
+                                   for i in range(n)])
+            return time.monotonic() - start
+
+        async def calls(api):
+            return await timed(api, 1), await timed(api, 50)
+
+        single, many = run(self.api, calls)
+        self.assertLess(many, single * 5)
+
+    def test_rate_limit_is_honored(self):
+        api = AsyncAPI('test-key', sleep_time=0.1)
+        api.api_root = self.server.url
+
+        async def calls(api):
+            start = time.monotonic()
+            await asyncio.gather(*[api.get_a_random_food_joke() for _ in range(5)])
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(run(api, calls), 0.4)
+
+    def test_remaining_calls_from_api(self):
+        remaining = run(self.api, lambda api: api.getRemainingCallsFromApi())
+        self.assertEqual(remaining['requests'], self.server.remaining['requests'])
+        self.assertEqual(self.api.callsRemaining, remaining)
+
+    def test_needs_async_with(self):
+        self.assertIsNone(self.api.transport)
+        with self.assertRaises(TypeError):
+            with self.api:
+                pass
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import time
+import unittest
+from spoonacular import API, AsyncAPI
+from tests.fake_server import FakeSpoonacular, requires_aiohttp
+
+
+class TestMap(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSpoonacular(latency=0.05, remaining={'requests': 10000}).__enter__()
+        self.api = API('test-key', sleep_time=0)
+        self.api.api_root = self.server.url
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_results_in_input_order(self):
+        titles = ({'title': 'Dish {}'.format(i)} for i in range(40))
+        results = list(self.api.map('guess_nutrition_by_dish_name', titles, max_workers=8))
+        self.assertEqual([result.index for result in results], list(range(40)))
+        self.assertEqual(results[7].response.json()['params']['title'], ['Dish 7'])
+        self.assertTrue(all(result.error is None for result in results))
+
+    def test_unordered_results_and_errors(self):
+        self.server.fail_next(404, count=2)
+        results = list(self.api.map(self.api.get_food_information,
+                                    [{'id': id} for id in range(10)], ordered=False))
+        self.assertEqual(sorted(result.index for result in results), list(range(10)))
+        errors = [result for result in results if result.error is not None]
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(errors[0].response.status_code, 404)
+
+    def test_speedup_and_shared_rate_limit(self):
+        inputs = [{'q': str(i)} for i in range(16)]
+        start = time.monotonic()
+        list(self.api.map('quick_answer', inputs, max_workers=16))
+        self.assertLess(time.monotonic() - start, 16 * 0.05 / 4)
+
+        self.api = API('test-key', sleep_time=0.02)
+        self.api.api_root = self.server.url
+        start = time.monotonic()
+        list(self.api.map('quick_answer', inputs, max_workers=16))
+        self.assertGreaterEqual(time.monotonic() - start, 15 * 0.02)
+
+    def test_stopping_early_cancels_queued_calls(self):
+        self.server.latency = 0.2
+        results = self.api.map('quick_answer', ({'q': str(i)} for i in range(100)), max_workers=2)
+        next(results)
+        start = time.monotonic()
+        results.close()
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertLessEqual(len(self.server.requests), 4)
+
+    @requires_aiohttp
+    def test_async(self):
+        self.server.fail_next(404)
+        titles = ({'title': 'Dish {}'.format(i)} for i in range(40))
+
+        async def results():
+            async with AsyncAPI('test-key', sleep_time=0) as api:
+                api.api_root = self.server.url
+                return [result async for result in api.map(
+                    'guess_nutrition_by_dish_name', titles, max_workers=8)]
+
+        start = time.monotonic()
+        results = asyncio.run(results())
+        self.assertLess(time.monotonic() - start, 40 * 0.05 / 4)
+        self.assertEqual([result.index for result in results], list(range(40)))
+        self.assertEqual(results[7].response.json()['params']['title'], ['Dish 7'])
+        self.assertEqual(sum(result.error is not None for result in results), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
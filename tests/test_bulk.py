@@ -0,0 +1,68 @@
+import asyncio
+import time
+import unittest
+from spoonacular import API, AsyncAPI, QuotaExceededError, ResponseCache
+from tests.fake_server import FakeSpoonacular, bulk_recipes, requires_aiohttp
+
+
+class TestRecipeInformationBulk(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSpoonacular(latency=0.02, remaining={'requests': 10000}, responders={
+            '/recipes/informationBulk': bulk_recipes}).__enter__()
+        self.api = API('test-key', sleep_time=0)
+        self.api.api_root = self.server.url
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_chunks_stream_in_order(self):
+        recipes = list(self.api.iter_recipe_information(range(1, 251), chunk_size=40))
+        self.assertEqual([recipe['id'] for recipe in recipes],
+                         [id for id in range(1, 251) if id != 13])
+        self.assertEqual(len(self.server.requests), 7)
+        self.assertTrue(all(len(request['params']['ids'][0].split(',')) <= 40
+                            for request in self.server.requests))
+
+    def test_stopping_early_doesnt_wait_for_pending_chunks(self):
+        self.server.latency = 0.5
+        recipes = self.api.iter_recipe_information(range(1, 100), chunk_size=1, max_workers=2)
+        self.assertEqual(next(recipes)['id'], 1)
+        start = time.monotonic()
+        recipes.close()
+        self.assertLess(time.monotonic() - start, 0.25)
+        self.assertLessEqual(len(self.server.requests), 4)
+
+    def test_quota_counts_each_recipe(self):
+        """ Each chunk costs one 'requests' point per recipe """
+        self.api.callsRemaining = {'requests': 100, 'tinyrequests': 100, 'results': 100}
+        with self.assertRaises(QuotaExceededError):
+            list(self.api.iter_recipe_information(range(200), chunk_size=200))
+        self.assertEqual(self.server.requests, [])
+        self.assertEqual(len(list(self.api.iter_recipe_information(range(90), chunk_size=30))), 89)
+
+    def test_cached_recipes_are_skipped(self):
+        self.api.cache = ResponseCache()
+        self.api.get_recipe_information(5)
+        list(self.api.iter_recipe_information([1, 2, 3], chunk_size=10))
+        self.server.requests.clear()
+        recipes = list(self.api.iter_recipe_information([3, 4, 5, 2], chunk_size=10))
+        self.assertEqual([recipe['id'] for recipe in recipes[:2]], [3, 4])
+        self.assertEqual(self.server.requests[0]['params']['ids'], ['4'])
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.api.get_recipe_information(1).json()['title'], 'Recipe 1')
+
+    @requires_aiohttp
+    def test_async(self):
+        async def recipes():
+            async with AsyncAPI('test-key', sleep_time=0) as api:
+                api.api_root = self.server.url
+                return [recipe async for recipe in api.iter_recipe_information(range(1, 101), chunk_size=30)]
+
+        recipes = asyncio.run(recipes())
+        self.assertEqual([recipe['id'] for recipe in recipes], [id for id in range(1, 101) if id != 13])
+        self.assertEqual(len(self.server.requests), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
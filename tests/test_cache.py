@@ -0,0 +1,155 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import unittest
+from spoonacular import API, ResponseCache, SQLiteCache
+from spoonacular.cache import cache_key
+from spoonacular.transport import build_response
+from tests.fake_server import FakeSpoonacular
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_key_ignores_api_key_none_and_order(self):
+        self.assertEqual(cache_key('GET', 'food/wine/pairing',
+                                   {'food': 'steak', 'maxPrice': None, 'apiKey': 'a'}),
+                         cache_key('GET', 'food/wine/pairing', {'food': 'steak'}))
+        self.assertEqual(cache_key('GET', 'x', {'b': 1, 'a': 2}),
+                         cache_key('GET', 'x', {'a': 2, 'b': 1}))
+        self.assertEqual(cache_key('GET', 'recipes/informationBulk', {'ids': [1, 2], 'includeNutrition': True}),
+                         cache_key('GET', 'recipes/informationBulk', {'ids': '1,2', 'includeNutrition': 'true'}))
+
+    def test_ttl_and_counters(self):
+        clock = FakeClock()
+        cache = ResponseCache(ttl=10, ttls={'get_wine_description': 100}, clock=clock)
+        cache.set('k', build_response(200, {}, b'{"a": 1}'), cache.ttl_for('quick_answer'))
+        self.assertEqual(cache.get('k').json(), {'a': 1})
+        clock.now = 11
+        self.assertIsNone(cache.get('k'))
+        self.assertEqual(cache.stats(), {'size': 0, 'hits': 1, 'misses': 1})
+        self.assertEqual(cache.ttl_for('get_wine_description'), 100)
+        self.assertEqual(cache.ttl_for('get_random_recipes'), 0)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(maxsize=2)
+        for key in 'abc':
+            if key == 'c':
+                cache.get('a')
+            cache.set(key, build_response(200, {}, b'{}'), 10)
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(len(cache), 2)
+
+
+class TestAPICache(unittest.TestCase):
+
+    def test_hits_skip_the_network_and_quota(self):
+        with FakeSpoonacular() as server:
+            api = API('test-key', sleep_time=0, cache=ResponseCache())
+            api.api_root = server.url
+            first = api.get_recipe_information(479101, includeNutrition=False)
+            remaining = api.callsRemaining
+            second = api.get_recipe_information(479101, includeNutrition=False)
+            self.assertEqual(first.json(), second.json())
+            self.assertEqual(len(server.requests), 1)
+            self.assertEqual(api.callsRemaining, remaining)
+            self.assertEqual(api.cache.stats()['hits'], 1)
+
+    def test_hits_dont_share_the_api_key(self):
+        cache = ResponseCache()
+        with FakeSpoonacular() as server:
+            urls = []
+            for key in ('first-key', 'second-key'):
+                api = API(key, sleep_time=0, cache=cache)
+                api.api_root = server.url
+                urls.append(api.get_recipe_information(479101, includeNutrition=False).url)
+            self.assertEqual(len(server.requests), 1)
+        self.assertNotIn('apiKey', urls[1])  # The hit
+        self.assertIn('includeNutrition=false', urls[1])
+
+    def test_random_and_post_endpoints_are_not_cached(self):
+        with FakeSpoonacular() as server:
+            api = API('test-key', sleep_time=0, cache=ResponseCache())
+            api.api_root = server.url
+            for _ in range(2):
+                api.get_a_random_food_joke()
+                api.detect_food_in_text('tacos')
+            self.assertEqual(len(server.requests), 4)
+
+
+def _fill_cache(path, keys):
+    cache = SQLiteCache(path)
+    for key in keys:
+        cache.set(key, build_response(200, {}, key.encode()), 60)
+
+
+class TestSQLiteCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.sqlite')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip_with_compression(self):
+        cache = SQLiteCache(self.path, compress_min_size=10)
+        body = json.dumps([{'id': i, 'title': 'Pasta'} for i in range(100)]).encode()
+        cache.set('bulk', build_response(200, {'Content-Type': 'application/json'}, body), 60)
+        stored = cache._connection().execute("SELECT size FROM responses").fetchone()[0]
+        self.assertLess(stored, len(body))
+        response = cache.get('bulk')
+        self.assertEqual(response.content, body)
+        self.assertEqual(response.headers['content-type'], 'application/json')
+        self.assertEqual(cache.stats(), {'size': 1, 'hits': 1, 'misses': 0})
+
+    def test_shared_across_processes(self):
+        process = multiprocessing.Process(target=_fill_cache, args=(self.path, ['a', 'b']))
+        process.start()
+        process.join()
+        cache = SQLiteCache(self.path)
+        self.assertEqual(cache.get('b').content, b'b')
+
+    def test_size_based_eviction(self):
+        cache = SQLiteCache(self.path, max_bytes=250, evict_interval=1,
+                            compress_min_size=10**6)
+        for key in 'abcd':
+            cache.set(key, build_response(200, {}, b'x' * 100), 60)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('d'))
+
+    def test_rerun_costs_no_network_calls(self):
+        with FakeSpoonacular() as server:
+            for _ in range(2):
+                api = API('test-key', sleep_time=0, cache=SQLiteCache(self.path))
+                api.api_root = server.url
+                api.get_recipe_information_bulk('1,2,3')
+            self.assertEqual(len(server.requests), 1)
+
+    def test_api_key_is_not_stored(self):
+        recipe = {'/recipes/1/information': lambda request: {'id': 1}}  # Not an echo of the key
+        with FakeSpoonacular(responders=recipe) as server:
+            api = API('SECRET-KEY-123', sleep_time=0, cache=SQLiteCache(self.path))
+            api.api_root = server.url
+            api.get_recipe_information(1, includeNutrition=True)
+            url = api.get_recipe_information(1, includeNutrition=True).url
+        self.assertNotIn('SECRET', url)
+        self.assertIn('includeNutrition=true', url)
+        for path in (self.path, self.path + '-wal'):
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    self.assertNotIn(b'SECRET', f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
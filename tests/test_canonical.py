@@ -0,0 +1,55 @@
+import unittest
+from spoonacular import API
+from spoonacular.canonical import canonical_fields, canonical_value, request_key
+from tests.fake_server import FakeSpoonacular
+
+
+class TestCanonicalRequests(unittest.TestCase):
+
+    def test_values(self):
+        self.assertEqual(canonical_value(True), 'true')
+        self.assertEqual(canonical_value(False), 'false')
+        self.assertEqual(canonical_value(2), '2')
+        self.assertEqual(canonical_value(['apples', None, 'flour']), 'apples,flour')
+        self.assertEqual(canonical_value((1, 2, 3)), '1,2,3')
+        self.assertEqual(canonical_value({'b', 'a'}), 'a,b')
+        self.assertEqual(canonical_value(['1 egg', '2 apples'], '\n'), '1 egg\n2 apples')
+
+    def test_fields_are_sorted_without_nones(self):
+        fields = canonical_fields({'number': 5, 'ingredients': ['apples', 'flour'],
+                                   'ranking': None, 'fillIngredients': False, 'tags': []})
+        self.assertEqual(list(fields.items()),
+                         [('fillIngredients', 'false'), ('ingredients', 'apples,flour'),
+                          ('number', '5')])
+        self.assertEqual(canonical_fields(fields), fields)
+        self.assertEqual(canonical_fields({'ingredientList': ['1 egg', '2 apples']}),
+                         {'ingredientList': '1 egg\n2 apples'})
+        self.assertIsNone(canonical_fields({'maxPrice': None}))
+        self.assertIsNone(canonical_fields(None))
+
+    def test_key_is_stable(self):
+        key = request_key('GET', 'recipes/random', {'tags': ['vegan', 'dessert'], 'number': 2,
+                                                    'limitLicense': None, 'apiKey': 'secret'})
+        self.assertEqual(key, b'GET recipes/random?number=2&tags=vegan%2Cdessert')
+        self.assertEqual(key, request_key('GET', 'recipes/random', {'number': '2', 'tags': 'vegan,dessert'}))
+        self.assertNotEqual(request_key('POST', 'food/products/classifyBatch', json_=[{'title': 'a'}]),
+                            request_key('POST', 'food/products/classifyBatch', json_=[{'title': 'b'}]))
+        self.assertEqual(request_key('POST', 'x', json_={'a': 1, 'b': 2}),
+                         request_key('POST', 'x', json_={'b': 2, 'a': 1}))
+
+    def test_calls_send_canonical_params(self):
+        with FakeSpoonacular() as server:
+            with API('test-key', sleep_time=0) as api:
+                api.api_root = server.url
+                api.search_recipes_by_ingredients(['apples', 'flour'], fillIngredients=True, number=3)
+                api.get_wine_recommendation('merlot')
+        request = server.requests[-1]
+        self.assertEqual(request['params'], {'wine': ['merlot'], 'apiKey': ['test-key']})
+        request = server.requests[-2]
+        self.assertEqual(request['params'], {'fillIngredients': ['true'], 'ingredients': ['apples,flour'],
+                                             'number': ['3'], 'apiKey': ['test-key']})
+        self.assertTrue(request['path'].endswith('findByIngredients'))
+
+
+if __name__ == '__main__':
+    unittest.main()
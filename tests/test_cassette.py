@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import unittest
+from spoonacular import API, CassetteTransport, UnrecordedRequestError
+from spoonacular.mock import MockSpoonacular
+from spoonacular.quota import remaining_from_headers
+
+
+class TestCassetteTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'calls.cassette')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self, calls, mode='record'):
+        with MockSpoonacular() as server:
+            with API('recording-key', sleep_time=0, transport=CassetteTransport(self.path, mode)) as api:
+                api.api_root = server.url
+                responses = [call(api) for call in calls]
+            return responses, server.requests
+
+    def replay(self):
+        return API('other-key', sleep_time=0, transport=CassetteTransport(self.path))
+
+    def test_replays_recorded_responses(self):
+        recorded, _ = self.record([
+            lambda api: api.get_recipe_information(716429, includeNutrition=True),
+            lambda api: api.parse_ingredients('1 apple\n2 eggs', servings=2),
+            lambda api: api.classify_grocery_products_batch([{'title': 'Milk'}]),
+            lambda api: api.visualize_recipe_nutrition_by_id(716429),
+        ])
+        with self.replay() as api:
+            api.api_root = 'http://127.0.0.1:1/'  # Nothing listens here
+            replayed = [api.get_recipe_information(716429, includeNutrition=True),
+                        api.parse_ingredients('1 apple\n2 eggs', servings=2),
+                        api.classify_grocery_products_batch([{'title': 'Milk'}]),
+                        api.visualize_recipe_nutrition_by_id(716429)]
+            self.assertEqual([r.content for r in replayed], [r.content for r in recorded])
+            self.assertEqual(replayed[0].json()['id'], 716429)
+            self.assertEqual(replayed[3].headers['Content-Type'], 'text/html;charset=utf-8')
+            self.assertEqual(api.callsRemaining, remaining_from_headers(recorded[-1].headers))
+            with self.assertRaises(UnrecordedRequestError):
+                api.get_recipe_information(716429)
+
+    def test_param_order_and_nones_dont_matter(self):
+        self.record([lambda api: api.search_recipes_complex('pasta', cuisine='italian', number=5)])
+        with self.replay() as api:
+            response = api.search_recipes_complex('pasta', number=5, cuisine='italian', diet=None)
+            self.assertEqual(len(response.json()['results']), 5)
+
+    def test_auto_mode_and_unindexed_cassettes(self):
+        self.record([lambda api: api.get_recipe_information(1)])
+        _, requests = self.record([lambda api: api.get_recipe_information(1),
+                                   lambda api: api.get_recipe_information(2),
+                                   lambda api: api.get_recipe_information(2)], mode='auto')
+        self.assertEqual([request['path'] for request in requests], ['/recipes/2/information'])
+        # Drop the index, as if the recording process had died
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 10)
+        with self.replay() as api:
+            self.assertEqual(len(api.transport), 2)
+            self.assertEqual(api.get_recipe_information(2).json()['id'], 2)
+
+
+    def test_damaged_index(self):
+        self.record([lambda api, id=id: api.get_recipe_information(id) for id in range(1, 4)])
+        size = os.path.getsize(self.path)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        for damaged in (data[:size - 30],  # Footer and part of the index cut off
+                        data[:size - 30] + data[size - 20:]):  # Index cut short, footer intact
+            with open(self.path, 'wb') as f:
+                f.write(damaged)
+            with self.replay() as api:
+                self.assertEqual(len(api.transport), 3)
+                self.assertEqual(api.get_recipe_information(3).json()['id'], 3)
+
+    def test_corrupt_record_ends_the_scan(self):
+        self.record([lambda api, id=id: api.get_recipe_information(id) for id in range(1, 4)])
+        with open(self.path, 'r+b') as f:
+            data = bytearray(f.read())
+            data[-200] ^= 0xff  # In the last record, with the index dropped below
+            f.seek(0)
+            f.write(data)
+            f.truncate(len(data) - 10)
+        with self.replay() as api:
+            self.assertEqual(len(api.transport), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import unittest
+from spoonacular import API, AsyncAPI, RequestCoalescer
+from tests.fake_server import FakeSpoonacular, requires_aiohttp
+
+
+class TestRequestCoalescer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSpoonacular(latency=0.2).__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_threads_share_one_request(self):
+        api = API('test-key', sleep_time=0, coalescer=RequestCoalescer())
+        api.api_root = self.server.url
+        responses = []
+
+        def lookup():
+            responses.append(api.get_recipe_information(479101))
+
+        threads = [threading.Thread(target=lookup) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(api.coalescer.coalesced, 9)
+        self.assertEqual(len(set(id(response) for response in responses)), 10)
+        self.assertTrue(all(response.json() == responses[0].json() for response in responses))
+
+    def test_errors_are_shared(self):
+        api = API('test-key', sleep_time=0, coalescer=RequestCoalescer())
+        api.api_root = 'http://127.0.0.1:9/'
+        api.retry.max_attempts = 1
+        errors = []
+
+        def lookup():
+            try:
+                api.autocomplete_recipe_search('chick')
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=lookup) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(errors), 3)
+
+    def test_different_and_random_calls_are_not_coalesced(self):
+        api = API('test-key', sleep_time=0, coalescer=RequestCoalescer())
+        api.api_root = self.server.url
+        threads = [threading.Thread(target=api.get_recipe_information, args=(id,))
+                   for id in range(3)]
+        threads += [threading.Thread(target=api.get_a_random_food_joke) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertEqual(api.coalescer.coalesced, 0)
+
+    @requires_aiohttp
+    def test_coroutines_share_one_request(self):
+        api = AsyncAPI('test-key', sleep_time=0, coalescer=RequestCoalescer())
+        api.api_root = self.server.url
+
+        async def lookups():
+            async with api:
+                return await asyncio.gather(*[api.autocomplete_recipe_search('chick')
+                                              for _ in range(20)])
+
+        responses = asyncio.run(lookups())
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(api.coalescer.coalesced, 19)
+        self.assertTrue(all(response.status_code == 200 for response in responses))
+        self.assertNotIn('apiKey', responses[-1].url)
+
+    @requires_aiohttp
+    def test_follower_takes_over_a_cancelled_call(self):
+        api = AsyncAPI('test-key', sleep_time=0, coalescer=RequestCoalescer())
+        api.api_root = self.server.url
+
+        async def lookups():
+            async with api:
+                leader = asyncio.ensure_future(api.autocomplete_recipe_search('chick'))
+                await asyncio.sleep(0.05)
+                follower = asyncio.ensure_future(api.autocomplete_recipe_search('chick'))
+                await asyncio.sleep(0.05)
+                leader.cancel()
+                return await follower
+
+        response = asyncio.run(lookups())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(api.coalescer.coalesced, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
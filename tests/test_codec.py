@@ -0,0 +1,46 @@
+import json
+import unittest
+import requests
+from spoonacular import API, HTTPXTransport, codec
+from spoonacular.transport import Response, build_response
+from tests.fake_server import FakeSpoonacular
+
+
+class TestCodec(unittest.TestCase):
+
+    def tearDown(self):
+        codec.set_codec(codec.load_codec())
+
+    def test_codecs_agree(self):
+        payload = {'title': 'Crème brûlée', 'nutrients': [{'amount': 1.5, 'unit': 'g'}], 'vegan': False}
+        for name in codec.CODECS:
+            try:
+                json_codec = codec.load_codec(name)
+            except ImportError:
+                continue
+            encoded = json_codec.dumps(payload)
+            self.assertIsInstance(encoded, bytes)
+            self.assertEqual(json.loads(encoded), payload)
+            self.assertEqual(json_codec.loads(encoded), payload)
+
+    def test_responses_decode_with_current_codec(self):
+        calls = []
+        codec.set_codec(codec.JSONCodec('spy', lambda data: calls.append(data) or {}, codec.dumps))
+        self.assertEqual(build_response(200, {}, b'{"id": 1}').json(), {})
+        self.assertEqual(calls, [b'{"id": 1}'])
+        with self.assertRaises(requests.exceptions.JSONDecodeError):
+            codec.set_codec('json')
+            build_response(200, {}, b'<html>').json()
+
+    def test_json_bodies_are_encoded_by_every_transport(self):
+        with FakeSpoonacular() as server:
+            for transport in (None, HTTPXTransport(http2=False)):
+                with API('test-key', sleep_time=0, transport=transport) as api:
+                    api.api_root = server.url
+                    response = api.classify_grocery_products_batch([{'title': 'Milk'}])
+                    self.assertIsInstance(response, Response)
+                    self.assertEqual(json.loads(response.json()['body']), [{'title': 'Milk'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import unittest
+from spoonacular import API, AsyncAPI
+import inspect
+from spoonacular.endpoints import ENDPOINT_TABLE, ENDPOINTS, cost_function
+from spoonacular.mock import ROUTES
+
+
+class OfflineAPI(API):
+    def _send(self, endpoint, path, method, query_, params_, json_):
+        return endpoint, path, method
+
+
+class RequestAPI(API):
+    def _send(self, endpoint, path, method, query_, params_, json_):
+        return path, method, query_, params_, json_
+
+
+class TestEndpointRegistry(unittest.TestCase):
+
+    def test_every_endpoint_is_registered(self):
+        """ Each endpoint method is registered along with its quota """
+        for name, entry in ENDPOINTS.items():
+            self.assertTrue(hasattr(API, name), name)
+            self.assertEqual(entry.quota, API.endpoint_quotas[name])
+        self.assertIn('get_recipe_information', ENDPOINTS)
+
+    def test_table_matches_mock_routes(self):
+        routes = {name: (method, template) for method, template, name, _ in ROUTES}
+        for endpoint in ENDPOINT_TABLE:
+            if endpoint.name in routes:
+                self.assertEqual((endpoint.method, endpoint.path), routes[endpoint.name])
+
+    def test_methods_have_signature_and_docstring(self):
+        method = API.get_food_information
+        self.assertEqual(str(inspect.signature(method)), '(self, id, amount=None, unit=None)')
+        self.assertIn('get-food-information', method.__doc__)
+        self.assertEqual(method.__qualname__, 'API.get_food_information')
+        self.assertIs(method.endpoint, ENDPOINTS['get_food_information'])
+
+    def test_methods_place_arguments(self):
+        api = RequestAPI('test-key')
+        self.assertEqual(api.get_food_information(9040, unit='g'),
+                         ('food/ingredients/9040/information', 'GET', None, {'unit': 'g'}, None))
+        self.assertEqual(api.parse_ingredients('1 apple'),
+                         ('recipes/parseIngredients', 'POST',
+                          {'ingredientList': '1 apple', 'servings': '1'}, None, None))
+        self.assertEqual(api.classify_a_grocery_product({'title': 'milk'})[4], {'title': 'milk'})
+        self.assertEqual(api.map_ingredients_to_grocery_products('egg', 2)[4],
+                         {'ingredients': 'egg', 'servings': 2})
+        self.assertEqual(api.search_recipes_complex('pasta', cuisine='italian')[3],
+                         {'query': 'pasta', 'cuisine': 'italian'})
+
+    def test_cost_functions(self):
+        quota = {'requests': {'amount': 1, 'qualifier': ''},
+                 'tinyrequests': {'amount': 0, 'qualifier': ''},
+                 'results': {'amount': 0.5, 'qualifier': 'per recipe'}}
+        cost = cost_function(quota)
+        self.assertEqual(cost(params={'ids': '1,2,3,'}), {'requests': 1, 'tinyrequests': 0, 'results': 1.5})
+        self.assertEqual(cost(), {'requests': 1, 'tinyrequests': 0, 'results': 0})
+        api = API('test-key')
+        self.assertEqual(api.determineCostOfEndpoint('parse_ingredients',
+                                                     query={'ingredientList': '1 egg\n2 apples'}),
+                         ENDPOINTS['parse_ingredients'].cost({'ingredientList': '1 egg\n2 apples'}))
+        self.assertIsNotNone(api.determineCostOfEndpoint('search_menu_items'))
+        self.assertIsNone(api.determineCostOfEndpoint('not_an_endpoint'))
+
+    def test_make_request_receives_endpoint(self):
+        api = OfflineAPI('test-key')
+        self.assertEqual(api.get_recipe_information(1),
+                         ('get_recipe_information', 'recipes/1/information', 'GET'))
+        self.assertEqual(api.parse_ingredients('1 apple')[0], 'parse_ingredients')
+
+    def test_endpoint_is_per_thread(self):
+        results = []
+        api = OfflineAPI('test-key')
+        threads = [threading.Thread(target=lambda: results.append(api.quick_answer('q')[0]))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['quick_answer'] * 10)
+
+    def test_async_endpoint_is_resolved_at_call_time(self):
+        class OfflineAsyncAPI(AsyncAPI):
+            async def _send(self, endpoint, path, method, query_, params_, json_):
+                return endpoint
+
+        coroutine = OfflineAsyncAPI('test-key').get_wine_description('merlot')
+        result = asyncio.run(coroutine)
+        self.assertEqual(result, 'get_wine_description')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from spoonacular import API, RecipeExporter, RetryPolicy
+from tests.fake_server import FakeSpoonacular, bulk_recipes
+
+TOTAL_RESULTS = 230
+
+
+def search_page(request):
+    offset = int(request['params']['offset'][0])
+    number = int(request['params']['number'][0])
+    ids = range(offset, min(offset + number, TOTAL_RESULTS))
+    return {'results': [{'id': id} for id in ids], 'totalResults': TOTAL_RESULTS}
+
+
+class TestRecipeExporter(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSpoonacular(remaining={'requests': 10**6, 'results': 10**6}, responders={
+            '/recipes/complexSearch': search_page,
+            '/recipes/informationBulk': bulk_recipes}).__enter__()
+        self.api = API('test-key', sleep_time=0, retry=RetryPolicy(max_attempts=1))
+        self.api.api_root = self.server.url
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        shutil.rmtree(self.directory)
+
+    def exporter(self, name, **kwargs):
+        kwargs = dict(dict(page_size=50, chunk_size=20, max_workers=2, checkpoint_every=40), **kwargs)
+        return RecipeExporter(self.api, os.path.join(self.directory, name), **kwargs)
+
+    def read_ids(self, path, opener=open):
+        with opener(path, 'rt') as f:
+            return [json.loads(line)['id'] for line in f]
+
+    def test_exports_json_lines(self):
+        exporter = self.exporter('pasta.jsonl')
+        self.assertEqual(exporter.export('pasta', cuisine='italian'), TOTAL_RESULTS - 1)
+        self.assertEqual(self.read_ids(exporter.path), [id for id in range(TOTAL_RESULTS) if id != 13])
+        self.assertEqual(self.server.requests[0]['params']['cuisine'], ['italian'])
+        state = exporter.load_checkpoint()
+        self.assertTrue(state['done'])
+        self.assertEqual(state['offset'], TOTAL_RESULTS)
+        # A finished export isn't run again
+        calls = len(self.server.requests)
+        self.assertEqual(exporter.export('pasta', cuisine='italian'), TOTAL_RESULTS - 1)
+        self.assertEqual(len(self.server.requests), calls)
+
+    def test_resumes_after_a_crash(self):
+        for compress in (False, True):
+            self.server.requests[:] = []
+            exporter = self.exporter('pasta-{}.jsonl'.format(compress), compress=compress)
+            iter_recipe_information = self.api.iter_recipe_information
+
+            def crashing(*args, **kwargs):
+                for count, recipe in enumerate(iter_recipe_information(*args, **kwargs)):
+                    if count == 110:
+                        raise KeyboardInterrupt
+                    yield recipe
+
+            self.api.iter_recipe_information = crashing
+            with self.assertRaises(KeyboardInterrupt):
+                exporter.export('pasta', max_results=200)
+            del self.api.iter_recipe_information
+            state = exporter.load_checkpoint()
+            self.assertEqual(state['offset'], 80)
+            self.server.requests[:] = []
+            self.assertEqual(exporter.export('pasta', max_results=200), 199)
+            opener = gzip.open if compress else open
+            self.assertEqual(self.read_ids(exporter.path, opener), [id for id in range(200) if id != 13])
+            # Chunks the crashed export had in flight may still come in
+            first_search = next(request for request in self.server.requests
+                                if request['path'] == '/recipes/complexSearch')
+            self.assertEqual(int(first_search['params']['offset'][0]), state['offset'])
+
+    def test_other_export_in_checkpoint(self):
+        exporter = self.exporter('pasta.jsonl', checkpoint_every=10**6)
+        exporter.export('pasta', max_results=10)
+        with self.assertRaises(ValueError):
+            exporter.export('soup', max_results=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
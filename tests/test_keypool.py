@@ -0,0 +1,110 @@
+import asyncio
+import unittest
+from collections import Counter
+from spoonacular import API, AsyncAPI, KeyPool, QuotaAccountant, QuotaExceededError
+from spoonacular.mock import MockSpoonacular
+from tests.fake_server import requires_aiohttp
+
+KEYS = ['key-a', 'key-b', 'key-c']
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def keys_used(server):
+    return [request['params']['apiKey'][0] for request in server.requests]
+
+
+class TestKeyPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockSpoonacular(per_key=True).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def api(self, pool):
+        api = API(pool)
+        api.api_root = self.server.url
+        return api
+
+    def test_spreads_calls_by_remaining_quota(self):
+        pool = KeyPool(KEYS, sleep_time=None)
+        with self.api(pool) as api:
+            for _ in range(30):
+                api.get_random_food_trivia().raise_for_status()
+            self.assertEqual(Counter(keys_used(self.server)), dict.fromkeys(KEYS, 10))
+            self.assertEqual(api.callsRemaining['requests'], 3 * self.server.limits['requests'] - 30)
+
+    def test_exhausted_key_is_skipped(self):
+        self.server.balances['key-a'] = {'requests': 0, 'tinyrequests': 0, 'results': 0}
+        pool = KeyPool(KEYS, sleep_time=None)
+        with self.api(pool) as api:
+            for _ in range(6):
+                self.assertEqual(api.get_random_food_trivia().status_code, 200)
+        # The 402 answered to key-a was sent again with another key
+        self.assertEqual(keys_used(self.server).count('key-a'), 1)
+        self.assertEqual(len(self.server.requests), 7)
+        self.assertEqual(pool.stats()[0]['state'], 'exhausted')
+
+    def test_throttled_key_is_skipped_until_retry_after(self):
+        clock = FakeClock()
+        pool = KeyPool(KEYS[:2], sleep_time=None, clock=clock)
+        with self.api(pool) as api:
+            self.server.fail_next(429, headers={'Retry-After': '60'})
+            self.assertEqual(api.get_random_food_trivia().status_code, 200)
+            for _ in range(3):
+                api.get_random_food_trivia()
+            self.assertEqual(keys_used(self.server), ['key-a', 'key-b', 'key-b', 'key-b', 'key-b'])
+            self.assertEqual(pool.stats()[0]['state'], 'throttled')
+            clock.now = 61
+            api.get_random_food_trivia()
+            self.assertEqual(keys_used(self.server)[-1], 'key-a')
+
+    @requires_aiohttp
+    def test_async(self):
+        pool = KeyPool(KEYS, sleep_time=None)
+
+        async def main():
+            async with AsyncAPI(pool) as api:
+                api.api_root = self.server.url
+                return await asyncio.gather(*[api.get_random_food_trivia() for _ in range(9)])
+
+        responses = asyncio.run(main())
+        self.assertEqual([response.status_code for response in responses], [200] * 9)
+        self.assertEqual(set(keys_used(self.server)), set(KEYS))
+
+
+class TestKeyPoolReserve(unittest.TestCase):
+
+    def test_rate_limits_add_up(self):
+        """ Each key has its own rate limiter, so more keys take more calls per second """
+        for keys in (1, 4):
+            pool = KeyPool(['key-{}'.format(i) for i in range(keys)], sleep_time=0.1, clock=FakeClock())
+            waits = [pool.reserve()[1] for _ in range(8)]
+            self.assertAlmostEqual(max(waits), 0.1 * (8 // keys - 1))
+
+    def test_out_of_quota_until_reset(self):
+        clock = FakeClock()
+        pool = KeyPool(KEYS[:2], sleep_time=None, margin=0, clock=clock)
+        for pooled in pool.keys:
+            pooled.quota.remaining = {'requests': 1}
+            pooled.reset_at = 100
+        cost = {'requests': 1}
+        first, second = pool.reserve(cost)[0], pool.reserve(cost)[0]
+        self.assertNotEqual(first, second)
+        with self.assertRaises(QuotaExceededError):
+            pool.reserve(cost)
+        self.assertIsNone(pool.try_reserve(cost))
+        clock.now = 100
+        self.assertIsNotNone(pool.try_reserve(cost))
+
+    def test_rejects_shared_quota(self):
+        with self.assertRaises(ValueError):
+            API(KeyPool(KEYS), quota=QuotaAccountant())
@@ -0,0 +1,118 @@
+import asyncio
+import unittest
+from collections import Counter
+from spoonacular import (API, AsyncAPI, HTTPXTransport, Metrics, QuotaExceededError,
+                         RequestCoalescer, ResponseCache, RetryPolicy)
+from spoonacular.metrics import Histogram
+from tests.fake_server import FakeSpoonacular, requires_aiohttp
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSpoonacular().__enter__()
+        self.events = []
+        self.metrics = Metrics(callbacks=[self.events.append])
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def api(self, cls=API, **kwargs):
+        api = cls('test-key', sleep_time=0, metrics=self.metrics,
+                  retry=RetryPolicy(backoff_base=0.001), **kwargs)
+        api.api_root = self.server.url
+        return api
+
+    def test_call_events(self):
+        api = self.api(cache=ResponseCache())
+        api.get_recipe_information_bulk('1,2,3')
+        api.get_recipe_information_bulk('1,2,3')
+        self.server.fail_next(429)
+        api.parse_ingredients('1 apple')
+        fetched, hit, retried = self.events
+        self.assertEqual((fetched.endpoint, fetched.method, fetched.status, fetched.attempts),
+                         ('get_recipe_information_bulk', 'GET', 200, 1))
+        self.assertEqual(fetched.cache, 'miss')
+        self.assertEqual(fetched.quota['requests'], 3)
+        self.assertGreater(fetched.bytes, 0)
+        self.assertGreater(fetched.timings.total, 0)
+        self.assertIsNotNone(fetched.timings.ttfb)
+        self.assertEqual((hit.cache, hit.attempts, hit.quota, hit.bytes),
+                         ('hit', 0, {}, fetched.bytes))
+        self.assertEqual((retried.status, retried.attempts, retried.cache), (200, 2, None))
+
+    def test_failed_calls(self):
+        api = self.api()
+        api.callsRemaining = {'requests': 0, 'tinyrequests': 0, 'results': 0}
+        with self.assertRaises(QuotaExceededError):
+            api.get_recipe_information(1)
+        event, = self.events
+        self.assertEqual((event.status, event.error, event.attempts, event.quota),
+                         (None, 'QuotaExceededError', 0, {}))
+
+    def test_summary_and_prometheus(self):
+        api = self.api()
+        for id in range(4):
+            api.get_recipe_information(id)
+        self.server.fail_next(404)
+        api.get_recipe_information(5)
+        summary = self.metrics.summary()['get_recipe_information']
+        self.assertEqual(summary['calls'], 5)
+        self.assertEqual(summary['statuses'], {200: 4, 404: 1})
+        self.assertEqual(summary['quota'], {'requests': 5, 'tinyrequests': 0, 'results': 0})
+        self.assertLessEqual(summary['p50'], summary['p99'])
+        text = self.metrics.to_prometheus()
+        self.assertIn('# TYPE spoonacular_call_duration_seconds histogram', text)
+        self.assertIn('spoonacular_call_duration_seconds_bucket{endpoint="get_recipe_information",'
+                      'le="+Inf"} 5', text)
+        self.assertIn('spoonacular_calls_total{endpoint="get_recipe_information",status="404"} 1', text)
+        self.assertIn('spoonacular_quota_spent_total{endpoint="get_recipe_information",'
+                      'category="requests"} 5.0', text)
+
+    def test_httpx_timings(self):
+        with self.api(transport=HTTPXTransport(http2=False)) as api:
+            api.get_recipe_information(1)
+            api.get_recipe_information(2)
+        first, second = self.events
+        self.assertIsNotNone(first.timings.connect)
+        self.assertIsNone(second.timings.connect)  # Kept alive
+        self.assertLess(second.timings.ttfb, second.timings.total)
+
+    @requires_aiohttp
+    def test_async_timings(self):
+        async def calls():
+            async with self.api(AsyncAPI) as api:
+                await api.get_recipe_information(1)
+
+        asyncio.run(calls())
+        event, = self.events
+        self.assertEqual(event.status, 200)
+        self.assertIsNotNone(event.timings.connect)
+        self.assertIsNotNone(event.timings.ttfb)
+
+    @requires_aiohttp
+    def test_coalesced_calls(self):
+        async def calls():
+            async with self.api(AsyncAPI, coalescer=RequestCoalescer()) as api:
+                await asyncio.gather(*[api.get_recipe_information(1) for _ in range(5)])
+
+        asyncio.run(calls())
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(Counter((event.cache, event.attempts) for event in self.events),
+                         {('coalesced', 0): 4, (None, 1): 1})
+        self.assertEqual(self.metrics.summary()['get_recipe_information']['calls'], 5)
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_quantiles(self):
+        histogram = Histogram(buckets=(1, 2, 4))
+        for value in (0.5, 1.5, 1.5, 3, 10):
+            histogram.observe(value)
+        self.assertEqual(list(histogram.cumulative()), [(1, 1), (2, 3), (4, 4), (float('inf'), 5)])
+        self.assertEqual(histogram.quantile(0.5), 1.75)
+        self.assertEqual(histogram.quantile(1.0), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,234 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from urllib.parse import parse_qs
+from spoonacular import API, AsyncAPI, IngredientParser, MicroBatcher, ProductClassifier
+from tests.fake_server import FakeSpoonacular, requires_aiohttp
+
+
+def parse_ingredients(request):
+    """ Parses each line except the ones mentioning unicorns """
+    lines = parse_qs(request['body'])['ingredientList'][0].split('\n')
+    return [{'original': line, 'name': line.split()[-1]}
+            for line in lines if 'unicorn' not in line]
+
+
+def classify_products(request):
+    return [{'cleanTitle': product['title'].lower(), 'category': 'milk'}
+            for product in json.loads(request['body'])]
+
+
+def largest_loop_stall(coroutine_function, setup=None):
+    """ Runs a coroutine function, returning its result and the longest time the event loop was blocked
+
+    `setup` is called on the event loop before the measuring starts.
+    """
+    async def main():
+        if setup is not None:
+            setup()
+        stalls = [0.0]
+
+        async def tick():
+            while True:
+                start = time.monotonic()
+                await asyncio.sleep(0.005)
+                stalls.append(time.monotonic() - start - 0.005)
+
+        ticker = asyncio.ensure_future(tick())
+        await asyncio.sleep(0.01)
+        try:
+            return await coroutine_function(), max(stalls)
+        finally:
+            ticker.cancel()
+
+    return asyncio.run(main())
+
+
+def run_threads(target, args):
+    threads = [threading.Thread(target=target, args=(arg,)) for arg in args]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def test_batches_fill_up_or_time_out(self):
+        batches = []
+        batcher = MicroBatcher(lambda group, items: batches.append(items) or items,
+                               max_size=4, max_wait=0.05)
+        futures = [batcher.submit(i) for i in range(10)]
+        self.assertEqual([future.result(timeout=1) for future in futures], list(range(10)))
+        self.assertEqual(batches, [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]])
+
+    def test_groups_and_errors(self):
+        def send(group, items):
+            if group == 'bad':
+                raise RuntimeError(group)
+            return [ValueError(item) if item < 0 else item for item in items]
+
+        batcher = MicroBatcher(send, max_wait=0.01)
+        good, failed, bad = batcher.submit(1), batcher.submit(-1), batcher.submit(2, group='bad')
+        self.assertEqual(good.result(timeout=1), 1)
+        self.assertIsInstance(failed.exception(timeout=1), ValueError)
+        self.assertIsInstance(bad.exception(timeout=1), RuntimeError)
+        self.assertEqual(batcher.batches_sent, 2)
+
+    def test_missing_results_fail_the_batch(self):
+        batcher = MicroBatcher(lambda group, items: items[:-1], max_size=3, max_wait=1)
+        futures = [batcher.submit(i) for i in range(3)]
+        self.assertTrue(all(isinstance(future.exception(timeout=1), LookupError) for future in futures))
+
+    def test_full_async_batch_is_sent_off_the_loop(self):
+        batcher = MicroBatcher(lambda group, items: time.sleep(0.2) or items, max_size=4, max_wait=1)
+        results, stall = largest_loop_stall(lambda: asyncio.gather(*[batcher.submit_async(i) for i in range(8)]))
+        self.assertEqual(results, list(range(8)))
+        self.assertEqual(batcher.batches_sent, 2)
+        self.assertLess(stall, 0.1)
+
+
+class TestIngredientParser(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSpoonacular(latency=0.02, responders={
+            '/recipes/parseIngredients': parse_ingredients}).__enter__()
+        self.api = API('test-key', sleep_time=0)
+        self.api.api_root = self.server.url
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_concurrent_lines_share_requests(self):
+        parser = IngredientParser(self.api, max_size=10, max_wait=0.1)
+        lines = ['{} cups of flour{}'.format(i, i) for i in range(30)]
+        results = {}
+        run_threads(lambda line: results.update({line: parser.parse(line, servings=2)}), lines)
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertTrue(all(results[line]['original'] == line for line in lines))
+        self.assertIn('servings=2', self.server.requests[0]['body'])
+
+    def test_unparsed_lines_fail_alone(self):
+        parser = IngredientParser(self.api, max_wait=0.05)
+        lines = ['1 apple', '1 unicorn horn', '2 eggs']
+        results = {}
+
+        def parse(line):
+            try:
+                results[line] = parser.parse(line)['name']
+            except LookupError as e:
+                results[line] = e
+
+        run_threads(parse, lines)
+        self.assertEqual(results['1 apple'], 'apple')
+        self.assertEqual(results['2 eggs'], 'eggs')
+        self.assertIsInstance(results['1 unicorn horn'], LookupError)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_coroutines(self):
+        parser = IngredientParser(self.api, max_wait=0.05)
+
+        async def parse_all():
+            return await asyncio.gather(*[parser.parse_async('{} eggs'.format(i))
+                                          for i in range(5)])
+
+        parsed = asyncio.run(parse_all())
+        self.assertEqual([ingredient['original'] for ingredient in parsed],
+                         ['{} eggs'.format(i) for i in range(5)])
+        self.assertEqual(len(self.server.requests), 1)
+
+    @requires_aiohttp
+    def test_async_api(self):
+        server = FakeSpoonacular(latency=0.2, responders={
+            '/recipes/parseIngredients': parse_ingredients}).__enter__()
+        self.addCleanup(server.__exit__, None, None, None)
+        api = AsyncAPI('test-key', sleep_time=0)
+        api.api_root = server.url
+        parser = IngredientParser(api, max_size=10, max_wait=0.05)
+        lines = ['{} eggs'.format(i) for i in range(25)]
+
+        async def parse_all():
+            async with api:
+                return await asyncio.gather(*[parser.parse_async(line) for line in lines])
+
+        # Creating the session blocks the loop once
+        parsed, stall = largest_loop_stall(parse_all, setup=api._get_client)
+        self.assertEqual([ingredient['original'] for ingredient in parsed], lines)
+        self.assertEqual(len(server.requests), 3)
+        self.assertLess(stall, 0.1)
+        with self.assertRaises(TypeError):
+            parser.parse('1 apple')
+
+    def test_rejects_multiple_lines(self):
+        with self.assertRaises(ValueError):
+            IngredientParser(self.api).parse('1 apple\n2 eggs')
+
+
+class TestProductClassifier(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSpoonacular(latency=0.02, responders={
+            '/food/products/classifyBatch': classify_products}).__enter__()
+        self.api = API('test-key', sleep_time=0)
+        self.api.api_root = self.server.url
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_concurrent_products_share_requests(self):
+        classifier = ProductClassifier(self.api, max_size=8, max_wait=0.1)
+        titles = ['Milk {}'.format(i) for i in range(16)]
+        results = {}
+        run_threads(lambda title: results.update(
+            {title: classifier.classify({'title': title, 'upc': '', 'plu_code': ''})}), titles)
+        self.assertEqual([request['path'] for request in self.server.requests],
+                         ['/food/products/classifyBatch'] * 2)
+        self.assertTrue(all(results[title]['cleanTitle'] == title.lower() for title in titles))
+
+    def test_coroutines(self):
+        classifier = ProductClassifier(self.api, max_wait=0.05)
+
+        async def classify_all():
+            return await asyncio.gather(*[classifier.classify_async({'title': 'Milk {}'.format(i)})
+                                          for i in range(5)])
+
+        classified = asyncio.run(classify_all())
+        self.assertEqual([product['cleanTitle'] for product in classified],
+                         ['milk {}'.format(i) for i in range(5)])
+        self.assertEqual(len(self.server.requests), 1)
+
+    @requires_aiohttp
+    def test_async_api(self):
+        server = FakeSpoonacular(latency=0.2, responders={
+            '/food/products/classifyBatch': classify_products}).__enter__()
+        self.addCleanup(server.__exit__, None, None, None)
+        api = AsyncAPI('test-key', sleep_time=0)
+        api.api_root = server.url
+        classifier = ProductClassifier(api, max_size=10, max_wait=0.05)
+        titles = ['Milk {}'.format(i) for i in range(25)]
+
+        async def classify_all():
+            async with api:
+                return await asyncio.gather(*[classifier.classify_async({'title': title})
+                                              for title in titles])
+
+        # Creating the session blocks the loop once
+        classified, stall = largest_loop_stall(classify_all, setup=api._get_client)
+        self.assertEqual([product['cleanTitle'] for product in classified],
+                         [title.lower() for title in titles])
+        self.assertEqual(len(server.requests), 3)
+        self.assertLess(stall, 0.1)
+        with self.assertRaises(TypeError):
+            classifier.classify({'title': 'Milk'})
+
+    def test_mismatched_response_fails_the_batch(self):
+        self.server.responders['/food/products/classifyBatch'] = lambda request: []
+        classifier = ProductClassifier(self.api, max_wait=0.01)
+        with self.assertRaises(LookupError):
+            classifier.classify({'title': 'Milk'})
+
+
+if __name__ == '__main__':
+    unittest.main()
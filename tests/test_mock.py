@@ -0,0 +1,86 @@
+import inspect
+import unittest
+from spoonacular import API, RetryPolicy
+from spoonacular.endpoints import ENDPOINTS
+from spoonacular.mock import MockSpoonacular
+
+SAMPLE_ARGS = {
+    'id': 716429, 'ids': '715538,716429', 'upc': '041631000564', 'q': 'How much vitamin c is in 2 apples?',
+    'product': {'title': 'Kroger Vitamin A & D Reduced Fat 2% Milk', 'upc': '', 'plu_code': ''},
+    'products': [{'title': 'Kroger Milk', 'upc': '', 'plu_code': ''}, {'title': 'Eggs', 'upc': '', 'plu_code': ''}],
+    'ingredients': '1 apple\n2 eggs', 'ingredientList': '1 apple\n2 eggs', 'servings': 2,
+    'instructions': 'Put the garlic in a pan.', 'url': 'https://example.com/recipe', 'wine': 'merlot',
+    'food': 'steak', 'targetCalories': 2000, 'timeFrame': 'day', 'ingredientName': 'flour',
+    'targetUnit': 'grams', 'title': 'Spaghetti Aglio et Olio', 'text': 'I want a cheeseburger.',
+    'query': 'pasta',
+}
+# Endpoints answered by another endpoint's path
+SHARED_PATHS = {'match_recipes_to_daily_calories': 'generate_meal_plan'}
+
+
+class TestMockSpoonacular(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockSpoonacular(limits={'requests': 10**6, 'results': 10**6}).__enter__()
+        self.api = API('test-key', sleep_time=0, retry=RetryPolicy(max_attempts=1))
+        self.api.api_root = self.server.url
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_every_endpoint_has_a_fixture(self):
+        for name in ENDPOINTS:
+            method = getattr(self.api, name)
+            parameters = inspect.signature(method).parameters.values()
+            kwargs = {p.name: SAMPLE_ARGS[p.name] for p in parameters
+                      if p.default is p.empty and p.kind is p.POSITIONAL_OR_KEYWORD}
+            response = method(**kwargs)
+            self.assertEqual(response.status_code, 200, name)
+            self.assertTrue(response.content, name)
+            if 'visualize' not in name:
+                response.json()
+            self.assertEqual(self.server.requests[-1]['endpoint'], SHARED_PATHS.get(name, name))
+
+    def test_quota_headers_follow_endpoint_costs(self):
+        self.api.get_recipe_information_bulk('1,2,3')
+        self.assertEqual(self.api.callsRemaining['requests'], 10**6 - 3)
+        self.api.search_recipes_complex('pasta', number=20)
+        cost = self.api.determineCostOfEndpoint('search_recipes_complex', params={'number': 20})
+        self.assertEqual(self.server.remaining['requests'], 10**6 - 3 - cost['requests'])
+        self.assertEqual(self.server.remaining['results'], 10**6 - cost['results'])
+
+    def test_exhausted_quota_is_refused(self):
+        self.server.remaining['requests'] = 2
+        response = self.api.get_recipe_information_bulk('1,2,3')
+        self.assertEqual(response.status_code, 402)
+        self.assertEqual(response.headers['X-RateLimit-requests-Remaining'], '2')
+
+    def test_injected_failures(self):
+        self.server.rate_limit_rate = 1.0
+        response = self.api.get_recipe_information(1)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.server.rate_limit_rate, self.server.error_rate = 0.0, 1.0
+        self.assertIn(self.api.get_recipe_information(1).status_code, (500, 502, 503))
+        self.assertEqual(self.server.remaining['requests'], 10**6)
+
+    def test_search_pages(self):
+        self.server.total_results = 25
+        page = self.api.search_recipes_complex('pasta', offset=20, number=10).json()
+        self.assertEqual([recipe['id'] for recipe in page['results']], list(range(20, 25)))
+        self.assertEqual(page['totalResults'], 25)
+
+
+    def test_ingredient_list(self):
+        response = self.api.map_ingredients_to_grocery_products(['1 apple', '2 eggs'], 2)
+        self.assertEqual([item['original'] for item in response.json()], ['1 apple', '2 eggs'])
+
+    def test_fixture_error_is_a_500(self):
+        self.server.responders['/recipes/716429/information'] = lambda request: 1 / 0
+        response = self.api.get_recipe_information(716429)
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('ZeroDivisionError', response.json()['message'])
+
+
+if __name__ == '__main__':
+    unittest.main()
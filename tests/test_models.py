@@ -0,0 +1,57 @@
+import json
+import unittest
+import requests
+from spoonacular import Ingredient, Recipe, WinePairing
+from spoonacular.transport import build_response
+
+RECIPE = {
+    'id': 716429, 'title': 'Pasta with Garlic', 'readyInMinutes': 45, 'servings': 2,
+    'extendedIngredients': [{'id': 1001, 'name': 'butter', 'amount': 1.0, 'unit': 'tbsp'},
+                            {'id': 11215, 'name': 'garlic', 'amount': 5.0, 'unit': 'cloves'}],
+    'nutrition': {'nutrients': [{'name': 'Calories', 'amount': 584.5, 'unit': 'kcal'}]},
+    'spoonacularScore': 83.0,
+}
+
+
+class TestModels(unittest.TestCase):
+
+    def test_decodes_lazily_and_once(self):
+        raw = json.dumps(RECIPE).encode()
+        recipe = Recipe.from_response(build_response(200, {}, raw))
+        self.assertIsNone(recipe._data)
+        self.assertIs(recipe.raw, raw)
+        self.assertEqual(recipe.ready_in_minutes, 45)
+        data = recipe.data
+        self.assertEqual(recipe.title, 'Pasta with Garlic')
+        self.assertIs(recipe.data, data)
+
+    def test_nested_fields_are_wrapped_once(self):
+        recipe = Recipe(RECIPE)
+        ingredients = recipe.extended_ingredients
+        self.assertIsInstance(ingredients[0], Ingredient)
+        self.assertEqual([ingredient.name for ingredient in ingredients], ['butter', 'garlic'])
+        self.assertIs(recipe.extended_ingredients, ingredients)
+        self.assertEqual(recipe.nutrition.nutrients[0].amount, 584.5)
+
+    def test_undeclared_and_missing_keys(self):
+        recipe = Recipe(RECIPE)
+        self.assertEqual(recipe['spoonacularScore'], 83.0)
+        self.assertIsNone(recipe.source_url)
+        self.assertIsNone(WinePairing({}).product_matches)
+        self.assertFalse(hasattr(recipe, '__dict__'))
+        with self.assertRaises(AttributeError):
+            recipe.title = 'Something else'
+
+    def test_response_list(self):
+        response = build_response(200, {}, json.dumps([RECIPE, dict(RECIPE, id=1)]).encode())
+        recipes = Recipe.from_response_list(response)
+        self.assertEqual([recipe.id for recipe in recipes], [716429, 1])
+        self.assertEqual(json.loads(recipes[1].raw)['id'], 1)
+
+    def test_error_responses_raise(self):
+        with self.assertRaises(requests.HTTPError):
+            Recipe.from_response(build_response(404, {}, b'{}'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import time
+import unittest
+from spoonacular import API, AsyncAPI, QuotaExceededError
+from tests.fake_server import FakeSpoonacular, requires_aiohttp
+
+TOTAL_RESULTS = 250
+
+
+def search_page(request):
+    offset = int(request['params']['offset'][0])
+    number = int(request['params']['number'][0])
+    ids = range(offset, min(offset + number, TOTAL_RESULTS))
+    return {'results': [{'id': id} for id in ids], 'offset': offset,
+            'number': number, 'totalResults': TOTAL_RESULTS}
+
+
+class TestSearchPagination(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSpoonacular(remaining={'results': 10000}, responders={
+            '/recipes/complexSearch': search_page}).__enter__()
+        self.api = API('test-key', sleep_time=0)
+        self.api.api_root = self.server.url
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def pages(self):
+        return [(int(r['params']['offset'][0]), int(r['params']['number'][0]))
+                for r in self.server.requests]
+
+    def test_stops_at_total_results(self):
+        recipes = self.api.iter_search_recipes_complex('pasta', page_size=100, cuisine='italian')
+        self.assertEqual([recipe['id'] for recipe in recipes], list(range(TOTAL_RESULTS)))
+        self.assertEqual(self.pages(), [(0, 100), (100, 100), (200, 50)])
+        self.assertEqual(self.server.requests[0]['params']['cuisine'], ['italian'])
+
+    def test_max_results(self):
+        recipes = list(self.api.iter_search_recipes_complex('pasta', max_results=130,
+                                                            page_size=50, offset=10))
+        self.assertEqual(len(recipes), 130)
+        self.assertEqual(recipes[0]['id'], 10)
+        self.assertEqual(self.pages(), [(10, 50), (60, 50), (110, 30)])
+
+    def test_stopping_early_doesnt_wait_for_the_next_page(self):
+        self.server.latency = 0.2
+        recipes = self.api.iter_search_recipes_complex('pasta', page_size=10)
+        self.assertEqual(next(recipes)['id'], 0)
+        start = time.monotonic()
+        recipes.close()
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_quota_checked_before_each_page(self):
+        self.api.callsRemaining = {'requests': 100, 'tinyrequests': 100, 'results': 60}
+        with self.assertRaises(QuotaExceededError):
+            list(self.api.iter_search_recipes_complex('pasta', page_size=100))
+        self.assertEqual(self.server.requests, [])
+
+    def test_number_is_rejected(self):
+        with self.assertRaises(TypeError):
+            list(self.api.iter_search_recipes_complex('pasta', number=10))
+
+    @requires_aiohttp
+    def test_async(self):
+        async def recipes():
+            async with AsyncAPI('test-key', sleep_time=0) as api:
+                api.api_root = self.server.url
+                return [recipe async for recipe in api.iter_search_recipes_complex(
+                    'pasta', max_results=130, page_size=50)]
+
+        recipes = asyncio.run(recipes())
+        self.assertEqual([recipe['id'] for recipe in recipes], list(range(130)))
+        self.assertEqual(self.pages(), [(0, 50), (50, 50), (100, 30)])
+
+
+if __name__ == '__main__':
+    unittest.main()
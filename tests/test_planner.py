@@ -0,0 +1,80 @@
+import unittest
+from spoonacular import API, CostModel
+from spoonacular.planner import _load_numpy
+
+LIMITS = {'requests': 150, 'tinyrequests': 1500, 'results': 1500}
+
+
+def planned_calls():
+    return ([('get_recipe_information_bulk', {'ids': list(range(40))})] * 10 +
+            [('search_recipes_complex', {'query': 'pasta', 'number': 100, 'cuisine': 'italian'})] * 5 +
+            [('quick_answer', {'q': 'How much vitamin c is in 2 apples?'})] * 3 +
+            [('get_recipe_information_bulk', {'ids': ','.join(str(id) for id in range(200))})])
+
+
+class TestCostModel(unittest.TestCase):
+
+    def setUp(self):
+        self.model = CostModel(use_numpy=False)
+
+    def test_costs_match_single_call_estimates(self):
+        api = API('test-key')
+        calls = [('get_recipe_information_bulk', {'ids': '1,2,3', 'includeNutrition': True}),
+                 ('search_recipes_complex', {'query': 'pasta', 'number': 20}),
+                 ('parse_ingredients', {'ingredientList': '1 egg\n2 apples', 'servings': 1}),
+                 ('classify_grocery_products_batch', {'products': [{'title': 'milk'}] * 4}),
+                 ('map_ingredients_to_grocery_products', {'ingredients': 'egg\nflour', 'servings': 2}),
+                 ('get_wine_recommendation', {'wine': 'merlot', 'number': 2}),
+                 ('search_menu_items', {'query': 'burger'}),
+                 ('quick_answer', {'q': 'q'})]
+        expected = [api.determineCostOfEndpoint('get_recipe_information_bulk', params={'ids': '1,2,3'}),
+                    api.determineCostOfEndpoint('search_recipes_complex', params={'number': 20}),
+                    api.determineCostOfEndpoint('parse_ingredients',
+                                                query={'ingredientList': '1 egg\n2 apples'}),
+                    api.determineCostOfEndpoint('classify_grocery_products_batch', json=[{}] * 4),
+                    api.determineCostOfEndpoint('map_ingredients_to_grocery_products',
+                                                json={'ingredients': 'egg\nflour'}),
+                    api.determineCostOfEndpoint('get_wine_recommendation', params={'number': 2}),
+                    api.determineCostOfEndpoint('search_menu_items'),
+                    api.determineCostOfEndpoint('quick_answer')]
+        self.assertEqual(self.model.costs(calls), [list(cost.values()) for cost in expected])
+        self.assertEqual(self.model.total(calls),
+                         {category: sum(cost[category] for cost in expected) for category in LIMITS})
+
+    def test_total_counts(self):
+        total = self.model.total_counts({'search_recipes_complex': 1000, 'quick_answer': 10},
+                                        kwargs={'search_recipes_complex': {'number': 100}})
+        self.assertEqual(total, {'requests': 3010, 'tinyrequests': 0, 'results': 100000})
+        with self.assertRaises(ValueError):
+            self.model.total([('not_an_endpoint', {})])
+
+    def test_schedule_fits_each_day_in_order(self):
+        schedule = self.model.schedule(planned_calls(), LIMITS, remaining={'requests': 50})
+        self.assertEqual(schedule.days, [[0], [1, 2, 3], [4, 5, 6], list(range(7, 18))])
+        self.assertEqual(schedule.unschedulable, [18])  # 200 recipes cost more than a day
+        self.assertEqual(schedule.costs[0]['requests'], 40)
+        self.assertEqual(schedule.costs[3], {'requests': 138, 'tinyrequests': 0, 'results': 500})
+        for cost in schedule.costs:
+            self.assertTrue(all(cost[category] <= LIMITS[category] for category in LIMITS))
+
+    def test_schedule_with_nothing_left_today(self):
+        schedule = self.model.schedule(planned_calls()[:3], LIMITS, remaining={'requests': 0}, max_days=2)
+        self.assertEqual(schedule.days, [[], [0, 1, 2]])
+        schedule = self.model.schedule(planned_calls(), LIMITS, max_days=1)
+        self.assertEqual(schedule.days, [[0, 1, 2]])
+
+    @unittest.skipIf(_load_numpy() is None, "NumPy is not installed")
+    def test_numpy_matches_pure_python(self):
+        model = CostModel(use_numpy=True)
+        calls = planned_calls() * 20
+        self.assertEqual(model.costs(calls).tolist(), self.model.costs(calls))
+        self.assertEqual(model.total(calls), self.model.total(calls))
+        counts = {'get_recipe_information_bulk': 3, 'quick_answer': 2}
+        self.assertEqual(model.total_counts(counts), self.model.total_counts(counts))
+        for remaining in (None, {'requests': 10}):
+            self.assertEqual(model.schedule(calls, LIMITS, remaining),
+                             self.model.schedule(calls, LIMITS, remaining))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import threading
+import unittest
+from spoonacular import API, QuotaAccountant, QuotaExceededError
+from tests.fake_server import FakeSpoonacular
+
+
+class TestQuotaAccountant(unittest.TestCase):
+
+    def test_unknown_balance_allows_calls(self):
+        quota = QuotaAccountant()
+        self.assertIsNone(quota.available())
+        quota.reserve({'requests': 100})
+
+    def test_refuses_over_budget(self):
+        quota = QuotaAccountant(remaining={'requests': 10, 'results': 0}, margin=2)
+        quota.reserve({'requests': 8, 'results': 0})
+        with self.assertRaises(QuotaExceededError):
+            quota.reserve({'requests': 1, 'results': 0})
+
+    def test_calls_in_flight_are_held(self):
+        quota = QuotaAccountant(remaining={'requests': 10}, margin=0)
+        quota.reserve({'requests': 6})
+        self.assertFalse(quota.try_reserve({'requests': 6}))
+        quota.release({'requests': 6}, {'X-RateLimit-requests-Remaining': '4'})
+        self.assertEqual(quota.available(), {'requests': 4})
+        self.assertFalse(quota.try_reserve({'requests': 5}))
+
+    def test_failed_call_is_refunded(self):
+        quota = QuotaAccountant(remaining={'requests': 10}, margin=0)
+        quota.reserve({'requests': 10})
+        quota.release({'requests': 10}, None)
+        self.assertEqual(quota.available(), {'requests': 10})
+
+    def test_not_enforced(self):
+        quota = QuotaAccountant(remaining={'requests': 0}, enforce=False)
+        quota.reserve({'requests': 3})
+        self.assertEqual(quota.available(), {'requests': -8})
+
+    def test_queued_call_waits_for_refresh(self):
+        quota = QuotaAccountant(remaining={'requests': 0}, margin=0, wait=True, timeout=5)
+        timer = threading.Timer(0.1, setattr, (quota, 'remaining', {'requests': 5}))
+        timer.start()
+        quota.reserve({'requests': 1})
+        self.assertEqual(quota.available(), {'requests': 4})
+
+    def test_queued_call_times_out(self):
+        quota = QuotaAccountant(remaining={'requests': 0}, wait=True, timeout=0.05)
+        with self.assertRaises(QuotaExceededError):
+            quota.reserve({'requests': 1})
+
+
+class TestAPIQuota(unittest.TestCase):
+
+    def test_cost_of_endpoint(self):
+        api = API('test-key')
+        cost = api.determineCostOfEndpoint('get_recipe_information_bulk',
+                                           params={'ids': ['715538,716429']})
+        self.assertEqual(cost['requests'], 2)
+        cost = api.determineCostOfEndpoint('search_recipes_complex', params={'query': 'x'})
+        self.assertEqual(cost['results'], 10)
+        cost = api.determineCostOfEndpoint('map_ingredients_to_grocery_products',
+                                           json={'ingredients': ['eggs', 'bacon']})
+        self.assertEqual(cost['requests'], 2)
+
+    def test_balance_follows_response_headers(self):
+        with FakeSpoonacular(remaining={'requests': 50, 'tinyrequests': 50,
+                                        'results': 50}) as server:
+            api = API('test-key', sleep_time=0)
+            api.api_root = server.url
+            self.assertIsNone(api.callsRemaining)
+            api.get_recipe_information(1)
+            self.assertEqual(api.callsRemaining,
+                             {'requests': 49, 'tinyrequests': 50, 'results': 50})
+
+    def test_over_budget_call_is_not_sent(self):
+        with FakeSpoonacular() as server:
+            api = API('test-key', sleep_time=0)
+            api.api_root = server.url
+            api.callsRemaining = {'requests': 6, 'tinyrequests': 100, 'results': 100}
+            with self.assertRaises(QuotaExceededError):
+                api.get_recipe_information_bulk('1,2,3')
+            self.assertEqual(server.requests, [])
+
+            api = API('test-key', sleep_time=0, allow_extra_calls=True)
+            api.api_root = server.url
+            api.callsRemaining = {'requests': 6, 'tinyrequests': 100, 'results': 100}
+            self.assertEqual(api.get_recipe_information_bulk('1,2,3').status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
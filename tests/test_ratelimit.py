@@ -0,0 +1,89 @@
+import threading
+import time
+import unittest
+from spoonacular import API, RateLimiter, TokenBucket
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_wait(self):
+        """ A full bucket allows a burst, then callers wait for refills """
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+        waits = [bucket.reserve() for _ in range(5)]
+        self.assertEqual(waits, [0, 0, 0, 0.5, 1.0])
+
+    def test_delay_takes_no_tokens(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=1, clock=clock)
+        self.assertEqual(bucket.delay(), 0)
+        bucket.reserve()
+        self.assertEqual(bucket.delay(), 0.5)
+        self.assertEqual(bucket.delay(), 0.5)
+        self.assertEqual(bucket.delay(5), 0.5)  # Capped at a full bucket
+
+    def test_refill_is_capped(self):
+        """ Idle time never stores more than `capacity` tokens """
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=2, clock=clock)
+        clock.now += 60
+        self.assertEqual(bucket.tokens, 2)
+
+    def test_try_acquire(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, capacity=1, clock=clock)
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        clock.now += 1
+        self.assertTrue(bucket.try_acquire())
+
+    def test_threads_share_one_bucket(self):
+        """ Many threads are throttled together, not each on its own """
+        bucket = TokenBucket(rate=50, capacity=5)
+        threads = [threading.Thread(target=bucket.acquire) for _ in range(30)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+        self.assertGreaterEqual(elapsed, (30 - 5) / 50.0 * 0.9)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_category_limits(self):
+        """ A call waits on whichever quota category is short """
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_second=100, burst=10, clock=clock,
+                              category_limits={'results': (1, 5)})
+        self.assertEqual(limiter.reserve({'requests': 1, 'results': 5}), 0)
+        self.assertEqual(limiter.reserve({'requests': 1, 'results': 2}), 2)
+        self.assertEqual(limiter.reserve({'requests': 1, 'results': 0}), 0)
+
+    def test_no_limit(self):
+        limiter = RateLimiter()
+        self.assertEqual(limiter.reserve(), 0)
+
+    def test_api_default_limiter(self):
+        """ The API builds its limiter from `sleep_time` """
+        api = API('test-key', sleep_time=0.25)
+        self.assertEqual(api.rate_limiter.bucket.rate, 4)
+        self.assertIsNone(API('test-key', sleep_time=0).rate_limiter.bucket)
+
+    def test_api_default_burst(self):
+        limiter = API('test-key', sleep_time=0.25, burst=3).rate_limiter
+        self.assertEqual([limiter.reserve() for _ in range(3)], [0, 0, 0])
+        self.assertGreater(limiter.reserve(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
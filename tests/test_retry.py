@@ -0,0 +1,82 @@
+import unittest
+import requests
+from spoonacular import API, RetryBudget, RetryPolicy
+from spoonacular.transport import build_response
+from tests.fake_server import FakeSpoonacular
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_full_jitter_is_capped(self):
+        policy = RetryPolicy(backoff_base=1, backoff_cap=5)
+        for attempt in range(10):
+            self.assertLessEqual(policy.backoff(attempt), min(5, 2 ** attempt))
+
+    def test_retry_after(self):
+        policy = RetryPolicy(max_attempts=5, backoff_cap=10)
+        response = build_response(429, {'Retry-After': '2'}, b'')
+        self.assertEqual(policy.delay(0, response=response), 2)
+        response = build_response(503, {'Retry-After': '60'}, b'')
+        self.assertIsNone(policy.delay(0, response=response))
+
+    def test_what_is_retried(self):
+        policy = RetryPolicy(max_attempts=2)
+        self.assertIsNotNone(policy.delay(0, error=requests.exceptions.Timeout()))
+        self.assertIsNone(policy.delay(0, error=ValueError()))
+        self.assertIsNone(policy.delay(0, response=build_response(404, {}, b'')))
+        self.assertIsNone(policy.delay(1, response=build_response(503, {}, b'')))
+
+    def test_non_idempotent_calls(self):
+        policy = RetryPolicy(max_attempts=2)
+        self.assertIsNone(policy.delay(0, response=build_response(503, {}, b''), method='POST'))
+        self.assertIsNone(policy.delay(0, error=requests.exceptions.ReadTimeout(), method='POST'))
+        self.assertIsNotNone(policy.delay(0, response=build_response(429, {}, b''), method='POST'))
+        self.assertIsNotNone(policy.delay(0, error=requests.exceptions.ConnectTimeout(), method='POST'))
+        policy = RetryPolicy(max_attempts=2, methods=('GET', 'POST'))
+        self.assertIsNotNone(policy.delay(0, response=build_response(503, {}, b''), method='POST'))
+
+    def test_budget_stops_retry_storms(self):
+        budget = RetryBudget(ratio=0.25, min_retries_per_second=0)
+        policy = RetryPolicy(max_attempts=10, budget=budget)
+        failed = build_response(503, {}, b'')
+        retries = sum(policy.delay(0, response=failed) is not None for _ in range(100))
+        self.assertEqual(retries, 25)
+
+
+class TestAPIRetry(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSpoonacular().__enter__()
+        retry = RetryPolicy(max_attempts=3, backoff_base=0.01)
+        self.api = API('test-key', sleep_time=0, retry=retry)
+        self.api.api_root = self.server.url
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_transient_errors_are_retried(self):
+        self.server.fail_next(503)
+        self.server.fail_next(429, headers={'Retry-After': '0'})
+        response = self.api.get_wine_description('merlot')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_posts_are_not_sent_twice(self):
+        self.server.fail_next(503)
+        self.assertEqual(self.api.parse_ingredients('1 apple').status_code, 503)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_last_response_returned_when_attempts_run_out(self):
+        self.server.fail_next(500, count=5)
+        self.assertEqual(self.api.get_wine_description('merlot').status_code, 500)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_connection_errors_are_raised_after_retries(self):
+        self.api.api_root = 'http://127.0.0.1:9/'
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.api.get_wine_description('merlot')
+        self.assertEqual(self.api.quota._pending['requests'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from spoonacular import API, AsyncAPI, PriorityScheduler, QuotaAccountant, QuotaExceededError, RateLimiter
+from spoonacular.scheduler import PriorityClass
+from spoonacular.transport import build_response
+
+
+class OfflineAPI(API):
+    """ Answers every call locally, recording the order calls were sent in """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def _transmit(self, path, method, query_, params_, json_):
+        with self._lock:
+            self.sent.append(path)
+        return build_response(200, {'Content-Type': 'application/json'}, b'{}')
+
+
+class TestPriorityScheduler(unittest.TestCase):
+
+    def test_classify(self):
+        scheduler = PriorityScheduler()
+        self.assertEqual(scheduler.classify('quick_answer'), 'interactive')
+        self.assertEqual(scheduler.classify('get_recipe_information_bulk'), 'background')
+        self.assertEqual(scheduler.classify('get_recipe_information'), 'default')
+        with scheduler.priority('background'):
+            self.assertEqual(scheduler.classify('get_recipe_information'), 'background')
+        self.assertEqual(scheduler.classify('get_recipe_information'), 'default')
+        with self.assertRaises(ValueError):
+            with scheduler.priority('urgent'):
+                pass
+
+    def test_interactive_calls_jump_the_crawl(self):
+        """ Interactive calls go out next, however many crawl calls are queued """
+        scheduler = PriorityScheduler()
+        api = OfflineAPI('test-key', rate_limiter=RateLimiter(requests_per_second=50),
+                         scheduler=scheduler)
+        crawl = [threading.Thread(target=api.get_recipe_information_bulk, args=(str(i),))
+                 for i in range(20)]
+        for thread in crawl:
+            thread.start()
+        time.sleep(0.05)  # Let the crawl queue up
+        start = time.monotonic()
+        api.quick_answer('How much vitamin c is in 2 apples?')
+        latency = time.monotonic() - start
+        for thread in crawl:
+            thread.join()
+        self.assertLess(api.sent.index('recipes/quickAnswer'), 6)
+        self.assertLess(latency, 0.1)
+        self.assertEqual(scheduler.stats()['background']['admitted'], 20)
+        self.assertEqual(scheduler.stats()['interactive']['admitted'], 1)
+
+    def test_fair_queuing_by_weight(self):
+        """ Classes of the same priority take turns in proportion to their weights """
+        scheduler = PriorityScheduler(classes=[PriorityClass('a', 0, 1.0, 0.0, ['quick_answer']),
+                                               PriorityClass('b', 0, 3.0, 0.0, ['get_wine_description'])],
+                                      default='a')
+        for _ in range(8):
+            scheduler._enqueue('a', {'requests': 1})
+            scheduler._enqueue('b', {'requests': 1})
+        order = []
+        for _ in range(8):
+            ticket = scheduler._next(None)
+            scheduler._queues[ticket.name].remove(ticket)
+            scheduler._virtual = ticket.tag
+            order.append(ticket.name)
+        self.assertEqual(order.count('b'), 6)
+
+    def test_background_is_preempted_when_headroom_drops(self):
+        quota = QuotaAccountant(remaining={'requests': 100}, margin=0)
+        scheduler = PriorityScheduler(limits={'requests': 100}, wait=False)
+        api = OfflineAPI('test-key', sleep_time=0, quota=quota, scheduler=scheduler)
+        api.get_recipe_information_bulk('1,2,3')  # 100 - 3 >= 30% reserved
+        quota.remaining = {'requests': 31}
+        with self.assertRaises(QuotaExceededError):
+            api.get_recipe_information_bulk('1,2')
+        api.get_recipe_information('1')
+        quota.remaining = {'requests': 20}
+        with self.assertRaises(QuotaExceededError):
+            api.get_recipe_information('1')  # 20 - 1 < 20% reserved for interactive calls
+        api.quick_answer('q')
+        self.assertEqual(scheduler.stats()['background']['preempted'], 1)
+        self.assertEqual(api.sent, ['recipes/informationBulk', 'recipes/1/information',
+                                    'recipes/quickAnswer'])
+
+    def test_preempted_call_waits_for_refresh(self):
+        quota = QuotaAccountant(remaining={'requests': 20}, margin=0)
+        scheduler = PriorityScheduler(limits={'requests': 100}, timeout=5)
+        api = OfflineAPI('test-key', sleep_time=0, quota=quota, scheduler=scheduler)
+        thread = threading.Thread(target=api.search_recipes_complex, args=('pasta',))
+        thread.start()
+        time.sleep(0.05)
+        self.assertEqual(api.sent, [])
+        self.assertEqual(scheduler.stats()['background']['queued'], 1)
+        quota.remaining = {'requests': 100}  # The daily quota was reset
+        api.quick_answer('q')
+        thread.join()
+        self.assertEqual(api.sent, ['recipes/quickAnswer', 'recipes/complexSearch'])
+
+    def test_async_calls_are_scheduled(self):
+        class OfflineAsyncAPI(AsyncAPI):
+            async def _transmit(self, path, method, query_, params_, json_):
+                return build_response(200, {}, b'{}')
+
+        scheduler = PriorityScheduler()
+        api = OfflineAsyncAPI('test-key', sleep_time=0, scheduler=scheduler)
+
+        async def calls():
+            return await asyncio.gather(api.quick_answer('q'), api.get_recipe_information_bulk('1'))
+
+        responses = asyncio.run(calls())
+        self.assertEqual([response.status_code for response in responses], [200, 200])
+        self.assertEqual(scheduler.stats()['interactive']['admitted'], 1)
+        self.assertEqual(scheduler.stats()['background']['admitted'], 1)
+
+    def test_async_interactive_calls_jump_the_crawl(self):
+        """ Queued async calls wait on the event loop, not in executor threads """
+        class OfflineAsyncAPI(AsyncAPI):
+            sent = []
+
+            async def _transmit(self, path, method, query_, params_, json_):
+                self.sent.append(path)
+                return build_response(200, {}, b'{}')
+
+        scheduler = PriorityScheduler()
+        api = OfflineAsyncAPI('test-key', rate_limiter=RateLimiter(requests_per_second=20),
+                              scheduler=scheduler)
+
+        async def calls():
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=2))
+            crawl = [asyncio.ensure_future(api.get_recipe_information_bulk(str(i))) for i in range(30)]
+            await asyncio.sleep(0.1)  # Let the crawl queue up
+            start = time.monotonic()
+            await api.quick_answer('How much vitamin c is in 2 apples?')
+            latency = time.monotonic() - start
+            for call in crawl:
+                call.cancel()
+            await asyncio.gather(*crawl, return_exceptions=True)
+            return latency
+
+        latency = asyncio.run(calls())
+        self.assertLess(latency, 0.2)
+        self.assertLess(api.sent.index('recipes/quickAnswer'), 6)
+        self.assertEqual(scheduler.stats()['background']['queued'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
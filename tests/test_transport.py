@@ -0,0 +1,58 @@
+import unittest
+from spoonacular import API, HTTPXTransport, RequestsTransport
+from tests.fake_server import FakeSpoonacular
+
+try:
+    import httpx  # noqa: F401
+except ImportError:
+    httpx = None
+
+
+class TestRequestsTransport(unittest.TestCase):
+
+    def test_each_instance_owns_its_pool(self):
+        first, second = API('test-key'), API('test-key')
+        self.assertIsNot(first.transport.session, second.transport.session)
+        transport = RequestsTransport(pool_maxsize=32, pool_block=True)
+        adapter = transport.session.get_adapter('https://api.spoonacular.com/')
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertTrue(adapter._pool_block)
+        self.assertIs(first.session, first.transport.session)
+
+    def test_connections_are_reused(self):
+        with FakeSpoonacular() as server:
+            with API('test-key', sleep_time=0) as api:
+                api.api_root = server.url
+                for _ in range(10):
+                    api.get_wine_description('merlot')
+            self.assertEqual(server.connections_opened, 1)
+
+    def test_keep_alive_off(self):
+        with FakeSpoonacular() as server:
+            with API('test-key', sleep_time=0,
+                     transport=RequestsTransport(keep_alive=False)) as api:
+                api.api_root = server.url
+                for _ in range(5):
+                    api.get_wine_description('merlot')
+            self.assertEqual(server.connections_opened, 5)
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class TestHTTPXTransport(unittest.TestCase):
+
+    def test_requests_match_requests_transport(self):
+        with FakeSpoonacular() as server:
+            with API('test-key', sleep_time=0, transport=HTTPXTransport()) as api:
+                api.api_root = server.url
+                response = api.search_recipes_by_ingredients('apples,flour', fillIngredients=False)
+                self.assertEqual(response.json()['params'],
+                                 {'ingredients': ['apples,flour'], 'fillIngredients': ['false'],
+                                  'apiKey': ['test-key']})
+                response = api.parse_ingredients('1 apple', servings=2)
+                self.assertEqual(response.json()['body'], 'ingredientList=1+apple&servings=2')
+                self.assertEqual(api.callsRemaining['requests'], 148)
+                self.assertIsNone(api.session)
+
+
+if __name__ == '__main__':
+    unittest.main()